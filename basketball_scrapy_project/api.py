@@ -0,0 +1,252 @@
+# Serveur HTTP local qui expose la base SQLite au dashboard
+#
+# Le dashboard ne télécharge plus des fichiers d'équipe complets pour les filtrer
+# côté navigateur: il demande uniquement les tirs (ou agrégats) dont une vue a
+# besoin. Les réponses sont paginées, compressées (brotli si disponible, sinon
+# gzip), identifiées par un ETag et gardées dans un cache LRU en mémoire, vidé dès
+# qu'un crawl modifie la base.
+#
+# Routes:
+#     GET /api/players?season=2024
+#     GET /api/shots?player=c/curryst01&team=GSW&season=2024&quarter=4&zone=corner_3&clutch=1&page=1&page_size=5000
+#     GET /api/aggregates?group_by=quarter,type&player=c/curryst01&season=2024
+
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from basketball_scrapy_project.query import GROUP_COLUMNS, SHOT_LIST_COLUMNS, build_shot_query, resolve_player_ids
+from basketball_scrapy_project.store import Store
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 5000
+MAX_PAGE_SIZE = 20000
+# Réponses plus petites envoyées sans compression
+MIN_COMPRESS_SIZE = 1024
+
+# Champs dérivés (enrich.py) ajoutés aux tirs lorsqu'ils sont connus
+DERIVED_FEED_COLUMNS = ['x_feet', 'y_feet', 'zone', 'elapsed_seconds', 'margin_before', 'margin_after', 'is_clutch']
+FEED_COLUMNS = SHOT_LIST_COLUMNS + [
+    column for column in ['score_description', 'source_url'] + DERIVED_FEED_COLUMNS if column not in SHOT_LIST_COLUMNS
+]
+
+
+def shot_to_feed(row):
+    """Convertit une ligne de la table shots au format des fichiers JSON exportés (ShotChartData)
+
+    Le dashboard lit ce format: valeurs en chaînes, is_made à 'True'/'False' et
+    date/équipes telles que les produit le tooltip ("Oct 25" et "2023, ATL vs CHO").
+    """
+    game_date = date.fromisoformat(row['game_date'])
+    shot = {
+        'player_id': row['player_id'],
+        'player_name': row['player_name'],
+        'season': row['season'],
+        'source_url': row['source_url'],
+        'x_coordinate': str(row['x_coordinate']),
+        'y_coordinate': str(row['y_coordinate']),
+        'is_made': 'True' if row['is_made'] else 'False',
+        'game_date': f"{game_date.strftime('%b')} {game_date.day}",
+        'teams': f"{game_date.year}, {row['team']} vs {row['opponent']}",
+        'quarter': row['quarter'],
+        'time_remaining': row['time_remaining'],
+        'shot_type': row['shot_type'],
+        'shot_distance': '' if row['shot_distance'] is None else str(row['shot_distance']),
+    }
+    if row['score_description']:
+        shot['score_description'] = row['score_description']
+    for column in DERIVED_FEED_COLUMNS:
+        if row[column] is not None:
+            shot[column] = row[column]
+    return shot
+
+
+class ResponseCache:
+    """Cache LRU des réponses encodées, indexé par route et paramètres"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class DataAPI:
+    """Calcule les réponses JSON de l'API à partir de la base"""
+
+    def __init__(self, db_path, cache_size=256):
+        self.store = Store(db_path, check_same_thread=False)
+        self.store_lock = threading.Lock()
+        self.cache = ResponseCache(cache_size)
+        self.data_version = self.store.data_version()
+
+    def _filters(self, params):
+        filters = {
+            'team': params.get('team', '').upper() or None,
+            'season': params.get('season'),
+            'date_from': params.get('from'),
+            'date_to': params.get('to'),
+            'quarter': params.get('quarter'),
+            'zone': params.get('zone'),
+            'clutch': params.get('clutch') in ('1', 'true'),
+        }
+        if params.get('player'):
+            filters['player_ids'] = resolve_player_ids(self.store, params['player'])
+        return filters
+
+    def players(self, params):
+        sql = "SELECT player_id AS id, player_name AS name, team FROM players"
+        args = []
+        if params.get('season'):
+            sql += " WHERE player_id IN (SELECT DISTINCT player_id FROM shots WHERE season = ?)"
+            args.append(params['season'])
+        sql += " ORDER BY player_name"
+        return [dict(row) for row in self.store.execute(sql, args)]
+
+    def shots(self, params):
+        page = max(1, int(params.get('page', 1)))
+        page_size = min(MAX_PAGE_SIZE, max(1, int(params.get('page_size', DEFAULT_PAGE_SIZE))))
+
+        filters = self._filters(params)
+        count_sql, count_args = build_shot_query(dict(filters, aggregate=True))
+        total = self.store.execute(count_sql, count_args)[0]['attempts']
+
+        sql, args = build_shot_query(filters, columns=FEED_COLUMNS)
+        rows = self.store.execute(f"{sql} LIMIT ? OFFSET ?", args + [page_size, (page - 1) * page_size])
+        return {
+            'items': [shot_to_feed(row) for row in rows],
+            'page': page,
+            'page_size': page_size,
+            'total': total,
+            'has_more': page * page_size < total,
+        }
+
+    def aggregates(self, params):
+        group_by = [key for key in params.get('group_by', '').split(',') if key]
+        unknown = [key for key in group_by if key not in GROUP_COLUMNS]
+        if unknown:
+            raise ValueError(f"Regroupement inconnu: {', '.join(unknown)}")
+        filters = self._filters(params)
+        filters['aggregate'] = True
+        sql, args = build_shot_query(filters, group_by)
+        return [dict(row) for row in self.store.execute(sql, args)]
+
+    ROUTES = {
+        '/api/players': players,
+        '/api/shots': shots,
+        '/api/aggregates': aggregates,
+    }
+
+    def handle(self, path, params):
+        """Retourne (corps JSON encodé, ETag) pour une route, depuis le cache si possible"""
+        route = self.ROUTES.get(path)
+        if route is None:
+            return None
+
+        with self.store_lock:
+            # Une écriture d'une autre connexion (crawl, import) invalide le cache
+            version = self.store.data_version()
+            if version != self.data_version:
+                self.data_version = version
+                self.cache.clear()
+
+            key = (path, tuple(sorted(params.items())))
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+            body = json.dumps(route(self, params), separators=(',', ':')).encode('utf-8')
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        encoded = {'identity': body}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            encoded['gzip'] = gzip.compress(body, compresslevel=6)
+            if brotli is not None:
+                encoded['br'] = brotli.compress(body, quality=5)
+        self.cache.put(key, (encoded, etag))
+        return encoded, etag
+
+
+class APIRequestHandler(BaseHTTPRequestHandler):
+    api = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            result = self.api.handle(url.path.rstrip('/'), params)
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        if result is None:
+            self._send_json(404, {'error': f"Route inconnue: {url.path}"})
+            return
+
+        encoded, etag = result
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        accepted = self.headers.get('Accept-Encoding', '')
+        encoding = next((name for name in ('br', 'gzip') if name in encoded and name in accepted), 'identity')
+        body = encoded[encoding]
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        if encoding != 'identity':
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def create_server(db_path, host='127.0.0.1', port=8000, cache_size=256):
+    """Crée le serveur HTTP de l'API (à lancer avec serve_forever())"""
+    handler = type('BoundAPIRequestHandler', (APIRequestHandler,), {'api': DataAPI(db_path, cache_size)})
+    return ThreadingHTTPServer((host, port), handler)
@@ -0,0 +1,368 @@
+# Graphe de construction des artefacts dérivés d'une saison (façon make)
+#
+# Sources: les fichiers bruts du crawl all-teams, {source_dir}/{code}_shots_{saison}.json.
+# Nœuds et sorties (chemins relatifs au dossier de sortie, public/data par défaut):
+#     team:GSW     shots/gsw_shots_{saison}.json           tirs de l'équipe nettoyés
+#                                                        (clé naturelle complète, dédoublonnés, triés)
+#     combined     shots/all_teams_shots_{saison}.json     {code: {team_name, shots}}
+#                  shots/all_teams_shots_{saison}.csv
+#     players      shots/player_c_curryst01_{saison}.json  un fichier par joueur, toutes équipes
+#     aggregates   aggregates/shots_{saison}.json          réussite par équipe et par joueur
+#     grids        grids/{saison}/...                      grilles spatiales (voir grids.py)
+#
+# La clé d'un nœud est l'empreinte (sha256) de son nom, de BUILD_VERSION, de ses
+# paramètres et du contenu de ses entrées; elle est comparée à celle du dernier build,
+# enregistrée avec les empreintes des sorties dans {output_dir}/.build_state.json.
+# Un nœud n'est reconstruit que si sa clé a changé ou si une de ses sorties a disparu
+# ou été modifiée. Un fichier dont le contenu n'a pas changé n'est pas réécrit, et une
+# sortie qui n'est plus produite (joueur parti) est supprimée.
+#
+# Les nœuds d'un même niveau (les équipes, puis les quatre artefacts qui en dépendent)
+# sont indépendants et tournent dans un pool de processus. Les empreintes des entrées
+# sont mises en cache par (taille, mtime): un build sans changement ne relit aucun fichier.
+
+import csv
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from basketball_scrapy_project.store import SHOT_KEY, normalize_shot
+
+# À incrémenter quand le format d'un artefact change: tout est alors reconstruit
+BUILD_VERSION = 1
+
+STATE_FILE = '.build_state.json'
+
+QUARTER_ORDER = {'1st': 1, '2nd': 2, '3rd': 3, '4th': 4}
+
+
+def _hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _dump(payload):
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def write_if_changed(path, data):
+    """Écrit data (bytes) si le contenu du fichier diffère; retourne son empreinte"""
+    digest = _hash_bytes(data)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if _hash_bytes(f.read()) == digest:
+                return digest
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return digest
+
+
+def _seconds(time_remaining):
+    minutes, _, seconds = (time_remaining or '').partition(':')
+    try:
+        return int(minutes) * 60 + int(float(seconds or 0))
+    except ValueError:
+        return 0
+
+
+def _period(quarter):
+    if quarter in QUARTER_ORDER:
+        return QUARTER_ORDER[quarter]
+    match = re.match(r'(\d*)\s*OT', quarter or '')
+    return 4 + int(match.group(1) or 1) if match else 99
+
+
+def clean_shots(items):
+    """Tirs bruts -> tirs valides, dédoublonnés sur la clé naturelle et triés
+
+    Le format des tirs (celui du crawl, lu par le frontend) est conservé.
+    """
+    shots = {}
+    for item in items:
+        row = normalize_shot(item)
+        if row is None:
+            continue
+        key = tuple(row[column] for column in SHOT_KEY)
+        shots[key] = (row, item)
+    ordered = sorted(shots.values(), key=lambda entry: (
+        entry[0]['game_date'], _period(entry[0]['quarter']), -_seconds(entry[0]['time_remaining']),
+        entry[0]['player_id'], entry[0]['x_coordinate'], entry[0]['y_coordinate'],
+    ))
+    return [item for _, item in ordered]
+
+
+def _load_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _team_shots(inputs):
+    """{code: tirs} des fichiers d'équipe nettoyés (entrées des nœuds du second niveau)"""
+    return {code: _load_json(path) for code, path in sorted(inputs.items())}
+
+
+# Tâches des nœuds, exécutées dans les processus du pool:
+# task(inputs, output_dir, season, params) -> [(chemin relatif, bytes), ...]
+
+def team_task(inputs, output_dir, season, params):
+    code = params['team']
+    return [(f"shots/{code.lower()}_shots_{season}.json", _dump(clean_shots(_load_json(inputs['raw']))))]
+
+
+def combined_task(inputs, output_dir, season, params):
+    teams = _team_shots(inputs)
+    combined = {code: {'team_name': params['team_names'].get(code, code), 'shots': shots}
+                for code, shots in teams.items()}
+
+    buffer = io.StringIO()
+    fields = None
+    for code, shots in teams.items():
+        for shot in shots:
+            if fields is None:
+                fields = ['team_code'] + list(shot)
+                writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore', lineterminator='\n')
+                writer.writeheader()
+            writer.writerow({'team_code': code, **shot})
+
+    return [
+        (f"shots/all_teams_shots_{season}.json", _dump(combined)),
+        (f"shots/all_teams_shots_{season}.csv", buffer.getvalue().encode('utf-8')),
+    ]
+
+
+def players_task(inputs, output_dir, season, params):
+    players = {}
+    for shots in _team_shots(inputs).values():
+        for shot in shots:
+            players.setdefault(shot['player_id'], []).append(shot)
+    # Un joueur transféré a des tirs dans plusieurs équipes: un seul fichier, trié
+    return [(f"shots/player_{player_id.replace('/', '_')}_{season}.json", _dump(clean_shots(shots)))
+            for player_id, shots in sorted(players.items())]
+
+
+def _percentages(stats):
+    attempts, makes = stats['attempts'], stats['makes']
+    stats['fg_pct'] = round(100.0 * makes / attempts, 1) if attempts else None
+    stats['three_pct'] = round(100.0 * stats['three_makes'] / stats['three_attempts'], 1) if stats['three_attempts'] else None
+    stats['efg_pct'] = round(100.0 * (makes + 0.5 * stats['three_makes']) / attempts, 1) if attempts else None
+    stats['avg_distance'] = round(stats.pop('distance_sum') / attempts, 1) if attempts else None
+    return stats
+
+
+def aggregates_task(inputs, output_dir, season, params):
+    def empty():
+        return {'attempts': 0, 'makes': 0, 'three_attempts': 0, 'three_makes': 0, 'distance_sum': 0}
+
+    teams, players = {}, {}
+    for code, shots in _team_shots(inputs).items():
+        for shot in shots:
+            row = normalize_shot(shot)
+            player = players.setdefault(row['player_id'], {'player_name': row['player_name'], 'teams': [], **empty()})
+            if code not in player['teams']:
+                player['teams'].append(code)
+            for stats in (teams.setdefault(code, empty()), player):
+                stats['attempts'] += 1
+                stats['makes'] += row['is_made']
+                stats['distance_sum'] += row['shot_distance'] or 0
+                if row['shot_type'] == '3-pointer':
+                    stats['three_attempts'] += 1
+                    stats['three_makes'] += row['is_made']
+
+    payload = {
+        'season': season,
+        'teams': {code: _percentages(stats) for code, stats in sorted(teams.items())},
+        'players': {player_id: _percentages(stats) for player_id, stats in sorted(players.items())},
+    }
+    return [(f"aggregates/shots_{season}.json", _dump(payload))]
+
+
+def grids_task(inputs, output_dir, season, params):
+    import numpy as np
+
+    from basketball_scrapy_project.grids import build_grids, grid_files
+
+    rows = [normalize_shot(shot) for shots in _team_shots(inputs).values() for shot in shots]
+    arrays = {
+        'player_id': np.array([row['player_id'] for row in rows], dtype=object),
+        'team': np.array([row['team'] or '' for row in rows], dtype=object),
+        'x': np.array([row['x_coordinate'] for row in rows], dtype=np.float64),
+        'y': np.array([row['y_coordinate'] for row in rows], dtype=np.float64),
+        'made': np.array([row['is_made'] for row in rows], dtype=np.float64),
+    }
+    grids = build_grids(arrays, params['cell_sizes'], params['min_attempts'])
+    # Chemins relatifs au dossier de sortie: grids/{saison}/...
+    return [(path, _dump(payload)) for path, payload in grid_files(grids, 'grids', season)]
+
+
+def run_node(task, inputs, output_dir, season, params):
+    """Exécute un nœud et écrit ses sorties modifiées; retourne {chemin relatif: empreinte}"""
+    outputs = {}
+    for relative_path, data in task(inputs, output_dir, season, params):
+        outputs[relative_path] = write_if_changed(os.path.join(output_dir, relative_path), data)
+    return outputs
+
+
+class Node:
+    """Un artefact (ou groupe d'artefacts) du graphe et ses entrées"""
+
+    def __init__(self, name, task, inputs, params=None, deps=()):
+        self.name = name
+        self.task = task
+        # {nom: chemin}: fichiers sources, ou sorties des nœuds dont il dépend
+        self.inputs = inputs
+        self.params = params or {}
+        self.deps = list(deps)
+
+
+class BuildGraph:
+    """Graphe des artefacts d'une saison et état du dernier build"""
+
+    def __init__(self, source_dir, output_dir, season, team_names, cell_sizes=(10, 25, 50), min_attempts=1):
+        self.source_dir = source_dir
+        self.output_dir = output_dir
+        self.season = str(season)
+        self.state_path = os.path.join(output_dir, STATE_FILE)
+        self.state = {'files': {}, 'nodes': {}}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r') as f:
+                self.state = json.load(f)
+        self.nodes = self._nodes(team_names, list(cell_sizes), min_attempts)
+
+    def _nodes(self, team_names, cell_sizes, min_attempts):
+        nodes = []
+        team_outputs = {}
+        for code in sorted(team_names):
+            raw = os.path.join(self.source_dir, f"{code.lower()}_shots_{self.season}.json")
+            if not os.path.exists(raw) or not os.path.getsize(raw):
+                continue
+            nodes.append(Node(f"team:{code}", team_task, {'raw': raw}, {'team': code}))
+            team_outputs[code] = os.path.join(self.output_dir, 'shots', f"{code.lower()}_shots_{self.season}.json")
+        if not team_outputs:
+            return nodes
+
+        deps = [node.name for node in nodes]
+        nodes.append(Node('combined', combined_task, team_outputs, {'team_names': team_names}, deps))
+        nodes.append(Node('players', players_task, team_outputs, deps=deps))
+        nodes.append(Node('aggregates', aggregates_task, team_outputs, deps=deps))
+        nodes.append(Node('grids', grids_task, team_outputs,
+                          {'cell_sizes': cell_sizes, 'min_attempts': min_attempts}, deps))
+        return nodes
+
+    def file_hash(self, path):
+        """Empreinte du contenu d'un fichier, en cache tant que sa taille et son mtime ne changent pas"""
+        stat = os.stat(path)
+        cached = self.state['files'].get(path)
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['sha256']
+        with open(path, 'rb') as f:
+            digest = _hash_bytes(f.read())
+        self.state['files'][path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+        return digest
+
+    def node_key(self, node):
+        inputs = {name: self.file_hash(path) for name, path in sorted(node.inputs.items())}
+        description = {'node': node.name, 'version': BUILD_VERSION, 'season': self.season,
+                       'params': node.params, 'inputs': inputs}
+        return _hash_bytes(json.dumps(description, sort_keys=True).encode('utf-8'))
+
+    def stale_reason(self, node, key):
+        """Raison de reconstruire le nœud, None s'il est à jour"""
+        previous = self.state['nodes'].get(node.name)
+        if previous is None:
+            return 'jamais construit'
+        if previous['key'] != key:
+            return 'entrées modifiées'
+        for relative_path, digest in previous['outputs'].items():
+            path = os.path.join(self.output_dir, relative_path)
+            if not os.path.exists(path):
+                return f"sortie absente ({relative_path})"
+            if self.file_hash(path) != digest:
+                return f"sortie modifiée ({relative_path})"
+        return None
+
+    def levels(self):
+        """Nœuds groupés par niveau: chaque niveau ne dépend que des précédents"""
+        done, levels = set(), []
+        pending = list(self.nodes)
+        while pending:
+            level = [node for node in pending if all(dep in done for dep in node.deps)]
+            levels.append(level)
+            done.update(node.name for node in level)
+            pending = [node for node in pending if node.name not in done]
+        return levels
+
+    def build(self, jobs=None, force=False, dry_run=False, log=print):
+        """Reconstruit les nœuds périmés; retourne (nœuds reconstruits, nœuds à jour)"""
+        built, fresh = [], []
+        executor = None
+        jobs = jobs or os.cpu_count() or 1
+        if jobs > 1 and not dry_run:
+            # forkserver/spawn comme pour les parsers hors du crawl: pas de fork du processus appelant
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            executor = ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context(method))
+        try:
+            for level in self.levels():
+                pending = []
+                for node in level:
+                    if dry_run and any(dep in built for dep in node.deps):
+                        log(f"   {node.name}: dépendances périmées")
+                        pending.append((node, None))
+                        continue
+                    key = self.node_key(node)
+                    reason = 'forcé' if force else self.stale_reason(node, key)
+                    if reason is None:
+                        fresh.append(node.name)
+                        continue
+                    log(f"   {node.name}: {reason}")
+                    pending.append((node, key))
+                if dry_run:
+                    # Sans construire ce niveau, les clés des suivants ne sont pas connues:
+                    # ils sont annoncés périmés dès qu'une de leurs dépendances l'est
+                    built += [node.name for node, _ in pending]
+                    continue
+
+                start = time.perf_counter()
+                if executor is not None:
+                    futures = [(node, key, executor.submit(run_node, node.task, node.inputs, self.output_dir,
+                                                           self.season, node.params)) for node, key in pending]
+                    results = [(node, key, future.result()) for node, key, future in futures]
+                else:
+                    results = [(node, key, run_node(node.task, node.inputs, self.output_dir, self.season, node.params))
+                               for node, key in pending]
+                for node, key, outputs in results:
+                    self._record(node, key, outputs)
+                    built.append(node.name)
+                if pending:
+                    log(f"   {len(pending)} nœud(s) construit(s) en {time.perf_counter() - start:.1f}s")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if not dry_run:
+                self._save()
+        return built, fresh
+
+    def _record(self, node, key, outputs):
+        # Sorties du build précédent qui ne sont plus produites
+        previous = self.state['nodes'].get(node.name, {}).get('outputs', {})
+        for relative_path in set(previous) - set(outputs):
+            path = os.path.join(self.output_dir, relative_path)
+            if os.path.exists(path):
+                os.remove(path)
+            self.state['files'].pop(path, None)
+        self.state['nodes'][node.name] = {'key': key, 'outputs': outputs}
+
+    def _save(self):
+        # Fichiers disparus: inutile de garder leur empreinte
+        self.state['files'] = {path: entry for path, entry in self.state['files'].items() if os.path.exists(path)}
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
@@ -0,0 +1,298 @@
+# Capture de débogage des crawls, assez légère pour rester active en production
+#
+# Remplace les anciens DebugPipeline et SaveHtmlMiddleware (un open/close de
+# debug_items.json par item, un os.path.exists par réponse) et les pages HTML
+# complètes écrites par les spiders à chaque échec d'extraction.
+#
+# Le reactor ne fait que déposer les enregistrements dans une file bornée (jamais
+# bloquante: en cas de saturation l'enregistrement est abandonné et compté). Un
+# thread d'écriture sérialise les items échantillonnés et les écrit en JSONL par
+# lots, compresse les pages en échec et les déduplique par empreinte du contenu:
+#     items-0001.jsonl, items-0002.jsonl...     (nouveau fichier au-delà de DEBUG_CAPTURE_ROTATE_BYTES)
+#     roster_empty_3f2a9c01b7de.html.gz        (une page identique n'est écrite qu'une fois)
+#     snapshots.json                           (index des pages: URL, raison, empreinte, doublons)
+# DEBUG_CAPTURE_MAX_BYTES plafonne tout le dossier parent (debug/): au-delà, les
+# captures des crawls précédents sont supprimées, des plus anciennes aux plus
+# récentes, puis les fichiers les plus anciens du crawl en cours (snapshots.json
+# les marque "removed").
+#
+# Les spiders signalent une page à conserver avec le signal page_failed
+# (basketball_scrapy_project.signals); les exceptions des callbacks sont capturées
+# automatiquement.
+#
+# Settings:
+#     DEBUG_CAPTURE_ENABLED = True
+#     DEBUG_CAPTURE_DIR = "debug/{spider}_{time}"
+#     DEBUG_CAPTURE_SAMPLE_RATE = 100           # un item sur N (1: tous, 0: aucun)
+#     DEBUG_CAPTURE_FIRST_RESPONSE = True       # conserver la première page téléchargée
+#     DEBUG_CAPTURE_ROTATE_BYTES = 10485760
+#     DEBUG_CAPTURE_MAX_BYTES = 104857600
+#     DEBUG_CAPTURE_FLUSH_INTERVAL = 1.0        # secondes entre deux écritures des lots d'items
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from itemadapter import ItemAdapter
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.http import HtmlResponse
+
+from basketball_scrapy_project.signals import page_failed
+
+logger = logging.getLogger(__name__)
+
+# Taille du lot d'items au-delà de laquelle il est écrit sans attendre l'intervalle
+BUFFER_BYTES = 256 * 1024
+QUEUE_SIZE = 10000
+_CLOSE = object()
+
+
+class DebugWriter(threading.Thread):
+    """Thread d'écriture: items en JSONL par lots, pages compressées et dédupliquées"""
+
+    def __init__(self, directory, rotate_bytes, max_bytes, flush_interval=1.0):
+        super().__init__(name='debug-capture', daemon=True)
+        self.directory = directory
+        self.rotate_bytes = rotate_bytes
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(QUEUE_SIZE)
+        # Compteurs incrémentés par le reactor (dropped) et par le thread d'écriture
+        self.counts = Counter()
+        self.counts_lock = threading.Lock()
+        # Captures des crawls précédents [(dossier, taille)], de la plus ancienne à la plus récente
+        self.previous_runs = []
+        self.previous_bytes = 0
+        # Fichiers écrits {chemin: taille}, du plus ancien au plus récent
+        self.files = {}
+        self.total_bytes = 0
+        self.segment = None
+        self.segment_path = None
+        self.segment_index = 0
+        self.segment_bytes = 0
+        self.buffer = []
+        self.buffer_bytes = 0
+        self.digests = set()
+        self.snapshots = []
+
+    def submit(self, kind, payload):
+        """Dépose un enregistrement sans bloquer (abandonné si la file est pleine)"""
+        try:
+            self.queue.put_nowait((kind, payload))
+        except queue.Full:
+            self.count('dropped')
+
+    def count(self, key):
+        with self.counts_lock:
+            self.counts[key] += 1
+
+    def close(self):
+        self.queue.put(_CLOSE)
+        self.join()
+
+    def run(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_previous_runs()
+        self._enforce_limit()
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                record = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                record = None
+            if record is _CLOSE:
+                break
+            try:
+                if record is not None:
+                    kind, payload = record
+                    if kind == 'item':
+                        self._buffer_item(payload)
+                    else:
+                        self._write_snapshot(**payload)
+                if self.buffer_bytes >= BUFFER_BYTES or time.monotonic() >= deadline:
+                    self._flush()
+                    deadline = time.monotonic() + self.flush_interval
+            except Exception as e:
+                # Une erreur de capture ne doit jamais interrompre le crawl
+                self.count('errors')
+                logger.warning(f"Capture de débogage: {e}")
+        self._flush()
+        if self.segment is not None:
+            self.segment.close()
+        with open(os.path.join(self.directory, 'snapshots.json'), 'w') as f:
+            json.dump(self.snapshots, f, indent=2)
+
+    def _buffer_item(self, item):
+        line = (json.dumps(item, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+        self.buffer.append(line)
+        self.buffer_bytes += len(line)
+        self.count('items')
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        data = b''.join(self.buffer)
+        self.buffer, self.buffer_bytes = [], 0
+        if self.segment is None or (self.segment_bytes and self.segment_bytes + len(data) > self.rotate_bytes):
+            self._rotate()
+        self.segment.write(data)
+        self.segment.flush()
+        self.segment_bytes += len(data)
+        self._add_bytes(self.segment_path, len(data))
+
+    def _rotate(self):
+        if self.segment is not None:
+            self.segment.close()
+        self.segment_index += 1
+        self.segment_path = os.path.join(self.directory, f"items-{self.segment_index:04d}.jsonl")
+        self.segment = open(self.segment_path, 'wb')
+        self.segment_bytes = 0
+
+    def _write_snapshot(self, reason, url, status, body):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        digest = hashlib.sha1(body).hexdigest()
+        entry = {'reason': reason, 'url': url, 'status': status, 'sha1': digest,
+                 'captured_at': datetime.now().isoformat(timespec='seconds')}
+        self.snapshots.append(entry)
+        if digest in self.digests:
+            entry['duplicate'] = True
+            self.count('duplicate_snapshots')
+            return
+        self.digests.add(digest)
+        name = f"{re.sub(r'[^A-Za-z0-9_-]+', '_', reason)}_{digest[:12]}.html.gz"
+        path = os.path.join(self.directory, name)
+        data = gzip.compress(body, compresslevel=6)
+        with open(path, 'wb') as f:
+            f.write(data)
+        entry['file'] = name
+        self.count('snapshots')
+        logger.info(f"Page enregistrée pour débogage ({reason}): {path}")
+        self._add_bytes(path, len(data))
+
+    def _load_previous_runs(self):
+        """Captures terminées (avec snapshots.json) des autres crawls du dossier parent"""
+        parent = os.path.dirname(os.path.abspath(self.directory))
+        current = os.path.abspath(self.directory)
+        runs = []
+        for entry in os.scandir(parent):
+            if not entry.is_dir() or entry.path == current or not os.path.exists(os.path.join(entry.path, 'snapshots.json')):
+                continue
+            size = 0
+            for root, _, names in os.walk(entry.path):
+                size += sum(os.path.getsize(os.path.join(root, name)) for name in names)
+            runs.append((entry.stat().st_mtime, entry.path, size))
+        self.previous_runs = [(path, size) for _, path, size in sorted(runs)]
+        self.previous_bytes = sum(size for _, size in self.previous_runs)
+
+    def _add_bytes(self, path, size):
+        self.files[path] = self.files.get(path, 0) + size
+        self.total_bytes += size
+        self._enforce_limit()
+
+    def _enforce_limit(self):
+        # Plafond: supprimer les captures précédentes, puis les fichiers les plus
+        # anciens de ce crawl, sauf le fichier d'items en cours
+        while self.total_bytes + self.previous_bytes > self.max_bytes:
+            if self.previous_runs:
+                path, size = self.previous_runs.pop(0)
+                shutil.rmtree(path, ignore_errors=True)
+                self.previous_bytes -= size
+                self.count('removed_runs')
+                continue
+            oldest = next((p for p in self.files if p != self.segment_path), None)
+            if oldest is None:
+                break
+            self.total_bytes -= self.files.pop(oldest)
+            os.remove(oldest)
+            self._forget_snapshot(os.path.basename(oldest))
+            self.count('removed_files')
+
+    def _forget_snapshot(self, name):
+        # L'index ne doit pas pointer vers une page supprimée; la page sera réécrite si elle revient
+        for entry in self.snapshots:
+            if entry.get('file') == name:
+                del entry['file']
+                entry['removed'] = True
+                self.digests.discard(entry['sha1'])
+
+
+class DebugCapture:
+    def __init__(self, crawler, sample_rate, capture_first_response):
+        self.crawler = crawler
+        self.sample_rate = sample_rate
+        self.capture_first_response = capture_first_response
+        self.items_seen = 0
+        self.writer = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('DEBUG_CAPTURE_ENABLED', True):
+            raise NotConfigured
+        ext = cls(crawler, settings.getint('DEBUG_CAPTURE_SAMPLE_RATE', 100), settings.getbool('DEBUG_CAPTURE_FIRST_RESPONSE', True))
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        crawler.signals.connect(ext.spider_error, signal=signals.spider_error)
+        crawler.signals.connect(ext.page_failed, signal=page_failed)
+        return ext
+
+    def spider_opened(self, spider):
+        settings = self.crawler.settings
+        start_time = self.crawler.stats.get_value('start_time') or datetime.now()
+        template = settings.get('DEBUG_CAPTURE_DIR') or 'debug/{spider}_{time}'
+        directory = template.format(spider=spider.name, time=start_time.strftime('%Y%m%d_%H%M%S'))
+        self.writer = DebugWriter(
+            directory,
+            settings.getint('DEBUG_CAPTURE_ROTATE_BYTES', 10 * 1024 * 1024),
+            settings.getint('DEBUG_CAPTURE_MAX_BYTES', 100 * 1024 * 1024),
+            settings.getfloat('DEBUG_CAPTURE_FLUSH_INTERVAL', 1.0),
+        )
+        self.writer.start()
+
+    def item_scraped(self, item, spider):
+        self.items_seen += 1
+        # Échantillonnage: le premier item puis un sur sample_rate
+        if self.sample_rate and (self.items_seen - 1) % self.sample_rate == 0:
+            self.writer.submit('item', ItemAdapter(item).asdict())
+
+    def response_received(self, response, request, spider):
+        if self.capture_first_response and isinstance(response, HtmlResponse):
+            self.capture_first_response = False
+            self._snapshot('first_response', response, response.body)
+
+    def spider_error(self, failure, response, spider):
+        self._snapshot(f"error_{failure.type.__name__}", response, response.body)
+
+    def page_failed(self, response, spider, reason, body=None):
+        self._snapshot(reason, response, response.body if body is None else body)
+
+    def _snapshot(self, reason, response, body):
+        if self.writer is not None:
+            self.writer.submit('snapshot', {'reason': reason, 'url': response.url, 'status': response.status, 'body': body})
+
+    def spider_closed(self, spider):
+        if self.writer is None:
+            return
+        self.writer.close()
+        counts = self.writer.counts
+        for key in ('items', 'snapshots', 'duplicate_snapshots', 'dropped', 'removed_files', 'removed_runs', 'errors'):
+            if counts[key]:
+                self.crawler.stats.set_value(f'debug_capture/{key}', counts[key], spider=spider)
+        logger.info(
+            f"Capture de débogage dans {self.writer.directory}: {counts['items']} items sur {self.items_seen}, "
+            f"{counts['snapshots']} pages ({counts['duplicate_snapshots']} doublons), "
+            f"{self.writer.total_bytes / 1024:.0f} Ko"
+        )
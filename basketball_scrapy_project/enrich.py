@@ -0,0 +1,141 @@
+# Champs dérivés des tirs calculés par lots avec pandas
+#
+# Chaque consommateur (dashboard, requêtes, classements) n'a plus à reparser le
+# quart-temps, le temps restant, les coordonnées en pixels et la description du
+# score: ces valeurs sont calculées une fois, de façon vectorisée, avant l'écriture
+# dans la base.
+#
+# Colonnes ajoutées:
+#     x_feet, y_feet      position en pieds par rapport au panier (x latéral, y vers le milieu du terrain)
+#     zone                restricted_area, paint, mid_range, corner_3 ou above_break_3
+#     period              1 à 4, puis 5, 6... pour les prolongations
+#     elapsed_seconds     secondes de jeu écoulées depuis le début du match au moment du tir
+#     margin_before       écart au score (équipe du tireur) avant le tir
+#     margin_after        écart au score après le tir
+#     is_clutch           5 dernières minutes du 4ème quart-temps ou d'une prolongation, écart <= 5 avant le tir
+
+import numpy as np
+import pandas as pd
+
+# Repère du shot chart: position du panier en pixels et échelle (10 px = 1 pied),
+# ajustés sur la distance indiquée dans les tooltips
+HOOP_X = 240.0
+HOOP_Y = 45.0
+PIXELS_PER_FOOT = 10.0
+
+# Géométrie NBA en pieds depuis le centre du panier
+RESTRICTED_AREA_RADIUS = 4.0
+PAINT_HALF_WIDTH = 8.0
+PAINT_LENGTH = 13.75
+THREE_POINT_RADIUS = 23.75
+CORNER_THREE_DISTANCE = 22.0
+CORNER_THREE_LENGTH = 8.75
+
+QUARTER_SECONDS = 720
+OVERTIME_SECONDS = 300
+CLUTCH_SECONDS = 300
+CLUTCH_MARGIN = 5
+
+ENRICHED_COLUMNS = [
+    'x_feet', 'y_feet', 'zone', 'period', 'elapsed_seconds', 'margin_before', 'margin_after', 'is_clutch',
+]
+
+# "POR now trails 22-29" (tir réussi, score après le tir) ou "POR trails 22-29" (tir manqué);
+# le score de l'équipe nommée vient en premier
+SCORE_RE = r'(?:^|<br>)(?P<score_team>\w+)\s+(?P<now>now\s+)?(?:leads|trails|tied)\s+(?P<team_score>\d+)-(?P<other_score>\d+)'
+
+
+def _court_features(df):
+    x_feet = (pd.to_numeric(df['x_coordinate'], errors='coerce') - HOOP_X) / PIXELS_PER_FOOT
+    y_feet = (pd.to_numeric(df['y_coordinate'], errors='coerce') - HOOP_Y) / PIXELS_PER_FOOT
+    distance = np.hypot(x_feet, y_feet)
+
+    corner = (x_feet.abs() >= CORNER_THREE_DISTANCE) & (y_feet <= CORNER_THREE_LENGTH)
+    # Le type de tir fait foi; la géométrie ne sert que s'il est absent
+    shot_type = df['shot_type'].fillna('')
+    is_three = np.where(
+        shot_type == '', corner | (distance >= THREE_POINT_RADIUS), shot_type.str.startswith('3')
+    )
+    in_paint = (x_feet.abs() <= PAINT_HALF_WIDTH) & (y_feet <= PAINT_LENGTH)
+
+    zone = np.select(
+        [
+            x_feet.isna(),
+            is_three & corner,
+            is_three,
+            distance <= RESTRICTED_AREA_RADIUS,
+            in_paint,
+        ],
+        [None, 'corner_3', 'above_break_3', 'restricted_area', 'paint'],
+        default='mid_range',
+    )
+    return x_feet.round(1), y_feet.round(1), zone, is_three
+
+
+def _clock_features(df):
+    period_parts = df['quarter'].fillna('').str.extract(r'^(?P<number>\d+)\w*(?P<overtime>\s*OT)?$')
+    number = pd.to_numeric(period_parts['number'], errors='coerce')
+    overtime = period_parts['overtime'].notna()
+    period = number.where(~overtime, number + 4)
+
+    clock = df['time_remaining'].fillna('').str.extract(r'^(?P<minutes>\d+):(?P<seconds>\d+)')
+    remaining = pd.to_numeric(clock['minutes'], errors='coerce') * 60 + pd.to_numeric(clock['seconds'], errors='coerce')
+
+    period_start = np.where(overtime, 4 * QUARTER_SECONDS + (number - 1) * OVERTIME_SECONDS, (number - 1) * QUARTER_SECONDS)
+    period_length = np.where(overtime, OVERTIME_SECONDS, QUARTER_SECONDS)
+    elapsed = period_start + period_length - remaining
+    return period, remaining, elapsed
+
+
+def _score_features(df, is_three):
+    score = df['score_description'].fillna('').str.extract(SCORE_RE)
+    margin = pd.to_numeric(score['team_score'], errors='coerce') - pd.to_numeric(score['other_score'], errors='coerce')
+    # La description est donnée du point de vue de l'équipe du tireur; inverser sinon
+    margin = margin.where(score['score_team'].isna() | (score['score_team'] == df['team']) | df['team'].isna(), -margin)
+
+    # "now ..." décrit le score après un tir réussi: retirer les points du tir pour l'écart avant
+    made_points = np.where(is_three, 3, 2)
+    after_make = score['now'].notna()
+    margin_before = margin.where(~after_make, margin - made_points)
+    return margin_before, margin
+
+
+def enrich_shots(df):
+    """Ajoute les colonnes dérivées (ENRICHED_COLUMNS) à un DataFrame de lignes de la table shots"""
+    df = df.copy()
+    for column in ('team', 'score_description', 'shot_type', 'quarter', 'time_remaining'):
+        if column not in df:
+            df[column] = None
+
+    df['x_feet'], df['y_feet'], df['zone'], is_three = _court_features(df)
+    period, remaining, elapsed = _clock_features(df)
+    margin_before, margin_after = _score_features(df, is_three)
+
+    df['period'] = period.astype('Int64')
+    df['elapsed_seconds'] = pd.Series(elapsed, index=df.index).astype('Int64')
+    df['margin_before'] = margin_before.astype('Int64')
+    df['margin_after'] = margin_after.astype('Int64')
+
+    # Hors des 5 dernières minutes: jamais clutch; dans la fenêtre: inconnu sans score
+    late = (period >= 4) & (remaining <= CLUTCH_SECONDS)
+    close = margin_before.abs() <= CLUTCH_MARGIN
+    is_clutch = pd.Series(np.where(late, close.astype(float), 0.0), index=df.index)
+    df['is_clutch'] = is_clutch.where(~late | margin_before.notna()).astype('Int64')
+    return df
+
+
+def enrich_rows(rows):
+    """Version pour des lignes (dicts) prêtes à être insérées: retourne les lignes complétées"""
+    if not rows:
+        return rows
+    df = enrich_shots(pd.DataFrame(rows))
+    # Seules les colonnes dérivées sont recopiées (DataFrame.to_dict sur toutes les colonnes
+    # coûte plus cher que l'enrichissement); valeurs manquantes converties en None pour SQLite
+    columns = {
+        column: df[column].astype(object).where(df[column].notna(), None).tolist()
+        for column in ENRICHED_COLUMNS
+    }
+    return [
+        dict(row, **{column: values[index] for column, values in columns.items()})
+        for index, row in enumerate(rows)
+    ]
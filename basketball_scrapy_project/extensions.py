@@ -0,0 +1,412 @@
+# Extensions Scrapy du projet
+#
+# CrawlMetrics mesure où passe le temps d'une exécution: attente dans le
+# scheduler, attente du slot de téléchargement (DOWNLOAD_DELAY, concurrence),
+# latence réseau, rendu navigateur, temps passé dans chaque callback, débit
+# d'items et d'octets, cache HTTP, retries et réponses 429. Les mesures sont
+# écrites en JSON à la fermeture du spider et peuvent être exposées pendant le
+# crawl au format texte Prometheus.
+#
+# Settings:
+#     METRICS_ENABLED = True
+#     METRICS_FILE = "metrics/{spider}_{time}.json"   # None pour ne rien écrire
+#     METRICS_PROMETHEUS_PORT = None                  # ex: 9410 -> http://127.0.0.1:9410/metrics
+#
+# CrawlTrace (désactivée par défaut) enregistre la chronologie de chaque requête
+# (scheduler, slot, téléchargement ou rendu, callback, export des items) dans un
+# fichier Chrome trace, lisible dans https://ui.perfetto.dev ou chrome://tracing.
+#
+# Settings:
+#     TRACE_ENABLED = False
+#     TRACE_FILE = "traces/{spider}_{time}.json"
+
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+from basketball_scrapy_project.signals import callback_processed
+
+logger = logging.getLogger(__name__)
+
+# Bornes des histogrammes de durées (secondes), au format des buckets Prometheus
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class Histogram:
+    """Histogramme à buckets fixes (nombre, somme, maximum et comptes cumulés par borne)"""
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def cumulative(self):
+        total, result = 0, []
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q):
+        """Borne supérieure du bucket contenant le quantile q (estimation)"""
+        if not self.count:
+            return None
+        target = q * self.count
+        for bound, total in self.cumulative():
+            if total >= target:
+                return self.max if bound == '+Inf' else min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 4),
+            'mean': round(self.sum / self.count, 4) if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'max': round(self.max, 4),
+            'buckets': {str(bound): total for bound, total in self.cumulative()},
+        }
+
+
+class CrawlMetrics:
+    def __init__(self, crawler, path_template, prometheus_port):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.path_template = path_template
+        self.prometheus_port = prometheus_port
+        self.histograms = defaultdict(Histogram)
+        self.counters = Counter()
+        self.start_time = None
+        self.listener = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('METRICS_ENABLED', True):
+            raise NotConfigured
+        ext = cls(
+            crawler,
+            crawler.settings.get('METRICS_FILE'),
+            crawler.settings.getint('METRICS_PROMETHEUS_PORT') or None,
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.request_scheduled, signal=signals.request_scheduled)
+        crawler.signals.connect(ext.request_reached_downloader, signal=signals.request_reached_downloader)
+        crawler.signals.connect(ext.request_left_downloader, signal=signals.request_left_downloader)
+        crawler.signals.connect(ext.response_downloaded, signal=signals.response_downloaded)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        crawler.signals.connect(ext.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(ext.callback_processed, signal=callback_processed)
+        return ext
+
+    def spider_opened(self, spider):
+        self.start_time = time.monotonic()
+        if self.prometheus_port:
+            self._listen(spider)
+
+    def request_scheduled(self, request, spider):
+        request.meta.setdefault('metrics_scheduled_at', time.monotonic())
+
+    def request_reached_downloader(self, request, spider):
+        now = time.monotonic()
+        request.meta['metrics_reached_downloader_at'] = now
+        scheduled_at = request.meta.get('metrics_scheduled_at')
+        if scheduled_at is not None:
+            self.histograms['scheduler_wait_seconds'].observe(now - scheduled_at)
+
+    def request_left_downloader(self, request, spider):
+        reached_at = request.meta.pop('metrics_reached_downloader_at', None)
+        if reached_at is None:
+            return
+        # Temps dans le downloader = attente du slot (délai, concurrence) + téléchargement
+        in_downloader = time.monotonic() - reached_at
+        latency = request.meta.get('download_latency')
+        if 'render_time' in request.meta:
+            latency = request.meta['render_time']
+        if latency is not None:
+            self.histograms['slot_wait_seconds'].observe(max(0.0, in_downloader - latency))
+
+    def response_downloaded(self, response, request, spider):
+        # Réponses réellement téléchargées (ni cache HTTP, ni réponses générées par un middleware)
+        self.counters[f'responses_status_{response.status}'] += 1
+        self.counters['bytes_downloaded'] += len(response.body)
+        if 'render_time' in request.meta:
+            self.histograms['render_seconds'].observe(request.meta['render_time'])
+        elif request.meta.get('download_latency') is not None:
+            self.histograms['download_latency_seconds'].observe(request.meta['download_latency'])
+        if response.status == 429:
+            self.counters['too_many_requests'] += 1
+
+    def response_received(self, response, request, spider):
+        self.counters['responses'] += 1
+        if 'cached' in response.flags:
+            self.counters['cache_hits'] += 1
+
+    def item_scraped(self, item, response, spider):
+        self.counters['items'] += 1
+
+    def callback_processed(self, response, spider, callback, duration):
+        self.histograms[f'parse_seconds:{callback}'].observe(duration)
+
+    def snapshot(self):
+        """Métriques courantes (compteurs, débits et histogrammes)"""
+        elapsed = time.monotonic() - self.start_time if self.start_time else 0.0
+        counters = dict(self.counters)
+        # Compteurs tenus par les middlewares de Scrapy (retry, cache HTTP)
+        for key in ('retry/count', 'httpcache/hit', 'httpcache/miss', 'httpcache/store'):
+            value = self.stats.get_value(key)
+            if value is not None:
+                counters[key.replace('/', '_')] = value
+        return {
+            'elapsed_seconds': round(elapsed, 3),
+            'items_per_second': round(self.counters['items'] / elapsed, 3) if elapsed else 0.0,
+            'bytes_per_second': round(self.counters['bytes_downloaded'] / elapsed, 1) if elapsed else 0.0,
+            'counters': counters,
+            'histograms': {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())},
+        }
+
+    def spider_closed(self, spider, reason):
+        if self.listener is not None:
+            self.listener.stopListening()
+        metrics = self.snapshot()
+        metrics.update({'spider': spider.name, 'reason': reason, 'finished_at': datetime.now().isoformat(timespec='seconds')})
+
+        self.stats.set_value('metrics/items_per_second', metrics['items_per_second'], spider=spider)
+        parse = {name.split(':', 1)[1]: h['sum'] for name, h in metrics['histograms'].items() if name.startswith('parse_seconds:')}
+        logger.info(
+            f"Métriques: {self.counters['items']} items ({metrics['items_per_second']}/s), "
+            f"{self.counters['bytes_downloaded'] / 1024:.0f} Ko téléchargés, {self.counters['cache_hits']} depuis le cache, "
+            f"{self.counters['too_many_requests']} réponses 429, temps de parsing par callback: "
+            + ', '.join(f"{name} {seconds:.2f}s" for name, seconds in parse.items())
+        )
+
+        if self.path_template:
+            path = self.path_template.format(spider=spider.name, time=datetime.now().strftime('%Y%m%d_%H%M%S'))
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(metrics, f, indent=2)
+            logger.info(f"Métriques du crawl écrites dans {path}")
+
+    def prometheus_text(self):
+        """Métriques au format texte d'exposition Prometheus"""
+        spider = self.crawler.spider.name if self.crawler.spider else ''
+        label = f'spider="{spider}"'
+        metrics = self.snapshot()
+        lines = [f'scrapy_elapsed_seconds{{{label}}} {metrics["elapsed_seconds"]}']
+        for name, value in sorted(metrics['counters'].items()):
+            lines.append(f'scrapy_{name}_total{{{label}}} {value}')
+        for name, histogram in sorted(self.histograms.items()):
+            name, _, callback = name.partition(':')
+            labels = label + (f',callback="{callback}"' if callback else '')
+            for bound, total in histogram.cumulative():
+                lines.append(f'scrapy_{name}_bucket{{{labels},le="{bound}"}} {total}')
+            lines.append(f'scrapy_{name}_sum{{{labels}}} {histogram.sum}')
+            lines.append(f'scrapy_{name}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def _listen(self, spider):
+        # Serveur HTTP sur le reactor de Scrapy: pas de thread à synchroniser
+        from twisted.internet import reactor
+        from twisted.web import resource, server
+
+        metrics = self
+
+        class MetricsResource(resource.Resource):
+            isLeaf = True
+
+            def render_GET(self, request):
+                request.setHeader(b'Content-Type', b'text/plain; version=0.0.4; charset=utf-8')
+                return metrics.prometheus_text().encode('utf-8')
+
+        self.listener = reactor.listenTCP(self.prometheus_port, server.Site(MetricsResource()), interface='127.0.0.1')
+        spider.logger.info(f"Métriques Prometheus sur http://127.0.0.1:{self.prometheus_port}/metrics")
+
+
+# Type de page d'après l'URL (premier motif reconnu)
+URL_TYPES = (
+    ('boxscore', re.compile(r'/boxscores/')),
+    ('schedule', re.compile(r'/leagues/NBA_\d+_games')),
+    ('shooting', re.compile(r'/players/.+/shooting/')),
+    ('roster', re.compile(r'/teams/[A-Z]{3}/\d{4}\.html')),
+    ('player', re.compile(r'/players/')),
+)
+TEAM_URL_RE = re.compile(r'/teams/([A-Z]{3})/')
+
+
+def url_type(url):
+    """Type de page basketball-reference d'une URL (boxscore, schedule, shooting, roster, player, other)"""
+    for name, pattern in URL_TYPES:
+        if pattern.search(url):
+            return name
+    return 'other'
+
+
+class CrawlTrace:
+    """Chronologie des requêtes au format Chrome trace (événements "X" en microsecondes)
+
+    Chaque requête a sa propre piste (tid), nommée d'après son type et son URL;
+    l'export des feeds à la fermeture a une piste dédiée. Les spans portent le
+    spider, l'équipe et le type d'URL.
+    """
+
+    FEED_TRACK = 0
+
+    def __init__(self, crawler, path_template):
+        self.crawler = crawler
+        self.path_template = path_template
+        self.origin = time.monotonic()
+        self.pid = os.getpid()
+        self.events = []
+        self.next_track = self.FEED_TRACK + 1
+        self.spider_name = None
+        self.closed_at = None
+        self.export_started = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('TRACE_ENABLED'):
+            raise NotConfigured
+        ext = cls(crawler, crawler.settings.get('TRACE_FILE') or 'traces/{spider}_{time}.json')
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.engine_stopped, signal=signals.engine_stopped)
+        crawler.signals.connect(ext.request_scheduled, signal=signals.request_scheduled)
+        crawler.signals.connect(ext.request_reached_downloader, signal=signals.request_reached_downloader)
+        crawler.signals.connect(ext.request_left_downloader, signal=signals.request_left_downloader)
+        crawler.signals.connect(ext.response_downloaded, signal=signals.response_downloaded)
+        crawler.signals.connect(ext.callback_processed, signal=callback_processed)
+        crawler.signals.connect(ext.feed_slot_closed, signal=signals.feed_slot_closed)
+        # Début de l'export d'un item: l'extension est chargée avant FeedExporter (ordre négatif),
+        # son récepteur item_scraped passe donc avant celui qui écrit l'item dans les feeds
+        crawler.signals.connect(ext.item_export_started, signal=signals.item_scraped)
+        return ext
+
+    def _ts(self, moment):
+        return round((moment - self.origin) * 1e6, 1)
+
+    def _span(self, name, track, start, duration, args=None):
+        self.events.append({
+            'name': name, 'cat': 'crawl', 'ph': 'X', 'pid': self.pid, 'tid': track,
+            'ts': self._ts(start), 'dur': round(max(0.0, duration) * 1e6, 1), 'args': args or {},
+        })
+
+    def _name_track(self, track, name):
+        self.events.append({'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': track, 'args': {'name': name}})
+
+    def _tags(self, request, spider):
+        """Tags d'une requête: spider, équipe (paramètre du spider, match ou URL) et type d'URL"""
+        team = getattr(spider, 'team_code', None)
+        if not team and request.meta.get('home_abbr'):
+            team = f"{request.meta.get('visitor_abbr')}@{request.meta['home_abbr']}"
+        if not team:
+            match = TEAM_URL_RE.search(request.url)
+            team = match.group(1) if match else None
+        return {'spider': spider.name, 'team': team, 'url_type': url_type(request.url), 'url': request.url}
+
+    def _track(self, request, spider):
+        """Piste de la requête (créée au premier span, les retries gardent la même)"""
+        if 'trace_track' not in request.meta:
+            request.meta['trace_track'] = self.next_track
+            request.meta['trace_tags'] = self._tags(request, spider)
+            self._name_track(self.next_track, f"{request.meta['trace_tags']['url_type']} {request.url}")
+            self.next_track += 1
+        return request.meta['trace_track'], request.meta['trace_tags']
+
+    def spider_opened(self, spider):
+        self.spider_name = spider.name
+        self.events.append({'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': spider.name}})
+        self._name_track(self.FEED_TRACK, 'feed export')
+        # Fin de l'export: connecté après FeedExporter, dont le récepteur est alors déjà en place
+        self.crawler.signals.connect(self.item_export_finished, signal=signals.item_scraped)
+
+    def request_scheduled(self, request, spider):
+        request.meta['trace_scheduled_at'] = time.monotonic()
+
+    def request_reached_downloader(self, request, spider):
+        now = time.monotonic()
+        request.meta['trace_reached_downloader_at'] = now
+        scheduled_at = request.meta.pop('trace_scheduled_at', None)
+        if scheduled_at is not None:
+            track, tags = self._track(request, spider)
+            self._span('scheduler wait', track, scheduled_at, now - scheduled_at, tags)
+
+    def request_left_downloader(self, request, spider):
+        now = time.monotonic()
+        reached_at = request.meta.pop('trace_reached_downloader_at', None)
+        if reached_at is None:
+            return
+        track, tags = self._track(request, spider)
+        if 'render_started_at' in request.meta:
+            started = request.meta['render_started_at']
+            self._span('render', track, started, request.meta.get('render_time', now - started), tags)
+            if 'render_wait' in request.meta:
+                wait_started, wait = request.meta['render_wait']
+                self._span('render wait_for', track, wait_started, wait, tags)
+        elif request.meta.get('download_latency') is not None:
+            started = now - request.meta['download_latency']
+            self._span('download', track, started, request.meta['download_latency'], tags)
+        else:
+            started = now
+        # Attente du slot: délai entre requêtes, concurrence, pool de navigateurs
+        self._span('slot wait', track, reached_at, started - reached_at, tags)
+
+    def response_downloaded(self, response, request, spider):
+        if response.status == 429:
+            track, tags = self._track(request, spider)
+            self.events.append({
+                'name': '429', 'cat': 'crawl', 'ph': 'i', 's': 't', 'pid': self.pid, 'tid': track,
+                'ts': self._ts(time.monotonic()), 'args': tags,
+            })
+
+    def callback_processed(self, response, spider, callback, started, duration):
+        if response.request is None:
+            return
+        track, tags = self._track(response.request, spider)
+        self._span(f'parse {callback}', track, started, duration, tags)
+
+    def item_export_started(self, item, response, spider):
+        self.export_started = time.monotonic()
+
+    def item_export_finished(self, item, response, spider):
+        if self.export_started is None or response is None or response.request is None:
+            return
+        track, tags = self._track(response.request, spider)
+        self._span('export item', track, self.export_started, time.monotonic() - self.export_started, tags)
+        self.export_started = None
+
+    def spider_closed(self, spider, reason):
+        self.closed_at = time.monotonic()
+
+    def feed_slot_closed(self, slot):
+        # Écriture et stockage d'un fichier de feed (à la fermeture du spider)
+        started = self.closed_at if self.closed_at is not None else time.monotonic()
+        self._span(f'store {slot.format} feed', self.FEED_TRACK, started, time.monotonic() - started,
+                   {'spider': self.spider_name, 'uri': slot.uri, 'items': slot.itemcount})
+
+    def engine_stopped(self):
+        path = self.path_template.format(
+            spider=self.spider_name or 'crawl', time=datetime.now().strftime('%Y%m%d_%H%M%S')
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+        logger.info(f"Trace du crawl ({len(self.events)} événements) écrite dans {path}")
@@ -0,0 +1,480 @@
+# Frontière partagée entre plusieurs processus de crawl (scraper.py worker)
+#
+# Une base SQLite (FRONTIER_PATH) sert à la fois de file de requêtes, de dupefilter
+# et de limiteur de débit pour tous les workers d'une même machine:
+#   - seen: empreintes des requêtes déjà planifiées, par spider (le premier worker qui
+#     planifie une URL la garde, les autres l'ignorent)
+#   - queue: requêtes sérialisées (request_to_dict + pickle). Un worker prend une
+#     requête en la louant (FRONTIER_LEASE_SECONDS); elle est terminée quand son
+#     callback a été traité, ou en échec quand son téléchargement a été abandonné
+#     (FrontierAckMiddleware). Une location expirée (worker arrêté ou planté) rend la
+#     requête aux autres workers, au plus FRONTIER_MAX_ATTEMPTS fois.
+#   - rate_limits: seau à jetons global par domaine (FRONTIER_RATE requêtes/s,
+#     FRONTIER_BURST jetons au plus), consulté après le cache HTTP: les pages servies
+#     par le cache ne consomment pas le budget du site.
+#
+# La file et le dupefilter persistent d'une exécution à l'autre (reprise d'un crawl
+# interrompu); scraper.py worker --reset repart de zéro.
+#
+# Les écritures tournent dans le thread du reactor: elles n'attendent le verrou d'un
+# autre worker que FRONTIER_BUSY_TIMEOUT secondes. Au-delà, les ajouts et
+# acquittements sont gardés en mémoire et réessayés au tour suivant, la location est
+# remise au tour suivant et la réservation d'un jeton est retentée après une pause.
+#
+# Settings:
+#     SCHEDULER = "basketball_scrapy_project.frontier.SharedScheduler"
+#     FRONTIER_PATH = "frontier.db"
+#     FRONTIER_WORKER = None            # identifiant du worker (défaut: machine-pid)
+#     FRONTIER_LEASE_SECONDS = 600
+#     FRONTIER_MAX_ATTEMPTS = 3
+#     FRONTIER_RATE = 0                 # requêtes/s par domaine pour tous les workers (0: pas de limite)
+#     FRONTIER_BURST = 1
+#     FRONTIER_WAL = True               # False sur un système de fichiers réseau (journal classique)
+#     FRONTIER_POLL_INTERVAL = 0.5      # secondes entre deux consultations de la file quand elle est vide
+#     FRONTIER_BUSY_TIMEOUT = 0.05      # attente maximale du verrou d'écriture dans le reactor (secondes)
+
+import logging
+import os
+import pickle
+import socket
+import sqlite3
+import time
+from collections import deque
+
+from scrapy import signals
+from scrapy.core.scheduler import BaseScheduler
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.utils.defer import maybe_deferred_to_future
+from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.misc import load_object
+from scrapy.utils.request import request_from_dict
+from twisted.internet.task import LoopingCall, deferLater
+
+from basketball_scrapy_project.signals import callback_processed, request_failed
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (
+    spider TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    PRIMARY KEY (spider, fingerprint)
+);
+CREATE TABLE IF NOT EXISTS queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    spider TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    url TEXT,
+    request BLOB NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    leased_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_queue_next ON queue (spider, state, priority DESC, id);
+CREATE TABLE IF NOT EXISTS rate_limits (
+    domain TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def is_locked(error):
+    """Verrou de la base tenu par un autre worker au-delà du délai d'attente"""
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in str(error) or 'busy' in str(error))
+
+
+class Frontier:
+    """File de requêtes, dupefilter et seau à jetons partagés dans une base SQLite"""
+
+    def __init__(self, path, wal=True, busy_timeout=30):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Transactions explicites (BEGIN IMMEDIATE): un seul worker à la fois modifie la file
+        self.connection = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        if wal:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+
+    def _transaction(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def push(self, spider, fingerprint, priority, url, data, dont_filter=False):
+        """Ajoute une requête; False si son empreinte a déjà été planifiée (par n'importe quel worker)"""
+        connection = self._transaction()
+        try:
+            if not dont_filter:
+                cursor = connection.execute('INSERT OR IGNORE INTO seen (spider, fingerprint) VALUES (?, ?)', (spider, fingerprint))
+                if cursor.rowcount == 0:
+                    connection.execute('COMMIT')
+                    return False
+            connection.execute(
+                'INSERT INTO queue (spider, priority, url, request) VALUES (?, ?, ?, ?)',
+                (spider, priority, url, data),
+            )
+            connection.execute('COMMIT')
+            return True
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def lease(self, spider, worker, lease_seconds, max_attempts):
+        """Loue la prochaine requête (priorité la plus haute, puis la plus ancienne): (id, données) ou None"""
+        now = time.time()
+        connection = self._transaction()
+        try:
+            # Locations expirées au-delà du nombre maximal de tentatives: abandonnées
+            connection.execute(
+                "UPDATE queue SET state = 'failed' WHERE spider = ? AND state = 'leased' AND leased_until < ? AND attempts >= ?",
+                (spider, now, max_attempts),
+            )
+            row = connection.execute(
+                "SELECT id, request FROM queue WHERE spider = ? AND state = 'pending' ORDER BY priority DESC, id LIMIT 1",
+                (spider,),
+            ).fetchone()
+            if row is None:
+                row = connection.execute(
+                    "SELECT id, request FROM queue WHERE spider = ? AND state = 'leased' AND leased_until < ? "
+                    "ORDER BY priority DESC, id LIMIT 1",
+                    (spider, now),
+                ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE queue SET state = 'leased', worker = ?, leased_until = ?, attempts = attempts + 1 WHERE id = ?",
+                    (worker, now + lease_seconds, row[0]),
+                )
+            connection.execute('COMMIT')
+            return row
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def done(self, request_id, state='done'):
+        """Termine une requête louée: 'done', ou 'failed' si son téléchargement a été abandonné"""
+        self.connection.execute("UPDATE queue SET state = ?, leased_until = NULL WHERE id = ?", (state, request_id))
+
+    def set_busy_timeout(self, seconds):
+        self.connection.execute(f'PRAGMA busy_timeout = {int(seconds * 1000)}')
+
+    def release(self, worker):
+        """Rend aux autres workers les requêtes encore louées par ce worker"""
+        self.connection.execute(
+            "UPDATE queue SET state = 'pending', worker = NULL, leased_until = NULL, attempts = attempts - 1 "
+            "WHERE worker = ? AND state = 'leased'",
+            (worker,),
+        )
+
+    def has_pending(self, spider):
+        """Requêtes en attente ou louées (un worker actif peut encore en planifier d'autres)"""
+        row = self.connection.execute(
+            "SELECT 1 FROM queue WHERE spider = ? AND state IN ('pending', 'leased') LIMIT 1", (spider,),
+        ).fetchone()
+        return row is not None
+
+    def counts(self, spider):
+        rows = self.connection.execute('SELECT state, COUNT(*) FROM queue WHERE spider = ? GROUP BY state', (spider,))
+        return dict(rows.fetchall())
+
+    def reset(self, spider):
+        connection = self._transaction()
+        connection.execute('DELETE FROM queue WHERE spider = ?', (spider,))
+        connection.execute('DELETE FROM seen WHERE spider = ?', (spider,))
+        connection.execute('COMMIT')
+
+    def take_token(self, domain, rate, burst):
+        """Réserve un jeton du seau du domaine; retourne l'attente (secondes) avant de l'utiliser
+
+        Le seau peut devenir négatif: chaque worker réserve sa place et attend son tour,
+        sans relire la base.
+        """
+        now = time.time()
+        connection = self._transaction()
+        try:
+            row = connection.execute('SELECT tokens, updated_at FROM rate_limits WHERE domain = ?', (domain,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate)
+            tokens -= 1
+            connection.execute(
+                'INSERT OR REPLACE INTO rate_limits (domain, tokens, updated_at) VALUES (?, ?, ?)', (domain, tokens, now),
+            )
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return max(0.0, -tokens / rate)
+
+    def penalize(self, domain, seconds, rate):
+        """Vide le seau du domaine pour `seconds` secondes (réponse 429), pour tous les workers"""
+        now = time.time()
+        connection = self._transaction()
+        connection.execute(
+            'INSERT INTO rate_limits (domain, tokens, updated_at) VALUES (?, ?, ?) '
+            'ON CONFLICT (domain) DO UPDATE SET tokens = MIN(tokens + (? - updated_at) * ?, excluded.tokens), updated_at = ?',
+            (domain, -seconds * rate, now, now, rate, now),
+        )
+        connection.execute('COMMIT')
+
+    def close(self):
+        self.connection.close()
+
+
+def open_frontier(settings):
+    """Frontière du setting FRONTIER_PATH, pour le reactor (attente courte du verrou)"""
+    return Frontier(settings.get('FRONTIER_PATH') or 'frontier.db', settings.getbool('FRONTIER_WAL', True),
+                    settings.getfloat('FRONTIER_BUSY_TIMEOUT', 0.05))
+
+
+class SharedScheduler(BaseScheduler):
+    """Scheduler Scrapy dont la file et le dupefilter sont la frontière partagée"""
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.frontier = open_frontier(settings)
+        self.worker = settings.get('FRONTIER_WORKER') or default_worker_id()
+        self.lease_seconds = settings.getfloat('FRONTIER_LEASE_SECONDS', 600)
+        self.max_attempts = settings.getint('FRONTIER_MAX_ATTEMPTS', 3)
+        self.poll_interval = settings.getfloat('FRONTIER_POLL_INTERVAL', 0.5)
+        self.poller = LoopingCall(self._wake_engine)
+        # Écritures différées faute d'avoir obtenu le verrou: ajouts (arguments de push,
+        # id remplacé) et acquittements ({id: état})
+        self.backlog = deque()
+        self.acks = {}
+        self.spider = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        scheduler = cls(crawler)
+        # Requête terminée quand son callback a été traité (requêtes suivantes déjà planifiées),
+        # quand il a levé une exception, ou quand la réponse n'atteint pas le callback
+        crawler.signals.connect(scheduler.callback_processed, signal=callback_processed)
+        crawler.signals.connect(scheduler.spider_error, signal=signals.spider_error)
+        crawler.signals.connect(scheduler.response_received, signal=signals.response_received)
+        crawler.signals.connect(scheduler.request_dropped, signal=signals.request_dropped)
+        crawler.signals.connect(scheduler.request_failed, signal=request_failed)
+        return scheduler
+
+    def open(self, spider):
+        self.spider = spider
+        logger.info(f"Frontière partagée {self.frontier.path} (worker {self.worker})")
+        self.poller.start(self.poll_interval, now=False)
+
+    def _wake_engine(self):
+        # Sans cela, un worker dont la file était vide n'y revient qu'au heartbeat du
+        # moteur (5 s), alors que d'autres workers peuvent l'avoir remplie entre-temps
+        self._flush()
+        slot = getattr(self.crawler.engine, 'slot', None)
+        if slot is not None:
+            slot.nextcall.schedule()
+
+    def _flush(self):
+        """Réessaie les écritures différées; s'arrête au premier verrou encore tenu"""
+        try:
+            while self.acks:
+                request_id, state = next(iter(self.acks.items()))
+                self.frontier.done(request_id, state)
+                del self.acks[request_id]
+            while self.backlog:
+                self._push(*self.backlog[0])
+                self.backlog.popleft()
+        except sqlite3.OperationalError as e:
+            if not is_locked(e):
+                raise
+            self.stats.inc_value('frontier/busy', spider=self.spider)
+
+    def _push(self, fingerprint, priority, url, data, dont_filter, previous_id):
+        added = self.frontier.push(self.spider.name, fingerprint, priority, url, data, dont_filter)
+        if previous_id is not None:
+            self._ack(previous_id, 'done')
+        if not added:
+            self.stats.inc_value('dupefilter/filtered', spider=self.spider)
+            logger.debug(f"Requête déjà planifiée par un worker: {url}")
+        return added
+
+    def close(self, reason):
+        if self.poller.running:
+            self.poller.stop()
+        # Arrêt: les écritures différées doivent aboutir, quitte à attendre le verrou
+        self.frontier.set_busy_timeout(30)
+        self._flush()
+        # Requêtes en cours (arrêt anticipé): rendues aux autres workers
+        self.frontier.release(self.worker)
+        for state, count in self.frontier.counts(self.spider.name).items():
+            self.stats.set_value(f'frontier/{state}', count, spider=self.spider)
+        self.frontier.close()
+
+    def has_pending_requests(self):
+        if self.backlog:
+            return True
+        try:
+            return self.frontier.has_pending(self.spider.name)
+        except sqlite3.OperationalError as e:
+            if not is_locked(e):
+                raise
+            return True
+
+    def enqueue_request(self, request):
+        # Retry d'une requête louée: la nouvelle entrée de la file remplace l'ancienne
+        previous_id = request.meta.pop('frontier_id', None)
+        fingerprint = self.crawler.request_fingerprinter.fingerprint(request).hex()
+        data = pickle.dumps(request.to_dict(spider=self.spider), protocol=pickle.HIGHEST_PROTOCOL)
+        entry = (fingerprint, request.priority, request.url, data, request.dont_filter, previous_id)
+        if not self.backlog:
+            try:
+                if not self._push(*entry):
+                    return False
+                self.stats.inc_value('scheduler/enqueued/frontier', spider=self.spider)
+                return True
+            except sqlite3.OperationalError as e:
+                if not is_locked(e):
+                    raise
+        # Verrou tenu par un autre worker (ou ajouts déjà en attente, pour garder l'ordre):
+        # ajout différé, le dupefilter partagé tranchera au prochain tour
+        self.backlog.append(entry)
+        self.stats.inc_value('scheduler/enqueued/frontier', spider=self.spider)
+        return True
+
+    def next_request(self):
+        self._flush()
+        try:
+            row = self.frontier.lease(self.spider.name, self.worker, self.lease_seconds, self.max_attempts)
+        except sqlite3.OperationalError as e:
+            if not is_locked(e):
+                raise
+            self.stats.inc_value('frontier/busy', spider=self.spider)
+            return None
+        if row is None:
+            return None
+        request_id, data = row
+        request = request_from_dict(pickle.loads(data), spider=self.spider)
+        request.meta['frontier_id'] = request_id
+        self.stats.inc_value('scheduler/dequeued/frontier', spider=self.spider)
+        return request
+
+    def _done(self, request, state='done'):
+        if request is None:
+            return
+        request_id = request.meta.pop('frontier_id', None)
+        if request_id is not None:
+            self._ack(request_id, state)
+
+    def _ack(self, request_id, state):
+        try:
+            self.frontier.done(request_id, state)
+        except sqlite3.OperationalError as e:
+            if not is_locked(e):
+                raise
+            self.acks[request_id] = state
+
+    def callback_processed(self, response):
+        self._done(response.request)
+
+    def spider_error(self, response):
+        self._done(response.request)
+
+    def response_received(self, response, request):
+        # Statuts d'erreur (404...) filtrés par HttpErrorMiddleware: pas de callback
+        if not 200 <= response.status < 300:
+            self._done(request)
+
+    def request_dropped(self, request):
+        self._done(request)
+
+    def request_failed(self, request, exception):
+        # Sans réponse ni callback: la location resterait active jusqu'à son expiration
+        self._done(request, 'done' if isinstance(exception, IgnoreRequest) else 'failed')
+
+
+class FrontierAckMiddleware:
+    """Middleware de téléchargement: termine dans la frontière les requêtes dont le
+    téléchargement est abandonné (signal request_failed)
+
+    À placer avant RetryMiddleware (ordre < 610): son process_exception n'est appelé
+    que si la requête n'est pas relancée.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        scheduler = crawler.settings.get('SCHEDULER')
+        if not scheduler or not issubclass(load_object(scheduler), SharedScheduler):
+            raise NotConfigured
+        return cls(crawler)
+
+    def process_exception(self, request, exception, spider):
+        self.crawler.stats.inc_value('frontier/download_failed', spider=spider)
+        self.crawler.signals.send_catch_log(signal=request_failed, request=request, spider=spider, exception=exception)
+        return None
+
+
+class FrontierRateLimitMiddleware:
+    """Middleware de téléchargement: débit global par domaine, partagé par tous les workers
+
+    À placer après HttpCacheMiddleware (ordre > 900) pour que les pages servies par le
+    cache ne consomment pas de jeton.
+    """
+
+    def __init__(self, crawler, rate, burst):
+        self.crawler = crawler
+        self.rate = rate
+        self.burst = burst
+        self.frontier = open_frontier(crawler.settings)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        rate = crawler.settings.getfloat('FRONTIER_RATE', 0)
+        if rate <= 0:
+            raise NotConfigured
+        mw = cls(crawler, rate, max(1.0, crawler.settings.getfloat('FRONTIER_BURST', 1)))
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    async def process_request(self, request, spider):
+        from twisted.internet import reactor
+
+        while True:
+            try:
+                wait = self.frontier.take_token(urlparse_cached(request).hostname, self.rate, self.burst)
+                break
+            except sqlite3.OperationalError as e:
+                if not is_locked(e):
+                    raise
+                # Verrou tenu par un autre worker: réessayer sans bloquer le reactor
+                self.crawler.stats.inc_value('frontier/busy', spider=spider)
+                await maybe_deferred_to_future(deferLater(reactor, 0.05, lambda: None))
+        if wait > 0:
+            self.crawler.stats.inc_value('frontier/rate_limited', spider=spider)
+            self.crawler.stats.inc_value('frontier/rate_limited_seconds', round(wait, 3), spider=spider)
+            await maybe_deferred_to_future(deferLater(reactor, wait, lambda: None))
+        return None
+
+    def process_response(self, request, response, spider):
+        if response.status == 429:
+            # Tous les workers ralentissent, pas seulement celui qui a reçu le 429
+            retry_after = response.headers.get('Retry-After')
+            try:
+                seconds = float(retry_after)
+            except (TypeError, ValueError):
+                seconds = self.crawler.settings.getfloat('TOO_MANY_REQUESTS_PAUSE', 60)
+            try:
+                self.frontier.penalize(urlparse_cached(request).hostname, seconds, self.rate)
+            except sqlite3.OperationalError as e:
+                if not is_locked(e):
+                    raise
+                # Pause locale de TooManyRequestsRetryMiddleware quand même; les autres
+                # workers recevront leur propre 429
+                self.crawler.stats.inc_value('frontier/busy', spider=spider)
+        return response
+
+    def spider_closed(self, spider):
+        self.frontier.close()
@@ -0,0 +1,149 @@
+# Grilles spatiales de tirs précalculées pour le shot chart
+#
+# Au lieu de dessiner chaque tir (des dizaines de milliers de points pour une vue
+# de ligue ou multi-saisons), les tirs sont regroupés par cellule du terrain en
+# pixels (image de basketball-reference, 500x472) à plusieurs résolutions, pour
+# chaque joueur, chaque équipe et toute la ligue. Les comptages sont faits en une
+# passe vectorisée (numpy.histogramdd sur groupe x colonne x ligne) par résolution.
+#
+# Format d'une grille (colonnes parallèles, cellules vides omises):
+#     {"cell_size": 25, "columns": 20, "rows": 19,
+#      "x": [...], "y": [...],              # centre de la cellule en pixels
+#      "attempts": [...], "makes": [...],
+#      "fg_pct": [...],                     # réussite de la cellule (%)
+#      "relative": [...]}                   # écart à la moyenne de la ligue sur la cellule (points de %)
+
+import json
+import os
+
+import numpy as np
+
+# Dimensions de l'image du terrain sur laquelle sont exprimées les coordonnées
+COURT_WIDTH = 500
+COURT_HEIGHT = 472
+
+# Tailles de cellule (pixels) calculées par défaut: fine, moyenne, grossière
+DEFAULT_CELL_SIZES = (10, 25, 50)
+
+
+def load_shot_arrays(store, season=None):
+    """Charge les tirs de la base sous forme de tableaux numpy (un par colonne)"""
+    sql = "SELECT player_id, team, x_coordinate, y_coordinate, is_made FROM shots"
+    params = []
+    if season:
+        sql += " WHERE season = ?"
+        params.append(season)
+    rows = store.execute(sql, params)
+    return {
+        'player_id': np.array([row['player_id'] for row in rows], dtype=object),
+        'team': np.array([row['team'] or '' for row in rows], dtype=object),
+        'x': np.array([row['x_coordinate'] for row in rows], dtype=np.float64),
+        'y': np.array([row['y_coordinate'] for row in rows], dtype=np.float64),
+        'made': np.array([row['is_made'] for row in rows], dtype=np.float64),
+    }
+
+
+def grid_edges(cell_size):
+    """Bornes des colonnes et des lignes pour une taille de cellule"""
+    x_edges = np.arange(0, COURT_WIDTH + cell_size, cell_size, dtype=np.float64)
+    y_edges = np.arange(0, COURT_HEIGHT + cell_size, cell_size, dtype=np.float64)
+    return x_edges, y_edges
+
+
+def count_grids(group_codes, n_groups, x, y, made, cell_size):
+    """Tentatives et tirs réussis par (groupe, colonne, ligne) en un seul histogramme"""
+    x_edges, y_edges = grid_edges(cell_size)
+    # Coordonnées hors image ramenées sur le bord plutôt que perdues
+    x = np.clip(x, 0, x_edges[-1] - 1)
+    y = np.clip(y, 0, y_edges[-1] - 1)
+    sample = (group_codes.astype(np.float64), x, y)
+    bins = (np.arange(n_groups + 1, dtype=np.float64) - 0.5, x_edges, y_edges)
+    attempts, _ = np.histogramdd(sample, bins=bins)
+    makes, _ = np.histogramdd(sample, bins=bins, weights=made)
+    return attempts.astype(np.int64), makes.astype(np.int64)
+
+
+def encode_grid(attempts, makes, cell_size, league_pct=None, min_attempts=1):
+    """Convertit une grille dense (colonnes x lignes) en tableaux compacts des cellules non vides"""
+    columns, rows = np.nonzero(attempts >= max(1, min_attempts))
+    cell_attempts = attempts[columns, rows]
+    cell_makes = makes[columns, rows]
+    fg_pct = np.round(100.0 * cell_makes / cell_attempts, 1)
+    grid = {
+        'cell_size': cell_size,
+        'columns': int(attempts.shape[0]),
+        'rows': int(attempts.shape[1]),
+        'x': ((columns + 0.5) * cell_size).tolist(),
+        'y': ((rows + 0.5) * cell_size).tolist(),
+        'attempts': cell_attempts.tolist(),
+        'makes': cell_makes.tolist(),
+        'fg_pct': fg_pct.tolist(),
+    }
+    if league_pct is not None:
+        grid['relative'] = np.round(fg_pct - league_pct[columns, rows], 1).tolist()
+    return grid
+
+
+def build_grids(shots, cell_sizes=DEFAULT_CELL_SIZES, min_attempts=1):
+    """Calcule les grilles de la ligue, de chaque équipe et de chaque joueur
+
+    Retourne {'league': grille, 'teams': {code: grille}, 'players': {player_id: grille}},
+    chaque grille contenant toutes les résolutions demandées.
+    """
+    league = {}
+    teams, team_codes = np.unique(shots['team'], return_inverse=True)
+    players, player_codes = np.unique(shots['player_id'], return_inverse=True)
+    team_grids = {team: {} for team in teams}
+    player_grids = {player: {} for player in players}
+
+    for cell_size in cell_sizes:
+        league_attempts, league_makes = count_grids(
+            np.zeros(len(shots['x']), dtype=np.int64), 1, shots['x'], shots['y'], shots['made'], cell_size
+        )
+        league_attempts, league_makes = league_attempts[0], league_makes[0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            league_pct = np.where(league_attempts > 0, 100.0 * league_makes / league_attempts, 0.0)
+        league[str(cell_size)] = encode_grid(league_attempts, league_makes, cell_size)
+
+        for names, codes, grids in ((teams, team_codes, team_grids), (players, player_codes, player_grids)):
+            attempts, makes = count_grids(codes, len(names), shots['x'], shots['y'], shots['made'], cell_size)
+            for index, name in enumerate(names):
+                grids[name][str(cell_size)] = encode_grid(
+                    attempts[index], makes[index], cell_size, league_pct, min_attempts
+                )
+
+    return {'league': league, 'teams': team_grids, 'players': player_grids}
+
+
+def grid_files(grids, output_dir, season=None):
+    """Chemins et contenus des fichiers de grilles: [(chemin, contenu JSON), ...]
+
+    Arborescence: {output_dir}/{saison}/league.json, teams/GSW.json, players/c_curryst01.json
+    """
+    base_dir = os.path.join(output_dir, season or 'all')
+    entries = [('league', 'league', grids['league'], base_dir)]
+    entries += [('team', team, grid, os.path.join(base_dir, 'teams')) for team, grid in grids['teams'].items() if team]
+    entries += [('player', player, grid, os.path.join(base_dir, 'players')) for player, grid in grids['players'].items()]
+
+    files = []
+    for scope, name, grid, directory in entries:
+        filename = 'league.json' if scope == 'league' else f"{name.replace('/', '_')}.json"
+        payload = {
+            'scope': scope,
+            'id': name,
+            'season': season,
+            'court': [COURT_WIDTH, COURT_HEIGHT],
+            'grids': grid,
+        }
+        files.append((os.path.join(directory, filename), payload))
+    return files
+
+
+def write_grids(grids, output_dir, season=None):
+    """Écrit un fichier JSON compact par joueur, par équipe et pour la ligue"""
+    files = grid_files(grids, output_dir, season)
+    for path, payload in files:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(payload, f, separators=(',', ':'))
+    return len(files)
@@ -0,0 +1,214 @@
+# Orchestration des runs all-teams: manifeste, file de reprise, progression
+#
+# Chaque job (une équipe, une saison) a une entrée dans un manifeste JSON écrit
+# après chaque changement d'état, qui survit donc au run et à ses interruptions:
+#     {"2024/LAL": {"team": "LAL", "season": "2024", "status": "done", "attempts": 1,
+#                   "items": 5123, "duration": 41.2, "error": null, "finished_at": ...}}
+# Statuts: pending, running, done, failed. Un job resté "running" (run interrompu)
+# est considéré en échec au chargement suivant.
+#
+# Les jobs en échec sont remis en fin de file avec un délai exponentiel
+# (backoff * 2^(tentative-1), plus un aléa) tant qu'il reste des tentatives;
+# les autres jobs passent pendant ce temps. L'ETA est estimée à partir des durées
+# observées (celles du run en cours, sinon celles enregistrées dans le manifeste).
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def parse_since(value):
+    """Date ISO (2024-03-01, 2024-03-01T12:00) ou durée relative (90m, 12h, 2d)"""
+    match = re.fullmatch(r'(\d+)([mhd])', value.strip())
+    if match:
+        unit = {'m': 'minutes', 'h': 'hours', 'd': 'days'}[match.group(2)]
+        return datetime.now() - timedelta(**{unit: int(match.group(1))})
+    return datetime.fromisoformat(value.strip())
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}min{seconds % 60:02d}"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}"
+
+
+class JobManifest:
+    """Manifeste JSON des jobs, partagé par les threads du run"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.jobs = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.jobs = json.load(f)
+        for job in self.jobs.values():
+            if job['status'] == RUNNING:
+                job.update(status=FAILED, error='run interrompu')
+
+    @staticmethod
+    def key(team, season):
+        return f"{season}/{team}"
+
+    def get(self, team, season):
+        return self.jobs.get(self.key(team, season))
+
+    def select(self, teams, season, only_failed=False, since=None):
+        """Équipes à (re)lancer: en échec ou jamais terminées (only_failed), pas terminées depuis since"""
+        selected = []
+        for team in teams:
+            job = self.get(team, season)
+            if only_failed and (job is None or job['status'] == DONE):
+                continue
+            if since is not None and job is not None and job['status'] == DONE \
+                    and datetime.fromisoformat(job['finished_at']) >= since:
+                continue
+            selected.append(team)
+        return selected
+
+    def update(self, team, season, **fields):
+        with self.lock:
+            job = self.jobs.setdefault(self.key(team, season), {
+                'team': team, 'season': season, 'status': PENDING, 'attempts': 0,
+                'items': None, 'duration': None, 'error': None, 'started_at': None, 'finished_at': None,
+            })
+            job.update(fields)
+            self._save()
+            return dict(job)
+
+    def durations(self):
+        """Durées des jobs terminés avec succès, tous runs confondus"""
+        with self.lock:
+            return [job['duration'] for job in self.jobs.values() if job['status'] == DONE and job['duration']]
+
+    def _save(self):
+        # Écriture atomique: un run interrompu ne laisse jamais un manifeste tronqué
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.jobs, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class JobRunner:
+    """Exécute les jobs d'une saison dans N threads, avec reprise des échecs en fin de file"""
+
+    def __init__(self, manifest, season, run_job, workers=1, retries=2, backoff=30.0, pause=None):
+        self.manifest = manifest
+        self.season = season
+        # run_job(team) -> (succès, nombre d'items, message d'erreur)
+        self.run_job = run_job
+        self.workers = max(1, workers)
+        self.retries = retries
+        self.backoff = backoff
+        # Pause entre deux jobs d'un même thread: (min, max) en secondes
+        self.pause = pause
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.active = 0
+        self.finished = 0
+        self.total = 0
+        self.run_durations = []
+        self.started = None
+
+    def run(self, teams):
+        """Lance les jobs; retourne (équipes terminées, équipes en échec définitif)"""
+        self.total = len(teams)
+        self.started = time.monotonic()
+        for team in teams:
+            self.manifest.update(team, self.season, status=PENDING, error=None, attempts=0)
+            self.queue.append((team, 1, 0.0))
+        threads = [threading.Thread(target=self._work, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        # join avec délai pour que Ctrl-C reste reçu par le thread principal
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+        done = [team for team in teams if self.manifest.get(team, self.season)['status'] == DONE]
+        failed = [team for team in teams if team not in done]
+        return done, failed
+
+    def _next(self):
+        with self.condition:
+            # File vide mais jobs en cours: un échec peut encore y être remis
+            while not self.queue and self.active:
+                self.condition.wait()
+            if not self.queue:
+                return None
+            self.active += 1
+            return self.queue.popleft()
+
+    def _work(self):
+        first = True
+        while True:
+            job = self._next()
+            if job is None:
+                return
+            team, attempt, not_before = job
+            wait = not_before - time.monotonic()
+            if wait > 0:
+                print(f"   {team}: nouvelle tentative dans {format_duration(wait)}")
+                time.sleep(wait)
+            elif self.pause and not first:
+                time.sleep(random.uniform(*self.pause))
+            first = False
+            self._attempt(team, attempt)
+
+    def _attempt(self, team, attempt):
+        self.manifest.update(team, self.season, status=RUNNING, attempts=attempt,
+                             started_at=datetime.now().isoformat(timespec='seconds'))
+        print(f"   {team}: extraction (tentative {attempt}/{self.retries + 1})")
+        start = time.monotonic()
+        try:
+            success, items, error = self.run_job(team)
+        except Exception as e:
+            success, items, error = False, None, f"{type(e).__name__}: {e}"
+        duration = round(time.monotonic() - start, 1)
+        finished_at = datetime.now().isoformat(timespec='seconds')
+
+        with self.condition:
+            self.active -= 1
+            if success:
+                self.finished += 1
+                self.run_durations.append(duration)
+                self.manifest.update(team, self.season, status=DONE, items=items, duration=duration,
+                                     error=None, finished_at=finished_at)
+                print(f"[{self.finished}/{self.total}] {team}: {items} items en {format_duration(duration)}{self._eta()}")
+            elif attempt <= self.retries:
+                # Fin de file, après un délai croissant: les autres équipes passent avant
+                delay = self.backoff * 2 ** (attempt - 1) * random.uniform(1.0, 1.25)
+                self.queue.append((team, attempt + 1, time.monotonic() + delay))
+                self.manifest.update(team, self.season, status=PENDING, items=items, duration=duration,
+                                     error=error, finished_at=finished_at)
+                print(f"   {team}: échec ({error}), remis en file")
+            else:
+                self.finished += 1
+                self.manifest.update(team, self.season, status=FAILED, items=items, duration=duration,
+                                     error=error, finished_at=finished_at)
+                print(f"[{self.finished}/{self.total}] {team}: échec définitif après {attempt} tentative(s) ({error}){self._eta()}")
+            self.condition.notify_all()
+
+    def _eta(self):
+        remaining = self.total - self.finished
+        if not remaining:
+            return f" - run terminé en {format_duration(time.monotonic() - self.started)}"
+        durations = self.run_durations or self.manifest.durations()
+        if not durations:
+            return ''
+        average = sum(durations) / len(durations)
+        eta = average * remaining / min(self.workers, remaining)
+        return f" - reste {remaining} équipe(s), ETA ~{format_duration(eta)}"
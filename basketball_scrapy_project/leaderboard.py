@@ -0,0 +1,201 @@
+# Classement clutch calculé à partir des box scores (Q4 et prolongations)
+#
+# Les lignes PlayerClutchStats de la base sont chargées dans des colonnes typées,
+# le score clutch de chaque ligne est calculé de façon vectorisée (même formule que
+# calculateClutchScore dans frontend_basketball_scrapy/src/lib/utils.ts), puis les
+# totaux par joueur et saison sont mis à jour de façon incrémentale: seuls les
+# matchs absents de leaderboard_games sont lus et ajoutés aux totaux existants.
+# Chaque match y est mémorisé avec son nombre de lignes, son plus grand rowid et une
+# somme de contrôle de leur contenu: si des lignes lui sont ajoutées plus tard
+# (période manquante, joueur oublié) ou corrigées par un nouveau crawl (l'upsert
+# garde le rowid), les totaux des joueurs de ce match sont recalculés à partir de
+# toutes leurs lignes.
+# Le classement final (moyennes par match, taux par minute, TS%) est recalculé à
+# partir des totaux, quelques centaines de lignes.
+
+import os
+import zlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from basketball_scrapy_project.store import CLUTCH_STAT_FIELDS
+
+# Les statistiques d'un match sont comptées une fois par ligne Q4 (comme dans le dashboard)
+MATCH_QUARTER = 'Q4'
+
+TOTAL_COLUMNS = ['matches', 'minutes'] + CLUTCH_STAT_FIELDS + ['clutch_score_sum']
+
+
+# Colonnes qui modifient les totaux d'un joueur, couvertes par la somme de contrôle
+CHECKSUM_COLUMNS = ['player_name', 'team', 'season', 'match_date', 'quarter', 'minutes'] + CLUTCH_STAT_FIELDS
+
+# Nombre de lignes, plus grand rowid et somme des CRC32 des lignes de chaque match de clutch_stats
+GAME_SIGNATURES_SQL = (
+    "SELECT game_id, COUNT(*) AS row_count, MAX(rowid) AS max_rowid, "
+    f"SUM(row_checksum({', '.join(CHECKSUM_COLUMNS)})) AS checksum FROM clutch_stats GROUP BY game_id"
+)
+
+# Matchs déjà agrégés dont les lignes ont changé depuis
+CHANGED_GAMES_SQL = (
+    f"SELECT signature.game_id FROM ({GAME_SIGNATURES_SQL}) AS signature "
+    "JOIN leaderboard_games AS processed ON processed.game_id = signature.game_id "
+    "WHERE processed.row_count IS NOT signature.row_count OR processed.max_rowid IS NOT signature.max_rowid "
+    "OR processed.checksum IS NOT signature.checksum"
+)
+
+# Joueurs et saisons des matchs modifiés, dont les totaux sont recalculés
+CHANGED_PLAYERS_SQL = (
+    "SELECT DISTINCT player_name, COALESCE(season, '') FROM clutch_stats "
+    f"WHERE game_id IN ({CHANGED_GAMES_SQL})"
+)
+
+
+def row_checksum(*values):
+    """CRC32 d'une ligne (fonction SQL row_checksum de GAME_SIGNATURES_SQL)"""
+    return zlib.crc32('\x1f'.join('' if value is None else str(value) for value in values).encode('utf-8'))
+
+
+def load_clutch_frame(store, new_only=True):
+    """Charge les lignes clutch_stats en colonnes typées
+
+    Si new_only: les lignes des matchs pas encore agrégés et toutes les lignes des
+    joueurs dont un match agrégé a changé (voir changed_players).
+    """
+    sql = f"SELECT player_name, team, season, game_id, match_date, quarter, minutes, {', '.join(CLUTCH_STAT_FIELDS)} FROM clutch_stats"
+    if new_only:
+        store.connection.create_function('row_checksum', -1, row_checksum, deterministic=True)
+        sql += (
+            " WHERE game_id NOT IN (SELECT game_id FROM leaderboard_games)"
+            f" OR (player_name, COALESCE(season, '')) IN ({CHANGED_PLAYERS_SQL})"
+        )
+    df = pd.read_sql_query(sql, store.connection)
+
+    df[CLUTCH_STAT_FIELDS] = df[CLUTCH_STAT_FIELDS].fillna(0).astype(np.int32)
+    df['quarter'] = df['quarter'].astype('category')
+    df['season'] = df['season'].fillna('')
+    # Temps de jeu "M:SS" -> minutes décimales
+    clock = df['minutes'].fillna('').str.extract(r'^(?P<minutes>\d+):(?P<seconds>\d+)$')
+    df['minutes'] = (
+        pd.to_numeric(clock['minutes'], errors='coerce') + pd.to_numeric(clock['seconds'], errors='coerce') / 60
+    ).fillna(0.0)
+    return df
+
+
+def _ratio(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+def clutch_scores(df):
+    """Score clutch de chaque ligne (sans normalisation par les minutes), calculé sur toutes les lignes à la fois"""
+    efficiency = (
+        _ratio(df['field_goals'], df['field_goal_attempts']) * 10
+        + _ratio(df['free_throws'], df['free_throw_attempts']) * 5
+        + _ratio(df['three_point_field_goals'], df['three_point_field_goal_attempts']) * 15
+    )
+    impact = (
+        df['rebounds'] * 0.5 + df['assists'] * 0.7 + df['steals'] * 1.2 + df['blocks'] * 1.2 - df['turnovers'] * 1.0
+    )
+    return np.maximum(0.0, df['points'] * 1.0 + efficiency + impact)
+
+
+def aggregate_players(df):
+    """Totaux par joueur et saison des lignes fournies"""
+    df = df.assign(
+        clutch_score_sum=clutch_scores(df),
+        matches=(df['quarter'] == MATCH_QUARTER).astype(np.int32),
+    ).sort_values('match_date')
+    grouped = df.groupby(['player_name', 'season'], sort=False)
+    totals = grouped[TOTAL_COLUMNS].sum()
+    # Équipe du dernier match joué (transferts en cours de saison)
+    totals['team'] = grouped['team'].last()
+    totals['last_match_date'] = grouped['match_date'].last()
+    return totals.reset_index()
+
+
+def update_totals(store, rebuild=False):
+    """Ajoute aux totaux les matchs pas encore agrégés; retourne (matchs ajoutés, joueurs mis à jour)"""
+    if rebuild:
+        with store.connection:
+            store.connection.execute("DELETE FROM leaderboard_totals")
+            store.connection.execute("DELETE FROM leaderboard_games")
+
+    store.connection.create_function('row_checksum', -1, row_checksum, deterministic=True)
+    signatures = store.connection.execute(GAME_SIGNATURES_SQL).fetchall()
+    changed_players = store.connection.execute(CHANGED_PLAYERS_SQL).fetchall()
+    df = load_clutch_frame(store, new_only=True)
+    if df.empty:
+        return 0, 0
+    totals = aggregate_players(df)
+
+    updates = ', '.join(f"{column} = {column} + excluded.{column}" for column in TOTAL_COLUMNS)
+    columns = ['player_name', 'season', 'team', 'last_match_date'] + TOTAL_COLUMNS
+    sql = (
+        f"INSERT INTO leaderboard_totals ({', '.join(columns)}) "
+        f"VALUES ({', '.join(':' + column for column in columns)}) "
+        f"ON CONFLICT (player_name, season) DO UPDATE SET {updates}, "
+        f"team = CASE WHEN excluded.last_match_date >= last_match_date THEN excluded.team ELSE team END, "
+        f"last_match_date = MAX(last_match_date, excluded.last_match_date)"
+    )
+    rows = totals[columns].astype(object).where(totals[columns].notna(), None).to_dict('records')
+    games = set(df['game_id'].unique().tolist())
+    processed_at = datetime.now().isoformat(timespec='seconds')
+    with store.connection:
+        # Totaux recalculés entièrement: les lignes de ces joueurs sont toutes dans df
+        store.connection.executemany(
+            "DELETE FROM leaderboard_totals WHERE player_name = ? AND season = ?", [tuple(row) for row in changed_players],
+        )
+        store.connection.executemany(sql, rows)
+        store.connection.executemany(
+            "INSERT INTO leaderboard_games (game_id, processed_at, row_count, max_rowid, checksum) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (game_id) DO UPDATE SET processed_at = excluded.processed_at, "
+            "row_count = excluded.row_count, max_rowid = excluded.max_rowid, checksum = excluded.checksum",
+            [
+                (row['game_id'], processed_at, row['row_count'], row['max_rowid'], row['checksum'])
+                for row in signatures if row['game_id'] in games
+            ],
+        )
+    return len(games), len(rows)
+
+
+def build_leaderboard(store, season=None, min_matches=0):
+    """Classement à partir des totaux: moyennes par match, taux par minute, pourcentages et score clutch"""
+    sql = "SELECT * FROM leaderboard_totals"
+    params = []
+    if season:
+        sql += " WHERE season = ?"
+        params.append(season)
+    df = pd.read_sql_query(sql, store.connection, params=params)
+    df = df[df['matches'] >= max(1, min_matches)].copy()
+
+    # Noms de champs du dashboard (PlayerStats): totaux préfixés par total_, moyennes par match sans préfixe
+    df['total_minutes'] = df['minutes']
+    df['minutes'] = df['minutes'] / df['matches']
+    for field in CLUTCH_STAT_FIELDS:
+        df[f'total_{field}'] = df[field]
+        df[field] = df[field] / df['matches']
+        df[f'{field}_per_minute'] = _ratio(df[f'total_{field}'], df['total_minutes'])
+
+    df['field_goal_pct'] = _ratio(df['total_field_goals'], df['total_field_goal_attempts'])
+    df['three_point_pct'] = _ratio(df['total_three_point_field_goals'], df['total_three_point_field_goal_attempts'])
+    df['free_throw_pct'] = _ratio(df['total_free_throws'], df['total_free_throw_attempts'])
+    # True shooting: points / (2 x (tirs tentés + 0.44 x lancers francs tentés))
+    df['true_shooting_pct'] = _ratio(
+        df['total_points'], 2 * (df['total_field_goal_attempts'] + 0.44 * df['total_free_throw_attempts'])
+    )
+    df['clutchScore'] = df['clutch_score_sum'] / df['matches']
+
+    df = df.sort_values(['clutchScore', 'player_name'], ascending=[False, True])
+    df['rank'] = np.arange(1, len(df) + 1)
+    df = df.drop(columns=['clutch_score_sum', 'last_match_date'])
+    return df.round(3)
+
+
+def write_leaderboard(df, path):
+    """Écrit le classement en JSON (liste d'objets triée par rang)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    df.to_json(path, orient='records', indent=2)
+    return path
@@ -10,6 +10,8 @@ import random
 import time
 from scrapy.downloadermiddlewares.retry import RetryMiddleware
 
+from basketball_scrapy_project.signals import callback_processed
+
 class BasketballScrapyProjectSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
     # scrapy acts as if the spider middleware does not modify the
@@ -123,18 +125,100 @@ class TooManyRequestsRetryMiddleware(RetryMiddleware):
     def __init__(self, crawler):
         super(TooManyRequestsRetryMiddleware, self).__init__(crawler.settings)
         self.crawler = crawler
+        # Pause par défaut si la réponse 429 n'a pas d'en-tête Retry-After
+        self.pause_seconds = crawler.settings.getfloat('TOO_MANY_REQUESTS_PAUSE', 60)
+        self.paused = False
 
     @classmethod
     def from_crawler(cls, crawler):
         return cls(crawler)
 
+    def _pause_delay(self, response):
+        retry_after = response.headers.get('Retry-After')
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            return self.pause_seconds
+
+    def _unpause(self):
+        self.paused = False
+        self.crawler.engine.unpause()
+
     def process_response(self, request, response, spider):
         if response.status == 429:
-            self.crawler.engine.pause()
-            spider.logger.info(f"Got 429 response. Pausing spider for 60 seconds")
-            time.sleep(60)
-            self.crawler.engine.unpause()
+            if not self.paused:
+                from twisted.internet import reactor
+
+                delay = self._pause_delay(response)
+                # Pause du moteur sans bloquer le reactor: les téléchargements en cours se terminent
+                self.paused = True
+                self.crawler.engine.pause()
+                spider.logger.info(f"Got 429 response. Pausing spider for {delay:.0f} seconds")
+                reactor.callLater(delay, self._unpause)
             
             retryreq = self._retry(request, 'too_many_requests', spider) or request
             return retryreq
         return super(TooManyRequestsRetryMiddleware, self).process_response(request, response, spider)
+
+
+class CallbackTimingMiddleware:
+    """Mesure le temps passé dans chaque callback de spider et l'envoie avec le signal callback_processed
+
+    Seul le temps d'exécution du callback est compté (pas celui des composants qui
+    consomment ses résultats): à placer au plus près du spider (ordre élevé).
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def _callback_name(self, response, spider):
+        callback = response.request.callback if response.request is not None else None
+        return getattr(callback, '__name__', None) or 'parse'
+
+    def _send(self, response, spider, started, duration):
+        self.crawler.signals.send_catch_log(
+            signal=callback_processed,
+            response=response,
+            spider=spider,
+            callback=self._callback_name(response, spider),
+            started=started,
+            duration=duration,
+        )
+
+    def process_spider_output(self, response, result, spider):
+        started = time.monotonic()
+        duration = 0.0
+        iterator = iter(result)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    output = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    duration += time.perf_counter() - start
+                yield output
+        finally:
+            self._send(response, spider, started, duration)
+
+    async def process_spider_output_async(self, response, result, spider):
+        started = time.monotonic()
+        duration = 0.0
+        iterator = result.__aiter__()
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    output = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    duration += time.perf_counter() - start
+                yield output
+        finally:
+            self._send(response, spider, started, duration)
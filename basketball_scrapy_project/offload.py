@@ -0,0 +1,80 @@
+# Parsing des pages dans un pool de processus
+#
+# Le parsing d'un box score (des dizaines de tables) ou d'une page de shooting rendue
+# (des milliers de tooltips) occupe le thread du reactor; dès que les téléchargements
+# se chevauchent (cache HTTP, rejeu), ce cœur devient la limite. Avec PARSE_PROCESSES,
+# les callbacks envoient le HTML à un pool de processus et reçoivent des dicts.
+#
+# Les items d'une page gardent l'ordre de la page. Le nombre de pages en cours de
+# parsing est borné (PARSE_MAX_PENDING): au-delà, les callbacks attendent, leurs
+# réponses restent actives dans le scraper et Scrapy cesse de télécharger
+# (SCRAPER_SLOT_MAX_ACTIVE_SIZE), ce qui préserve la contre-pression.
+#
+# Settings:
+#     PARSE_PROCESSES = 0        # 0: parsing dans le processus du crawl
+#     PARSE_MAX_PENDING = None   # pages en cours de parsing (défaut: 2 x PARSE_PROCESSES)
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from scrapy import signals
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet.defer import Deferred, DeferredSemaphore
+
+logger = logging.getLogger(__name__)
+
+
+class ParsePool:
+    def __init__(self, processes, max_pending):
+        # forkserver/spawn: pas de fork du processus du crawl (reactor, threads Selenium)
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self.executor = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context(method))
+        self.semaphore = DeferredSemaphore(max_pending)
+        self.processes = processes
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Pool partagé par les spiders du crawler, ou None si PARSE_PROCESSES vaut 0"""
+        pool = getattr(crawler, 'parse_pool', None)
+        if pool is not None:
+            return pool
+        processes = crawler.settings.getint('PARSE_PROCESSES', 0)
+        if processes <= 0:
+            return None
+        max_pending = crawler.settings.getint('PARSE_MAX_PENDING') or 2 * processes
+        pool = cls(processes, max_pending)
+        crawler.parse_pool = pool
+        crawler.signals.connect(pool.close, signal=signals.engine_stopped)
+        logger.info(f"Parsing dans {processes} processus ({max_pending} pages en cours au plus)")
+        return pool
+
+    def run(self, function, *args):
+        """Exécute function(*args) dans le pool; Deferred du résultat"""
+        return self.semaphore.run(self._submit, function, *args)
+
+    def _submit(self, function, *args):
+        from twisted.internet import reactor
+
+        deferred = Deferred()
+        future = self.executor.submit(function, *args)
+
+        def done(future):
+            # Appelé dans un thread du pool: revenir dans le thread du reactor
+            if future.exception() is not None:
+                reactor.callFromThread(deferred.errback, future.exception())
+            else:
+                reactor.callFromThread(deferred.callback, future.result())
+
+        future.add_done_callback(done)
+        return deferred
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def offload(pool, function, *args):
+    """Résultat de function(*args), calculé dans le pool s'il existe, sinon directement"""
+    if pool is None:
+        return function(*args)
+    return await maybe_deferred_to_future(pool.run(function, *args))
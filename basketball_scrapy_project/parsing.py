@@ -0,0 +1,221 @@
+# Fonctions d'extraction indépendantes des spiders
+#
+# Elles ne dépendent ni de Selenium ni de l'état d'un spider, ce qui permet de les
+# réutiliser dans les benchmarks et de les appeler sur des données déjà extraites.
+# Les fonctions de page (parse_box_score_page, parse_player_shooting_page) prennent le
+# HTML en texte et renvoient des dicts: elles peuvent s'exécuter dans un autre
+# processus (offload.ParsePool).
+
+import json
+import re
+
+from scrapy import Selector
+from scrapy.loader import ItemLoader
+
+from basketball_scrapy_project.items import PlayerClutchStats, ShotChartData
+
+# Script exécuté dans le navigateur: renvoie le nom du joueur et les attributs utiles des
+# tooltips du shot chart au lieu de transférer tout le HTML de la page
+PLAYER_SHOOTING_SCRIPT = """
+var name = document.querySelector('ul.hoversmooth li.index:first-child a u')
+    || document.querySelector('ul.hoversmooth li.index:first-child a');
+var wrapper = document.querySelector('#shot-wrapper');
+return {
+    player_name: name ? name.innerText : null,
+    tooltips: wrapper ? Array.from(wrapper.querySelectorAll('div.tooltip')).map(function (el) {
+        return [el.getAttribute('style') || '', el.getAttribute('class') || '', el.getAttribute('tip') || ''];
+    }) : null,
+    shot_wrapper_html: wrapper && !wrapper.querySelector('div.tooltip') ? wrapper.outerHTML : null
+};
+"""
+
+LEFT_RE = re.compile(r'left:(\d+)px')
+TOP_RE = re.compile(r'top:(\d+)px')
+MATCH_INFO_RE = re.compile(r'^(.+?),\s+(.+?)\s+(?:vs|at)\s+(.+?)(?:<br>|$)')
+PERIOD_INFO_RE = re.compile(r'<br>(?:(\d+\w+)\s+)?(Qtr|OT),\s+(\d+:\d+)\s+remaining')
+SHOT_INFO_RE = re.compile(r'<br>(Made|Missed)\s+(\d+)-pointer\s+from\s+(\d+)\s+ft')
+# "now" n'apparaît qu'après un tir réussi ("GSW now leads 10-8"); un tir manqué donne "GSW leads 10-8"
+SCORE_INFO_RE = re.compile(r'<br>(.+?(?:leads|trails|tied)\s+\d+-\d+)(?:<br>|$)')
+
+
+def parse_shot_tooltip(style, css_class, tip):
+    """Extrait les champs d'un tir à partir des attributs style/class/tip d'un tooltip"""
+    shot = {}
+
+    # Extraire les coordonnées x et y à partir du style CSS
+    x_match = LEFT_RE.search(style or '')
+    y_match = TOP_RE.search(style or '')
+    if x_match and y_match:
+        shot['x_coordinate'] = x_match.group(1)
+        shot['y_coordinate'] = y_match.group(1)
+
+    # Déterminer si le tir est réussi en fonction de la classe
+    shot['is_made'] = str('make' in (css_class or ''))
+
+    if not tip:
+        return shot
+
+    # Extraire la date et les équipes
+    match_info = MATCH_INFO_RE.search(tip)
+    if match_info:
+        shot['game_date'] = match_info.group(1).strip()
+        shot['teams'] = f"{match_info.group(2).strip()} vs {match_info.group(3).strip()}"
+
+    # Extraire le quart-temps et le temps restant
+    period_info = PERIOD_INFO_RE.search(tip)
+    if period_info:
+        number, period_type = period_info.group(1), period_info.group(2)
+        # Les prolongations sont notées "1st OT" pour ne pas être confondues avec les quarts-temps
+        shot['quarter'] = number if period_type == 'Qtr' else f"{number or '1st'} OT"
+        shot['time_remaining'] = period_info.group(3)
+
+    # Extraire le type de tir et la distance
+    shot_info = SHOT_INFO_RE.search(tip)
+    if shot_info:
+        shot['shot_type'] = f"{shot_info.group(2)}-pointer"
+        shot['shot_distance'] = shot_info.group(3)
+
+    # Extraire la description du score
+    score_info = SCORE_INFO_RE.search(tip)
+    if score_info:
+        shot['score_description'] = score_info.group(1).strip()
+
+    return shot
+
+
+def extract_shot_tooltips(selector):
+    """Retourne les attributs (style, class, tip) des tooltips d'un Selector sur une page rendue"""
+    return [
+        (el.attrib.get('style', ''), el.attrib.get('class', ''), el.attrib.get('tip', ''))
+        for el in selector.css('#shot-wrapper div.tooltip')
+    ]
+
+
+# Statistiques des box scores: (champ de PlayerClutchStats, data-stat de la colonne)
+BOX_SCORE_STATS = (
+    ('minutes', 'mp'),
+    ('points', 'pts'),
+    ('field_goals', 'fg'),
+    ('field_goal_attempts', 'fga'),
+    ('free_throws', 'ft'),
+    ('free_throw_attempts', 'fta'),
+    ('three_point_field_goals', 'fg3'),
+    ('three_point_field_goal_attempts', 'fg3a'),
+    ('rebounds', 'trb'),
+    ('assists', 'ast'),
+    ('steals', 'stl'),
+    ('blocks', 'blk'),
+    ('turnovers', 'tov'),
+    ('personal_fouls', 'pf'),
+)
+TEAM_ID_RE = re.compile(r'^([A-Z]{3})')
+
+
+def _table_team(table, table_index, visitor_abbr, home_abbr):
+    """Équipe d'une table de box score (identifiants des ancêtres, puis de la table, puis position)"""
+    # Regarder en premier le chemin complet pour identifier l'équipe
+    parent_path = "".join(table.xpath('ancestor-or-self::*/@id').getall()).upper()
+    if visitor_abbr and visitor_abbr.upper() in parent_path:
+        return visitor_abbr
+    if home_abbr and home_abbr.upper() in parent_path:
+        return home_abbr
+    # Format possible de l'ID de la table: TEAM-q4-basic-xxxxx
+    table_id = table.attrib.get('id', '')
+    if table_id and '-' in table_id:
+        match = TEAM_ID_RE.search(table_id)
+        if match and match.group(1) in (visitor_abbr, home_abbr):
+            return match.group(1)
+    # Le premier tableau est probablement celui de l'équipe visiteuse
+    return visitor_abbr if table_index == 0 else home_abbr
+
+
+def _box_score_tables(selector, period):
+    tables = selector.css(f'div[id$="-{period}-basic"] table')
+    if not tables:
+        # Sélection plus large si la première méthode échoue
+        tables = selector.css(f'*[id*="-{period}-basic"] table')
+    return tables
+
+
+def parse_box_score_page(html, url, visitor_abbr, home_abbr):
+    """Statistiques des joueurs au 4ème quart-temps et en prolongation d'une page de box score
+
+    Retourne une liste de dicts (champs de PlayerClutchStats), dans l'ordre de la page.
+    """
+    selector = Selector(text=html)
+    # Format: /boxscores/YYYYMMDD0XXX.html où XXX est l'équipe domicile
+    match_date = url.split('/')[-1].split('.')[0][:8]
+    rows = []
+    periods = [('Q4', 'q4')] + [(f'OT{number}', f'ot{number}') for number in range(1, 6)]
+    for quarter, period in periods:
+        tables = _box_score_tables(selector, period)
+        if not tables and quarter != 'Q4':
+            # Pas de table pour cette prolongation: les suivantes n'existent pas non plus
+            break
+        for table_index, table in enumerate(tables):
+            team_abbr = _table_team(table, table_index, visitor_abbr, home_abbr)
+            for row in table.css('tbody tr'):
+                player_name_elem = row.css('th[data-stat="player"]')
+                player_name = None
+                if player_name_elem:
+                    # Essayer d'abord avec le lien, puis avec le texte direct
+                    player_name = player_name_elem.css('a::text').get() or player_name_elem.css('::text').get()
+                # Ignorer les lignes qui ne sont pas des joueurs individuels
+                if not player_name or not player_name.strip() or player_name.strip() in ('Team Totals', 'Reserves'):
+                    continue
+
+                loader = ItemLoader(item=PlayerClutchStats())
+                loader.add_value('player_name', player_name.strip())
+                loader.add_value('team', team_abbr)
+                loader.add_value('quarter', quarter)
+                loader.add_value('match_date', match_date)
+                loader.add_value('source_url', url)
+                # Statistiques seulement si la ligne en contient (sinon DNP, etc.)
+                if any(row.css(f'td[data-stat="{data_stat}"]::text').get() for data_stat in ('mp', 'pts', 'fg', 'fga')):
+                    for field, data_stat in BOX_SCORE_STATS:
+                        loader.add_value(field, row.css(f'td[data-stat="{data_stat}"]::text').get())
+                rows.append(dict(loader.load_item()))
+    return rows
+
+
+def parse_player_shooting_page(text, is_json, url, player_id, season):
+    """Tirs d'une page de shooting: réponse JSON du navigateur (PLAYER_SHOOTING_SCRIPT) ou page HTML
+
+    Retourne un dict: player_name, tooltips (nombre, None sans shot chart),
+    shot_wrapper_html, shots (dicts de ShotChartData) et errors.
+    """
+    if is_json:
+        rendered = json.loads(text) or {}
+    else:
+        # Réponse HTML (par exemple servie par le cache HTTP): extraire les mêmes champs
+        selector = Selector(text=text)
+        rendered = {
+            'player_name': (selector.css('ul.hoversmooth li.index:first-child a u::text').get()
+                            or selector.css('ul.hoversmooth li.index:first-child a::text').get()),
+            'tooltips': extract_shot_tooltips(selector),
+        }
+    player_name = (rendered.get('player_name') or '').strip()
+    tooltips = rendered.get('tooltips')
+    result = {
+        'player_name': player_name,
+        'tooltips': None if tooltips is None else len(tooltips),
+        'shot_wrapper_html': rendered.get('shot_wrapper_html'),
+        'shots': [],
+        'errors': [],
+    }
+    if not player_name or not tooltips:
+        return result
+    for style, shot_class, tip_text in tooltips:
+        loader = ItemLoader(item=ShotChartData())
+        # Données de base du joueur et de la saison
+        loader.add_value('player_id', player_id)
+        loader.add_value('player_name', player_name)
+        loader.add_value('season', season)
+        loader.add_value('source_url', url)
+        try:
+            for field, value in parse_shot_tooltip(style, shot_class, tip_text).items():
+                loader.add_value(field, value)
+            result['shots'].append(dict(loader.load_item()))
+        except Exception as e:
+            result['errors'].append(str(e))
+    return result
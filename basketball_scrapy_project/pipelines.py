@@ -5,8 +5,70 @@
 
 
 # useful for handling different item types with a single interface
+from itemadapter import ItemAdapter
+
+from basketball_scrapy_project.enrich import enrich_rows
+from basketball_scrapy_project.items import PlayerClutchStats, ShotChartData
+from basketball_scrapy_project.store import Store, normalize_clutch_stats, normalize_shot
 
 
 class BasketballScrapyProjectPipeline:
     def process_item(self, item, spider):
         return item
+
+
+class SQLiteStorePipeline:
+    """Enregistre les tirs et statistiques clutch dans la base SQLite par lots (upsert)"""
+
+    def __init__(self, path, batch_size, stats):
+        self.path = path
+        self.batch_size = batch_size
+        self.stats = stats
+        self.store = None
+        self.buffers = {'shots': [], 'clutch_stats': []}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            crawler.settings.get('STORE_PATH', 'basketball.db'),
+            crawler.settings.getint('STORE_BATCH_SIZE', 500),
+            crawler.stats,
+        )
+
+    def open_spider(self, spider):
+        self.store = Store(self.path)
+
+    def close_spider(self, spider):
+        for table in self.buffers:
+            self._flush(table, spider)
+        self.store.close()
+
+    def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        if isinstance(item, ShotChartData):
+            table, row = 'shots', normalize_shot(adapter)
+        elif isinstance(item, PlayerClutchStats):
+            table, row = 'clutch_stats', normalize_clutch_stats(adapter)
+        else:
+            return item
+
+        if row is None:
+            self.stats.inc_value(f'store/{table}_invalid', spider=spider)
+            return item
+
+        self.buffers[table].append(row)
+        if len(self.buffers[table]) >= self.batch_size:
+            self._flush(table, spider)
+        return item
+
+    def _flush(self, table, spider):
+        rows = self.buffers[table]
+        if not rows:
+            return
+        if table == 'shots':
+            # Champs dérivés calculés sur tout le lot en une passe vectorisée
+            self.store.upsert_shots(enrich_rows(rows))
+        else:
+            self.store.upsert_clutch_stats(rows)
+        self.stats.inc_value(f'store/{table}_upserted', len(rows), spider=spider)
+        self.buffers[table] = []
@@ -0,0 +1,264 @@
+# Profilage des crawls (option --profile de scraper.py)
+#
+# Sans modifier les spiders: un middleware de spider active un profileur cProfile
+# par callback pendant l'exécution du callback (ItemLoader compris; pour un callback
+# async, seulement entre deux await: le temps passé à attendre le pool de parsing,
+# pendant lequel le reactor exécute le reste du crawl, n'est pas compté), le gestionnaire
+# de pipelines profile chaque pipeline séparément, et l'extension CrawlProfiler
+# profile l'export des feeds et prend des instantanés tracemalloc à intervalle
+# régulier pour suivre la croissance mémoire des longues saisons complètes.
+#
+# Les rapports sont écrits à la fermeture du spider dans PROFILE_DIR:
+#     callback_parse_box_score.prof / .txt    (pstats binaire et fonctions les plus coûteuses)
+#     pipeline_SQLiteStorePipeline.prof / .txt
+#     feed_export.prof / .txt
+#     memory.txt                              (complété à chaque instantané)
+#
+# Settings:
+#     PROFILE_ENABLED = False
+#     PROFILE_DIR = "profiles/{spider}_{time}"
+#     PROFILE_MEMORY_INTERVAL = 60      # secondes entre deux instantanés tracemalloc (0: aucun)
+#     PROFILE_TOP = 30                  # lignes par rapport
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import tracemalloc
+from datetime import datetime
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.pipelines import ItemPipelineManager
+
+logger = logging.getLogger(__name__)
+
+# Allocations propres à l'outillage, exclues des instantanés
+TRACEMALLOC_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+)
+
+
+def profile_dir(crawler, spider):
+    """Répertoire des rapports du crawl (horodaté avec le start_time des stats Scrapy)"""
+    start_time = crawler.stats.get_value('start_time') or datetime.now()
+    template = crawler.settings.get('PROFILE_DIR') or 'profiles/{spider}_{time}'
+    return template.format(spider=spider.name, time=start_time.strftime('%Y%m%d_%H%M%S'))
+
+
+def write_profile(profile, directory, name, top=30):
+    """Écrit un profil cProfile en .prof (pstats, snakeviz) et en résumé texte trié par temps cumulé"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    profile.dump_stats(f"{path}.prof")
+    stream = io.StringIO()
+    stats = pstats.Stats(profile, stream=stream)
+    stats.sort_stats('cumulative').print_stats(top)
+    stats.sort_stats('tottime').print_stats(top)
+    with open(f"{path}.txt", 'w') as f:
+        f.write(stream.getvalue())
+    return path
+
+
+class _Profiled:
+    """Awaitable qui n'active le profileur que pendant les étapes synchrones d'un autre awaitable
+
+    Chaque send() vers l'awaitable s'exécute profileur actif; les valeurs qu'il cède à la
+    boucle (futures, Deferred) traversent profileur inactif. Deux callbacks suspendus en
+    même temps ne se partagent donc jamais le hook de profilage (unique en Python).
+    """
+
+    def __init__(self, awaitable, profile):
+        self.awaitable = awaitable
+        self.profile = profile
+
+    def __await__(self):
+        steps = self.awaitable.__await__()
+        value, error = None, None
+        while True:
+            self.profile.enable()
+            try:
+                signal = steps.throw(error) if error is not None else steps.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.profile.disable()
+            try:
+                value, error = (yield signal), None
+            except BaseException as e:
+                value, error = None, e
+
+
+class ProfilingMiddleware:
+    """Middleware de spider: un profileur par callback, actif uniquement pendant le callback"""
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.profiles = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('PROFILE_ENABLED'):
+            raise NotConfigured
+        mw = cls(crawler)
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    def _profile(self, response):
+        callback = response.request.callback if response.request is not None else None
+        name = getattr(callback, '__name__', None) or 'parse'
+        if name not in self.profiles:
+            self.profiles[name] = cProfile.Profile()
+        return self.profiles[name]
+
+    def process_spider_output(self, response, result, spider):
+        profile = self._profile(response)
+        iterator = iter(result)
+        while True:
+            profile.enable()
+            try:
+                output = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                profile.disable()
+            yield output
+
+    async def process_spider_output_async(self, response, result, spider):
+        profile = self._profile(response)
+        iterator = result.__aiter__()
+        while True:
+            try:
+                output = await _Profiled(iterator.__anext__(), profile)
+            except StopAsyncIteration:
+                break
+            yield output
+
+    def spider_closed(self, spider):
+        directory = profile_dir(self.crawler, spider)
+        top = self.crawler.settings.getint('PROFILE_TOP', 30)
+        for name, profile in self.profiles.items():
+            write_profile(profile, directory, f"callback_{name}", top)
+        if self.profiles:
+            logger.info(f"Profils des callbacks ({', '.join(self.profiles)}) écrits dans {directory}")
+
+
+class ProfiledItemPipelineManager(ItemPipelineManager):
+    """Gestionnaire de pipelines (setting ITEM_PROCESSOR) qui profile chaque pipeline avec PROFILE_ENABLED
+
+    Seule la partie synchrone de process_item est mesurée (les pipelines du projet sont synchrones).
+    """
+
+    profiles = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        manager = super().from_crawler(crawler)
+        if crawler.settings.getbool('PROFILE_ENABLED'):
+            manager.crawler = crawler
+            manager.profiles = {}
+            pipelines = [pipe for pipe in manager.middlewares if hasattr(pipe, 'process_item')]
+            methods = manager.methods['process_item']
+            for index, pipe in enumerate(pipelines):
+                methods[index] = manager._profiled(type(pipe).__name__, methods[index])
+        return manager
+
+    def _profiled(self, name, method):
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+
+        def process_item(item, spider):
+            return profile.runcall(method, item, spider)
+
+        return process_item
+
+    def close_spider(self, spider):
+        dfd = super().close_spider(spider)
+        if self.profiles:
+            directory = profile_dir(self.crawler, spider)
+            top = self.crawler.settings.getint('PROFILE_TOP', 30)
+            for name, profile in self.profiles.items():
+                write_profile(profile, directory, f"pipeline_{name}", top)
+            logger.info(f"Profils des pipelines écrits dans {directory}")
+        return dfd
+
+
+class CrawlProfiler:
+    """Extension: profil de l'export des feeds et instantanés tracemalloc périodiques"""
+
+    def __init__(self, crawler, interval, top):
+        self.crawler = crawler
+        self.interval = interval
+        self.top = top
+        self.feed_profile = cProfile.Profile()
+        self.feed_items = 0
+        self.baseline = None
+        self.task = None
+        self.directory = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('PROFILE_ENABLED'):
+            raise NotConfigured
+        ext = cls(
+            crawler,
+            crawler.settings.getfloat('PROFILE_MEMORY_INTERVAL', 60),
+            crawler.settings.getint('PROFILE_TOP', 30),
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        # Comme CrawlTrace: chargée avant FeedExporter (ordre négatif), le profil démarre
+        # avant l'écriture de l'item dans les feeds et s'arrête dans un récepteur connecté après
+        crawler.signals.connect(ext.feed_export_started, signal=signals.item_scraped)
+        return ext
+
+    def spider_opened(self, spider):
+        self.directory = profile_dir(self.crawler, spider)
+        self.crawler.signals.connect(self.feed_export_finished, signal=signals.item_scraped)
+        if self.interval > 0:
+            from twisted.internet import task
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self.baseline = self._snapshot()
+            self.task = task.LoopingCall(self.memory_snapshot)
+            self.task.start(self.interval, now=False)
+        spider.logger.info(f"Profilage activé, rapports dans {self.directory}")
+
+    def feed_export_started(self, item, response, spider):
+        self.feed_profile.enable()
+
+    def feed_export_finished(self, item, response, spider):
+        self.feed_profile.disable()
+        self.feed_items += 1
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(TRACEMALLOC_FILTERS)
+
+    def memory_snapshot(self):
+        """Ajoute à memory.txt la mémoire tracée et les lignes qui ont le plus grossi depuis le début"""
+        current, peak = tracemalloc.get_traced_memory()
+        differences = self._snapshot().compare_to(self.baseline, 'lineno')[:self.top]
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, 'memory.txt'), 'a') as f:
+            f.write(
+                f"=== {datetime.now().isoformat(timespec='seconds')} - "
+                f"mémoire tracée {current / 1024 / 1024:.1f} Mo (pic {peak / 1024 / 1024:.1f} Mo), "
+                f"{self.crawler.stats.get_value('item_scraped_count', 0)} items\n"
+            )
+            for difference in differences:
+                f.write(f"{difference}\n")
+            f.write("\n")
+        logger.debug(f"Instantané mémoire: {current / 1024 / 1024:.1f} Mo tracés (pic {peak / 1024 / 1024:.1f} Mo)")
+
+    def spider_closed(self, spider):
+        if self.task is not None:
+            if self.task.running:
+                self.task.stop()
+            self.memory_snapshot()
+            tracemalloc.stop()
+        if self.feed_items:
+            write_profile(self.feed_profile, self.directory, 'feed_export', self.top)
+        logger.info(f"Rapports de profilage écrits dans {self.directory}")
@@ -0,0 +1,165 @@
+# Publication des données du frontend: fichiers nommés par empreinte et précompressés
+#
+# Chaque artefact JSON de public/data (tirs, grilles, agrégats, classement) est copié
+# dans public/data/published/ sous un nom contenant l'empreinte de son contenu
+# (shots/gsw_shots_2024.3fa2c1d07b9e.json), avec ses variantes .gz et .br: le
+# serveur les envoie telles quelles (Content-Encoding) et le navigateur peut les
+# garder en cache indéfiniment (Cache-Control: immutable), puisqu'un contenu modifié
+# change de nom. Le manifeste public/data/manifest.json, seul fichier à ne pas mettre
+# en cache, associe le nom stable au nom publié:
+#     {"shots/gsw_shots_2024.json": {"path": "published/shots/gsw_shots_2024.3fa2c1d07b9e.json",
+#                                    "bytes": ..., "gzip": ..., "br": ...}}
+#
+# Un artefact déjà publié avec le même contenu n'est pas recompressé. Les fichiers
+# publiés qui ne figurent ni dans le nouveau manifeste ni dans le précédent sont
+# supprimés (les pages encore ouvertes sur l'ancien manifeste restent servies).
+#
+# Le rapport de tailles donne, par artefact, les tailles brute et compressées et le
+# temps de JSON.parse estimé à partir d'un débit de parsing (PARSE_RATE_MB, Mo/s,
+# celui d'un téléphone moyen), comparé au budget de parsing.
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PUBLISHED_DIR = 'published'
+MANIFEST_FILE = 'manifest.json'
+HASH_LENGTH = 12
+
+# Débit de JSON.parse estimé (Mo/s) et budget par artefact (ms)
+PARSE_RATE_MB = 50.0
+PARSE_BUDGET_MS = 200.0
+
+
+def _artifacts(data_dir):
+    """Chemins relatifs des artefacts JSON à publier"""
+    for root, dirs, files in os.walk(data_dir):
+        relative_root = os.path.relpath(root, data_dir)
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.') and not (relative_root == '.' and d == PUBLISHED_DIR))
+        for name in sorted(files):
+            relative_path = os.path.normpath(os.path.join(relative_root, name))
+            if name.endswith('.json') and not name.startswith('.') and relative_path != MANIFEST_FILE:
+                yield relative_path.replace(os.sep, '/')
+
+
+def hashed_name(relative_path, digest):
+    base, extension = os.path.splitext(relative_path)
+    return f"{PUBLISHED_DIR}/{base}.{digest[:HASH_LENGTH]}{extension}"
+
+
+def _write(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(data_dir):
+    path = os.path.join(data_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {'files': {}}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def publish(data_dir, gzip_level=9, brotli_quality=11):
+    """Publie les artefacts de data_dir; retourne (manifeste, artefacts recompressés)"""
+    previous = load_manifest(data_dir)
+    files = {}
+    compressed = []
+    for relative_path in _artifacts(data_dir):
+        with open(os.path.join(data_dir, relative_path), 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        published = hashed_name(relative_path, digest)
+        target = os.path.join(data_dir, published)
+        entry = {'path': published, 'bytes': len(data)}
+
+        variants = {'gzip': f"{target}.gz"}
+        if brotli is not None:
+            variants['br'] = f"{target}.br"
+        if os.path.exists(target) and all(os.path.exists(path) for path in variants.values()):
+            for encoding, path in variants.items():
+                entry[encoding] = os.path.getsize(path)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            _write(target, data)
+            # mtime=0: même contenu, même fichier .gz d'une publication à l'autre
+            encoded = {'gzip': gzip.compress(data, compresslevel=gzip_level, mtime=0)}
+            if brotli is not None:
+                encoded['br'] = brotli.compress(data, quality=brotli_quality)
+            for encoding, payload in encoded.items():
+                _write(variants[encoding], payload)
+                entry[encoding] = len(payload)
+            compressed.append(relative_path)
+        files[relative_path] = entry
+
+    manifest = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'encodings': ['br', 'gzip'] if brotli is not None else ['gzip'],
+        'files': files,
+    }
+    _prune(data_dir, files, previous.get('files', {}))
+    _write(os.path.join(data_dir, MANIFEST_FILE), json.dumps(manifest, separators=(',', ':')).encode('utf-8'))
+    return manifest, compressed
+
+
+def _prune(data_dir, files, previous_files):
+    """Supprime les fichiers publiés absents du manifeste courant et du précédent"""
+    keep = {entry['path'] for entry in files.values()} | {entry['path'] for entry in previous_files.values()}
+    keep = {os.path.normpath(os.path.join(data_dir, path)) for path in keep}
+    published_dir = os.path.join(data_dir, PUBLISHED_DIR)
+    for root, dirs, names in os.walk(published_dir, topdown=False):
+        for name in names:
+            path = os.path.normpath(os.path.join(root, name))
+            original = path[:-3] if path.endswith(('.gz', '.br')) else path
+            if original not in keep:
+                os.remove(path)
+        if root != published_dir and not os.listdir(root):
+            os.rmdir(root)
+
+
+def size_report(manifest, parse_rate_mb=PARSE_RATE_MB, parse_budget_ms=PARSE_BUDGET_MS):
+    """Lignes du rapport de tailles, des artefacts les plus lourds aux plus légers"""
+    rows = []
+    for relative_path, entry in manifest['files'].items():
+        parse_ms = round(entry['bytes'] / (parse_rate_mb * 1e6) * 1000, 1)
+        rows.append({
+            'artifact': relative_path,
+            'raw_bytes': entry['bytes'],
+            'gzip_bytes': entry.get('gzip'),
+            'br_bytes': entry.get('br'),
+            'parse_ms': parse_ms,
+            'over_budget': parse_ms > parse_budget_ms,
+        })
+    return sorted(rows, key=lambda row: row['raw_bytes'], reverse=True)
+
+
+def group_report(rows):
+    """Totaux par dossier (shots, grids/2024/players...): les milliers de petits fichiers regroupés"""
+    groups = {}
+    for row in rows:
+        group = groups.setdefault(os.path.dirname(row['artifact']) or '.', {
+            'files': 0, 'raw_bytes': 0, 'gzip_bytes': 0, 'br_bytes': 0, 'over_budget': 0,
+        })
+        group['files'] += 1
+        group['over_budget'] += row['over_budget']
+        for column in ('raw_bytes', 'gzip_bytes', 'br_bytes'):
+            group[column] += row[column] or 0
+    return groups
+
+
+def clean(data_dir):
+    """Supprime les fichiers publiés et le manifeste (retour aux noms stables)"""
+    shutil.rmtree(os.path.join(data_dir, PUBLISHED_DIR), ignore_errors=True)
+    manifest_path = os.path.join(data_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
@@ -0,0 +1,122 @@
+# Construction des requêtes analytiques sur la table shots de la base SQLite
+#
+# Les filtres sont traduits en clauses WHERE paramétrées qui s'appuient sur les
+# index de la base (joueur, équipe, saison, date); les regroupements produisent
+# tentatives, tirs réussis et pourcentage de réussite par groupe.
+
+# Clés de regroupement acceptées en ligne de commande -> colonnes SQL
+GROUP_COLUMNS = {
+    'player': 'player_id',
+    'team': 'team',
+    'opponent': 'opponent',
+    'season': 'season',
+    'date': 'game_date',
+    'quarter': 'quarter',
+    'distance': 'shot_distance',
+    'type': 'shot_type',
+    'made': 'is_made',
+    'zone': 'zone',
+    'clutch': 'is_clutch',
+}
+
+SHOT_LIST_COLUMNS = [
+    'player_id', 'player_name', 'team', 'opponent', 'season', 'game_date', 'quarter',
+    'time_remaining', 'shot_type', 'shot_distance', 'is_made', 'x_coordinate', 'y_coordinate', 'zone',
+]
+
+
+def normalize_quarter(quarter):
+    """Accepte '4', 'Q4' ou '4th' (ou 'OT', 'OT2', '2nd OT') et retourne la valeur stockée ('4th', '2nd OT')"""
+    value = str(quarter).strip().upper().lstrip('Q')
+    suffixes = {'1': '1st', '2': '2nd', '3': '3rd', '4': '4th'}
+    if 'OT' in value:
+        number = value.replace('OT', '').strip().rstrip('STNDRH') or '1'
+        return f"{suffixes.get(number, number + 'th')} OT"
+    return suffixes.get(value, str(quarter).strip().lower())
+
+
+def resolve_player_ids(store, player):
+    """Retourne les player_id correspondant à un identifiant ('c/curryst01', 'curryst01') ou un nom"""
+    if '/' in player:
+        return [player]
+    # Recherche dans la petite table players plutôt que dans shots
+    rows = store.execute(
+        "SELECT player_id FROM players WHERE player_name LIKE ? OR player_id = ?",
+        (f"%{player}%", f"{player[:1]}/{player}"),
+    )
+    return [row['player_id'] for row in rows]
+
+
+def build_shot_query(filters, group_by=None, limit=None, columns=None):
+    """Construit la requête SQL (et ses paramètres) correspondant aux filtres et regroupements"""
+    clauses, params = [], []
+
+    if filters.get('player_ids') is not None:
+        clauses.append(f"player_id IN ({', '.join('?' for _ in filters['player_ids'])})")
+        params.extend(filters['player_ids'])
+    for column in ('team', 'season'):
+        if filters.get(column):
+            clauses.append(f"{column} = ?")
+            params.append(filters[column])
+    if filters.get('date_from'):
+        clauses.append("game_date >= ?")
+        params.append(filters['date_from'])
+    if filters.get('date_to'):
+        clauses.append("game_date <= ?")
+        params.append(filters['date_to'])
+    if filters.get('quarter'):
+        clauses.append("quarter = ?")
+        params.append(normalize_quarter(filters['quarter']))
+    if filters.get('shot_type'):
+        clauses.append("shot_type = ?")
+        params.append(f"{filters['shot_type']}-pointer")
+    if filters.get('min_distance') is not None:
+        clauses.append("shot_distance >= ?")
+        params.append(filters['min_distance'])
+    if filters.get('max_distance') is not None:
+        clauses.append("shot_distance <= ?")
+        params.append(filters['max_distance'])
+    if filters.get('made') is not None:
+        clauses.append("is_made = ?")
+        params.append(1 if filters['made'] else 0)
+    if filters.get('zone'):
+        clauses.append("zone = ?")
+        params.append(filters['zone'].replace('-', '_'))
+    if filters.get('clutch'):
+        clauses.append("is_clutch = 1")
+
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    if group_by:
+        columns = [GROUP_COLUMNS[key] for key in group_by]
+        select = list(columns)
+        if 'player_id' in columns:
+            select.append('MAX(player_name) AS player_name')
+        sql = (
+            f"SELECT {', '.join(select)}, COUNT(*) AS attempts, SUM(is_made) AS makes, "
+            f"ROUND(100.0 * SUM(is_made) / COUNT(*), 1) AS fg_pct "
+            f"FROM shots{where} GROUP BY {', '.join(columns)} ORDER BY {', '.join(columns)}"
+        )
+    elif filters.get('aggregate'):
+        sql = (
+            "SELECT COUNT(*) AS attempts, SUM(is_made) AS makes, "
+            f"ROUND(100.0 * SUM(is_made) / COUNT(*), 1) AS fg_pct FROM shots{where}"
+        )
+    else:
+        sql = f"SELECT {', '.join(columns or SHOT_LIST_COLUMNS)} FROM shots{where} ORDER BY game_date, player_id"
+
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params
+
+
+def format_table(columns, rows):
+    """Met en forme des lignes en tableau texte aligné"""
+    values = [[('' if value is None else str(value)) for value in row] for row in rows]
+    widths = [max([len(column)] + [len(row[i]) for row in values]) for i, column in enumerate(columns)]
+    lines = ['  '.join(column.ljust(width) for column, width in zip(columns, widths))]
+    lines.append('  '.join('-' * width for width in widths))
+    for row in values:
+        lines.append('  '.join(value.ljust(width) for value, width in zip(row, widths)))
+    return '\n'.join(lines)
@@ -0,0 +1,347 @@
+# Rendu JavaScript des pages avec Selenium, hors du thread du reactor
+#
+# Le handler de téléchargement délègue les requêtes classiques au handler HTTP de
+# Scrapy et exécute les requêtes marquées `meta['render']` dans un pool de threads,
+# chacun avec son propre navigateur. Le moteur Scrapy continue donc de télécharger,
+# parser et exporter pendant que Chrome charge une page.
+#
+# Activer dans les settings:
+#     DOWNLOAD_HANDLERS = {
+#         "http": "basketball_scrapy_project.rendering.SeleniumDownloadHandler",
+#         "https": "basketball_scrapy_project.rendering.SeleniumDownloadHandler",
+#     }
+
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+
+import scrapy
+from scrapy.core.downloader.handlers.http11 import HTTP11DownloadHandler
+from scrapy.http import HtmlResponse, TextResponse
+from twisted.internet.threads import deferToThreadPool
+from twisted.python.threadpool import ThreadPool
+
+logger = logging.getLogger(__name__)
+
+# Slot de téléchargement dédié aux rendus (concurrence réglée par RENDER_CONCURRENCY)
+RENDER_SLOT = 'render'
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+
+
+def render_request(url, wait_for=None, script=None, timeout=None, **kwargs):
+    """Construit une requête rendue par le navigateur
+
+    - wait_for: sélecteur CSS attendu avant d'extraire la page
+    - script: JavaScript exécuté après le rendu; son résultat est renvoyé en JSON
+      à la place du HTML de la page
+    """
+    meta = kwargs.pop('meta', {})
+    meta['render'] = {'wait_for': wait_for, 'script': script, 'timeout': timeout}
+    meta.setdefault('download_slot', RENDER_SLOT)
+    return scrapy.Request(url, meta=meta, **kwargs)
+
+
+def configure_render_settings(settings):
+    """Règle le slot de rendu et la concurrence globale à partir de RENDER_CONCURRENCY"""
+    render_concurrency = settings.getint('RENDER_CONCURRENCY', 1)
+    slots = settings.getdict('DOWNLOAD_SLOTS')
+    slots.setdefault(RENDER_SLOT, {
+        'concurrency': render_concurrency,
+        'delay': settings.getfloat('DOWNLOAD_DELAY'),
+    })
+    settings.set('DOWNLOAD_SLOTS', slots, priority='spider')
+    # Laisser au moins une requête HTTP classique avancer pendant les rendus
+    if settings.getint('CONCURRENT_REQUESTS') <= render_concurrency:
+        settings.set('CONCURRENT_REQUESTS', render_concurrency + 1, priority='spider')
+
+
+# Extensions d'URL bloquées pour chaque type de ressource (Network.setBlockedURLs ne filtre
+# que sur l'URL, pas sur le type de ressource; le * final couvre les URL versionnées,
+# ex: logo.png?v=3)
+RESOURCE_TYPE_PATTERNS = {
+    'image': ['*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.svg*', '*.ico*', '*.avif*'],
+    'font': ['*.woff*', '*.ttf*', '*.otf*', '*.eot*'],
+    'stylesheet': ['*.css*'],
+    'media': ['*.mp4*', '*.webm*', '*.mp3*', '*.m3u8*'],
+}
+
+
+def blocked_url_patterns(settings):
+    """Retourne les motifs d'URL à bloquer à partir des types de ressources et domaines configurés"""
+    patterns = []
+    for resource_type in settings.getlist('RENDER_BLOCKED_RESOURCE_TYPES'):
+        patterns.extend(RESOURCE_TYPE_PATTERNS.get(resource_type, []))
+    for domain in settings.getlist('RENDER_BLOCKED_DOMAINS'):
+        patterns.append(f'*://*{domain}/*')
+    return patterns
+
+
+_claimed_profiles = set()
+_claimed_profiles_lock = threading.Lock()
+
+
+def _profile_locked(profile_dir):
+    """Vrai si le profil est ouvert par un Chrome encore en vie
+
+    Le verrou SingletonLock est un lien symbolique vers "<hôte>-<pid>"; un Chrome tué
+    le laisse derrière lui. Un verrou d'une autre machine est considéré comme actif.
+    """
+    lock_path = os.path.join(profile_dir, 'SingletonLock')
+    if not os.path.lexists(lock_path):
+        return False
+    try:
+        host, _, pid = os.readlink(lock_path).rpartition('-')
+        pid = int(pid)
+    except (OSError, ValueError):
+        return True
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        # Verrou orphelin: le supprimer pour que Chrome puisse rouvrir le profil
+        for name in ('SingletonLock', 'SingletonSocket', 'SingletonCookie'):
+            try:
+                os.unlink(os.path.join(profile_dir, name))
+            except FileNotFoundError:
+                pass
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def acquire_profile_dir(base_dir):
+    """Retourne un répertoire de profil persistant libre sous base_dir
+
+    Chrome verrouille un profil pendant son utilisation: chaque navigateur (et chaque
+    processus en parallèle) prend le premier profil qui n'est pas déjà ouvert, ce qui
+    conserve le cache disque d'une exécution à l'autre.
+    """
+    index = 0
+    with _claimed_profiles_lock:
+        while True:
+            profile_dir = os.path.abspath(os.path.join(base_dir, f'profile-{index}'))
+            # Chrome ne crée le verrou qu'au démarrage: mémoriser aussi les profils déjà
+            # attribués dans ce processus
+            if profile_dir not in _claimed_profiles and not _profile_locked(profile_dir):
+                os.makedirs(profile_dir, exist_ok=True)
+                _claimed_profiles.add(profile_dir)
+                return profile_dir
+            index += 1
+
+
+def release_profile_dir(profile_dir):
+    """Rend un profil attribué par acquire_profile_dir (navigateur fermé)"""
+    with _claimed_profiles_lock:
+        _claimed_profiles.discard(os.path.abspath(profile_dir))
+
+
+def create_driver(settings):
+    """Crée un navigateur Chrome headless configuré pour l'extraction"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")  # Exécuter en mode headless
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--window-size=1920,1080")  # Définir une taille d'écran suffisante
+
+    # Ajouter un user-agent pour éviter les détections de bot
+    chrome_options.add_argument(f"user-agent={settings.get('RENDER_USER_AGENT', DEFAULT_USER_AGENT)}")
+
+    # Profil persistant: les bundles JS partagés restent dans le cache disque entre les exécutions
+    profile_base = settings.get('RENDER_PROFILE_DIR')
+    if profile_base:
+        chrome_options.add_argument(f"--user-data-dir={acquire_profile_dir(profile_base)}")
+
+    # Ne pas décoder les images même si elles passent le filtre d'URL
+    if 'image' in settings.getlist('RENDER_BLOCKED_RESOURCE_TYPES'):
+        chrome_options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+
+    # Journal réseau pour mesurer les octets et requêtes (bloquées ou non) de chaque page
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+    # Initialiser le driver avec webdriver-manager pour gérer automatiquement les versions du pilote
+    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    driver.implicitly_wait(5)  # Attente implicite de 5 secondes
+
+    # Bloquer les ressources inutiles à l'extraction via le protocole DevTools
+    patterns = blocked_url_patterns(settings)
+    driver.execute_cdp_cmd('Network.enable', {})
+    if patterns:
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+    return driver
+
+
+def collect_network_metrics(driver):
+    """Résume le journal réseau de la page chargée: requêtes, octets, requêtes bloquées et servies par le cache"""
+    metrics = {'requests': 0, 'bytes': 0, 'blocked': 0, 'from_cache': 0}
+    for entry in driver.get_log('performance'):
+        message = json.loads(entry['message'])['message']
+        method = message.get('method')
+        params = message.get('params', {})
+        if method == 'Network.requestWillBeSent':
+            metrics['requests'] += 1
+        elif method == 'Network.loadingFinished':
+            metrics['bytes'] += int(params.get('encodedDataLength', 0))
+        elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+            metrics['blocked'] += 1
+        elif method == 'Network.requestServedFromCache':
+            metrics['from_cache'] += 1
+    return metrics
+
+
+class SeleniumDownloadHandler:
+    lazy = False
+
+    def __init__(self, settings, crawler=None):
+        self.settings = settings
+        self.stats = crawler.stats if crawler else None
+        self._http_handler = HTTP11DownloadHandler(settings, crawler)
+        self.concurrency = settings.getint('RENDER_CONCURRENCY', 1)
+        self.timeout = settings.getfloat('RENDER_TIMEOUT', 10)
+        # Sans rendu (RENDER_ENABLED=False), les pages sont téléchargées telles quelles (serveur de rejeu)
+        self.enabled = settings.getbool('RENDER_ENABLED', True)
+
+        # Un navigateur par thread: les drivers Selenium ne sont pas thread-safe
+        self._threadpool = ThreadPool(minthreads=1, maxthreads=self.concurrency, name='selenium-render')
+        self._threadpool.start()
+        self._idle_drivers = queue.Queue()
+        self._drivers = []
+        self._drivers_lock = threading.Lock()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings, crawler)
+
+    def download_request(self, request, spider):
+        if not self.enabled or not request.meta.get('render'):
+            return self._http_handler.download_request(request, spider)
+        # Import tardif: importer le reactor au chargement des spiders installerait le reactor
+        # par défaut avant celui demandé par TWISTED_REACTOR
+        from twisted.internet import reactor
+
+        dfd = deferToThreadPool(reactor, self._threadpool, self._render, request)
+        dfd.addCallback(self._record_metrics, request, spider)
+        return dfd
+
+    def _acquire_driver(self):
+        try:
+            return self._idle_drivers.get_nowait()
+        except queue.Empty:
+            driver = create_driver(self.settings)
+            with self._drivers_lock:
+                self._drivers.append(driver)
+            return driver
+
+    def _render(self, request):
+        """Charge la page dans un navigateur (exécuté dans un thread du pool)"""
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        options = request.meta['render']
+        driver = self._acquire_driver()
+        start = time.monotonic()
+        request.meta['render_started_at'] = start
+        reusable = True
+        try:
+            # Vider le journal réseau de la page précédente
+            driver.get_log('performance')
+            driver.get(request.url)
+
+            if options.get('wait_for'):
+                wait_started = time.monotonic()
+                try:
+                    WebDriverWait(driver, options.get('timeout') or self.timeout).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, options['wait_for']))
+                    )
+                except TimeoutException:
+                    request.meta['render_timed_out'] = True
+                    logger.warning(f"Élément {options['wait_for']} absent après rendu de {request.url}")
+                finally:
+                    request.meta['render_wait'] = (wait_started, time.monotonic() - wait_started)
+
+            if options.get('script'):
+                result = driver.execute_script(options['script'])
+                response = TextResponse(
+                    url=request.url,
+                    body=json.dumps(result).encode('utf-8'),
+                    encoding='utf-8',
+                    headers={'Content-Type': 'application/json'},
+                    request=request,
+                    flags=['rendered'],
+                )
+            else:
+                response = HtmlResponse(
+                    url=request.url,
+                    body=driver.page_source.encode('utf-8'),
+                    encoding='utf-8',
+                    request=request,
+                    flags=['rendered'],
+                )
+            request.meta['render_metrics'] = collect_network_metrics(driver)
+        except WebDriverException as e:
+            # Navigateur planté ou session perdue: le remplacer au prochain rendu
+            # (un simple dépassement de délai laisse le navigateur utilisable)
+            reusable = isinstance(e, TimeoutException)
+            raise
+        finally:
+            request.meta['render_time'] = time.monotonic() - start
+            if reusable:
+                self._idle_drivers.put(driver)
+            else:
+                self._discard_driver(driver)
+        return response
+
+    def _discard_driver(self, driver):
+        with self._drivers_lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        profile_dir = (driver.capabilities.get('chrome') or {}).get('userDataDir')
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Erreur lors de la fermeture du navigateur: {e}")
+        if profile_dir and self.settings.get('RENDER_PROFILE_DIR'):
+            release_profile_dir(profile_dir)
+        if self.stats:
+            from twisted.internet import reactor
+
+            reactor.callFromThread(self.stats.inc_value, 'render/drivers_replaced')
+
+    def _record_metrics(self, response, request, spider):
+        """Reporte les métriques du rendu dans les stats (sur le thread du reactor)"""
+        metrics = request.meta.get('render_metrics')
+        if self.stats and metrics:
+            self.stats.inc_value('render/pages', spider=spider)
+            for name, value in metrics.items():
+                self.stats.inc_value(f'render/{name}', value, spider=spider)
+            spider.logger.debug(
+                f"Rendu de {request.url} en {request.meta['render_time']:.1f}s: "
+                f"{metrics['requests']} requêtes, {metrics['bytes'] / 1024:.0f} Ko, "
+                f"{metrics['blocked']} bloquées, {metrics['from_cache']} depuis le cache"
+            )
+        return response
+
+    def close(self):
+        self._threadpool.stop()
+        with self._drivers_lock:
+            for driver in self._drivers:
+                try:
+                    driver.quit()
+                except Exception as e:
+                    logger.warning(f"Erreur lors de la fermeture du navigateur: {e}")
+            self._drivers = []
+        return self._http_handler.close()
@@ -0,0 +1,189 @@
+# Serveur local qui rejoue des pages enregistrées sous les mêmes chemins que le site
+#
+# Permet de mesurer un crawl complet (débit, concurrence, throttling, retries) sans
+# solliciter basketball-reference: les spiders y sont dirigés avec le setting
+# SITE_BASE_URL. Les pages viennent:
+#   - du cache HTTP de Scrapy (FilesystemCacheStorage, compressé ou non): réponse exacte par URL
+#   - des fixtures des benchmarks: un fichier par motif de chemin (routes.json), réutilisé pour
+#     toutes les URL qui correspondent (tous les box scores, toutes les pages de shooting...)
+#
+# Pannes injectables: latence (fixe + aléatoire), rafales de 429 (avec Retry-After) et
+# erreurs 5xx aléatoires. Le tirage est reproductible (graine).
+#
+# Les requêtes en URI absolue (GET http://hôte/chemin) sont servies de la même façon:
+# plusieurs serveurs, chacun avec ses pannes, tiennent lieu de proxies pour tester
+# PROXY_POOL (basketball_scrapy_project.proxies).
+
+import gzip
+import json
+import logging
+import os
+import pickle
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+ROBOTS_TXT = b"User-agent: *\nAllow: /\n"
+# En-têtes recalculés par le serveur
+SKIPPED_HEADERS = {'content-length', 'transfer-encoding', 'connection', 'date', 'server'}
+ERROR_STATUSES = (500, 502, 503)
+
+
+def _read_cache_file(path, compressed):
+    with (gzip.open if compressed else open)(path, 'rb') as f:
+        return f.read()
+
+
+def load_http_cache(cache_dir):
+    """Charge les réponses du cache HTTP: {chemin?requête: (statut, [(en-tête, valeur)], corps)}"""
+    pages = {}
+    for root, _, files in os.walk(cache_dir):
+        if 'pickled_meta' not in files:
+            continue
+        with open(os.path.join(root, 'pickled_meta'), 'rb') as f:
+            # Un fichier gzip commence par 1f 8b, un pickle par 80 (HTTPCACHE_GZIP)
+            compressed = f.read(2) == b'\x1f\x8b'
+        meta = pickle.loads(_read_cache_file(os.path.join(root, 'pickled_meta'), compressed))
+        if meta.get('status') != 200:
+            continue
+        raw_headers = _read_cache_file(os.path.join(root, 'response_headers'), compressed)
+        headers = []
+        for line in raw_headers.decode('latin-1').split('\r\n'):
+            name, _, value = line.partition(': ')
+            if name and name.lower() not in SKIPPED_HEADERS:
+                headers.append((name, value))
+        body = _read_cache_file(os.path.join(root, 'response_body'), compressed)
+        url = urlsplit(meta['url'])
+        pages[url.path + (f"?{url.query}" if url.query else '')] = (200, headers, body)
+    return pages
+
+
+def load_fixture_routes(fixtures_dir):
+    """Charge routes.json: [(motif de chemin compilé, (statut, en-têtes, corps))]"""
+    with open(os.path.join(fixtures_dir, 'routes.json')) as f:
+        routes = json.load(f)
+    loaded = []
+    for route in routes:
+        with open(os.path.join(fixtures_dir, route['fixture']), 'rb') as f:
+            body = f.read()
+        headers = [('Content-Type', route.get('content_type', 'text/html; charset=utf-8'))]
+        loaded.append((re.compile(route['pattern']), (200, headers, body)))
+    return loaded
+
+
+class FaultInjector:
+    """Latence, rafales de 429 et erreurs 5xx, tirées de façon reproductible"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, burst_every=0, burst_size=0, retry_after=1, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.burst_every = burst_every
+        self.burst_size = burst_size
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def draw(self):
+        """Retourne (délai en secondes, statut forcé ou None) pour la requête suivante"""
+        with self.lock:
+            self.count += 1
+            delay = self.latency + self.random.uniform(0, self.jitter) if self.jitter else self.latency
+            # Rafale: burst_size réponses 429 consécutives toutes les burst_every requêtes,
+            # en commençant par la première
+            if self.burst_every and (self.count - 1) % self.burst_every < self.burst_size:
+                return delay, 429
+            if self.error_rate and self.random.random() < self.error_rate:
+                return delay, self.random.choice(ERROR_STATUSES)
+            return delay, None
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, pages, routes, faults):
+        super().__init__(address, ReplayRequestHandler)
+        self.pages = pages
+        self.routes = routes
+        self.faults = faults
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def lookup(self, path):
+        """Réponse enregistrée pour un chemin: cache HTTP exact d'abord, puis motifs des fixtures"""
+        if path in self.pages:
+            return self.pages[path]
+        route_path = path.split('?', 1)[0]
+        for pattern, page in self.routes:
+            if pattern.search(route_path):
+                return page
+        return None
+
+    def count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+
+class ReplayRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        path = urlsplit(self.path)
+        path = path.path + (f"?{path.query}" if path.query else '')
+        server = self.server
+        server.count('requests')
+        if path == '/robots.txt':
+            self._send(200, [('Content-Type', 'text/plain')], ROBOTS_TXT)
+            return
+
+        delay, forced_status = server.faults.draw()
+        if delay:
+            time.sleep(delay)
+        if forced_status == 429:
+            server.count('status_429')
+            self._send(429, [('Content-Type', 'text/plain'), ('Retry-After', str(server.faults.retry_after))], b'Too Many Requests')
+            return
+        if forced_status:
+            server.count(f'status_{forced_status}')
+            self._send(forced_status, [('Content-Type', 'text/plain')], b'Server Error')
+            return
+
+        page = server.lookup(path)
+        if page is None:
+            server.count('status_404')
+            self._send(404, [('Content-Type', 'text/plain')], f"Aucune page enregistrée pour {path}".encode('utf-8'))
+            return
+        server.count('status_200')
+        self._send(*page)
+
+    def _send(self, status, headers, body):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def create_replay_server(host='127.0.0.1', port=8800, cache_dir=None, fixtures_dir=None, faults=None):
+    """Crée le serveur de rejeu (à lancer avec serve_forever(); port 0 = port libre)"""
+    pages = load_http_cache(cache_dir) if cache_dir and os.path.isdir(cache_dir) else {}
+    routes = load_fixture_routes(fixtures_dir) if fixtures_dir else []
+    if not pages and not routes:
+        raise ValueError("Aucune page à rejouer: indiquer un cache HTTP non vide ou un dossier de fixtures")
+    return ReplayServer((host, port), pages, routes, faults or FaultInjector())
@@ -44,9 +44,12 @@ CONCURRENT_REQUESTS_PER_DOMAIN = 1
 
 # Enable or disable spider middlewares
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
-#SPIDER_MIDDLEWARES = {
-#    "basketball_scrapy_project.middlewares.BasketballScrapyProjectSpiderMiddleware": 543,
-#}
+SPIDER_MIDDLEWARES = {
+    # Au plus près du spider pour ne mesurer que le temps des callbacks
+    "basketball_scrapy_project.middlewares.CallbackTimingMiddleware": 990,
+    # Profil cProfile par callback (uniquement avec PROFILE_ENABLED)
+    "basketball_scrapy_project.profiling.ProfilingMiddleware": 995,
+}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
@@ -54,19 +57,85 @@ DOWNLOADER_MIDDLEWARES = {
     "basketball_scrapy_project.middlewares.RandomUserAgentMiddleware": 400,
     "basketball_scrapy_project.middlewares.TooManyRequestsRetryMiddleware": 610,
     "scrapy.downloadermiddlewares.retry.RetryMiddleware": None,
+    # Frontière partagée (uniquement avec SharedScheduler): avant le retry, pour ne voir
+    # que les téléchargements abandonnés
+    "basketball_scrapy_project.frontier.FrontierAckMiddleware": 500,
+    # Pool de proxies (uniquement avec PROXY_POOL): avant HttpProxyMiddleware (750)
+    "basketball_scrapy_project.proxies.ProxyPoolMiddleware": 740,
+    # Après le cache HTTP: seules les requêtes envoyées au site consomment le débit partagé
+    "basketball_scrapy_project.frontier.FrontierRateLimitMiddleware": 950,
 }
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-#EXTENSIONS = {
-#    "scrapy.extensions.telnet.TelnetConsole": None,
-#}
+EXTENSIONS = {
+    # Ordre négatif: chargée avant FeedExporter pour mesurer l'export des items
+    "basketball_scrapy_project.extensions.CrawlTrace": -10,
+    "basketball_scrapy_project.profiling.CrawlProfiler": -20,
+    "basketball_scrapy_project.extensions.CrawlMetrics": 500,
+    "basketball_scrapy_project.debugcapture.DebugCapture": 510,
+}
+
+# Métriques du crawl (attentes, latences, rendu, parsing par callback, débit, cache, retries, 429)
+METRICS_ENABLED = True
+METRICS_FILE = "metrics/{spider}_{time}.json"
+# Port local d'exposition au format Prometheus (désactivé par défaut)
+METRICS_PROMETHEUS_PORT = None
+
+# Chronologie par requête au format Chrome trace / Perfetto (désactivée par défaut)
+TRACE_ENABLED = False
+TRACE_FILE = "traces/{spider}_{time}.json"
+
+# Profilage des callbacks, des pipelines et de l'export des feeds, instantanés
+# tracemalloc périodiques (désactivé par défaut, option --profile de scraper.py)
+PROFILE_ENABLED = False
+PROFILE_DIR = "profiles/{spider}_{time}"
+PROFILE_MEMORY_INTERVAL = 60
+PROFILE_TOP = 30
+
+# Capture de débogage (thread d'écriture): items échantillonnés en JSONL, pages en échec
+# compressées et dédupliquées, fichiers renouvelés et plafonnés en taille
+DEBUG_CAPTURE_ENABLED = True
+DEBUG_CAPTURE_DIR = "debug/{spider}_{time}"
+DEBUG_CAPTURE_SAMPLE_RATE = 100
+DEBUG_CAPTURE_FIRST_RESPONSE = True
+DEBUG_CAPTURE_ROTATE_BYTES = 10 * 1024 * 1024
+DEBUG_CAPTURE_MAX_BYTES = 100 * 1024 * 1024
+DEBUG_CAPTURE_FLUSH_INTERVAL = 1.0
+
+# Parsing des box scores et des pages de shooting dans un pool de processus
+# (0: dans le processus du crawl) et nombre maximal de pages en cours de parsing
+# (défaut: 2 x PARSE_PROCESSES; au-delà, les téléchargements ralentissent)
+PARSE_PROCESSES = 0
+PARSE_MAX_PENDING = None
+
+# Frontière partagée entre workers (python scraper.py worker): file de requêtes et
+# dupefilter dans une base SQLite, débit global par domaine (FRONTIER_RATE requêtes/s,
+# 0: pas de limite). Le scheduler partagé n'est activé que par la commande worker:
+#     SCHEDULER = "basketball_scrapy_project.frontier.SharedScheduler"
+FRONTIER_PATH = "frontier.db"
+FRONTIER_LEASE_SECONDS = 600
+FRONTIER_MAX_ATTEMPTS = 3
+FRONTIER_RATE = 0
+FRONTIER_BURST = 1
+FRONTIER_WAL = True
+FRONTIER_POLL_INTERVAL = 0.5
+FRONTIER_BUSY_TIMEOUT = 0.05
+
+# Journaliser une ligne de joueur sur N (niveau DEBUG) pendant l'extraction des box scores
+LOG_ROW_SAMPLE_RATE = 100
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    "basketball_scrapy_project.pipelines.BasketballScrapyProjectPipeline": 300,
-#}
+ITEM_PIPELINES = {
+    "basketball_scrapy_project.pipelines.SQLiteStorePipeline": 800,
+}
+# Gestionnaire de pipelines standard, qui profile chaque pipeline avec PROFILE_ENABLED
+ITEM_PROCESSOR = "basketball_scrapy_project.profiling.ProfiledItemPipelineManager"
+
+# Base SQLite locale des tirs et statistiques clutch (upsert par lots)
+STORE_PATH = "basketball.db"
+STORE_BATCH_SIZE = 500
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -79,7 +148,7 @@ AUTOTHROTTLE_MAX_DELAY = 60
 # each remote server
 AUTOTHROTTLE_TARGET_CONCURRENCY = 0.5
 # Enable showing throttling stats for every response received:
-AUTOTHROTTLE_DEBUG = True
+AUTOTHROTTLE_DEBUG = False
 
 # Enable and configure HTTP caching (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
@@ -89,6 +158,52 @@ HTTPCACHE_DIR = "httpcache"
 HTTPCACHE_IGNORE_HTTP_CODES = [429, 500, 502, 503, 504]
 HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
 
+# Joueurs dont les tentatives de tir (FGA) de la saison sont inférieures à ce seuil
+# ne sont pas rendus par Selenium ("skip") ou sont traités en dernier ("deprioritize")
+SHOOTING_MIN_FGA = 1
+SHOOTING_LOW_FGA_ACTION = "skip"
+
+# Rendu Selenium (basketball_scrapy_project.rendering.SeleniumDownloadHandler):
+# activation (sinon pages téléchargées sans navigateur), nombre de navigateurs en parallèle
+# et délai d'attente des éléments rendus
+RENDER_ENABLED = True
+RENDER_CONCURRENCY = 1
+RENDER_TIMEOUT = 10
+# Ressources bloquées par le navigateur (inutiles pour extraire le shot chart)
+RENDER_BLOCKED_RESOURCE_TYPES = ["image", "font", "stylesheet", "media"]
+RENDER_BLOCKED_DOMAINS = [
+    "googletagmanager.com",
+    "google-analytics.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "adnxs.com",
+    "amazon-adsystem.com",
+    "pubmatic.com",
+    "rubiconproject.com",
+    "criteo.com",
+    "quantserve.com",
+    "scorecardresearch.com",
+]
+# Répertoire des profils Chrome persistants (cache disque partagé entre les exécutions)
+RENDER_PROFILE_DIR = None
+
+# Adresse du site (http://127.0.0.1:8800 pour le serveur de rejeu: python scraper.py replay)
+SITE_BASE_URL = "https://www.basketball-reference.com"
+
+# Pause du moteur après une réponse 429 sans en-tête Retry-After (secondes)
+TOO_MANY_REQUESTS_PAUSE = 60
+
+# Pool de proxies: un slot de téléchargement par proxy (DOWNLOAD_DELAY et
+# CONCURRENT_REQUESTS_PER_DOMAIN s'appliquent à chaque proxy), quarantaine des
+# proxies bloqués. Vide: pas de proxy. Augmenter CONCURRENT_REQUESTS avec le pool.
+PROXY_POOL = []
+PROXY_POOL_FILE = None
+PROXY_POOL_BAN_CODES = [429, 403, 503]
+PROXY_POOL_QUARANTINE = 300
+PROXY_POOL_MAX_QUARANTINE = 3600
+PROXY_POOL_MAX_FAILURES = 3
+PROXY_POOL_MAX_RETRIES = 5
+
 # Set settings whose default value is deprecated to a future-proof value
 REQUEST_FINGERPRINTER_IMPLEMENTATION = "2.7"
 TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
@@ -0,0 +1,19 @@
+# Signaux propres au projet, en complément de scrapy.signals
+#
+# Envoyés avec crawler.signals.send_catch_log(signal=..., ...) et écoutés par les
+# extensions (métriques, traces) sans que les spiders n'aient à les connaître.
+
+# Fin du traitement d'une réponse par un callback de spider
+# Arguments: response, spider, callback (nom du callback), started (time.monotonic() au premier appel),
+# duration (secondes passées dans le callback, hors traitement de ses résultats)
+callback_processed = object()
+
+# Page à conserver pour le débogage (extraction en échec), capturée par DebugCapture
+# Arguments: response, spider, reason (court identifiant, ex: "roster_empty"),
+# body (contenu à conserver, par défaut response.body)
+page_failed = object()
+
+# Téléchargement abandonné: exception après la dernière tentative de RetryMiddleware
+# (connexion refusée, timeout, DNS) ou requête ignorée (IgnoreRequest)
+# Arguments: request, spider, exception
+request_failed = object()
@@ -0,0 +1,146 @@
+import os
+import re
+from datetime import date
+
+import scrapy
+from scrapy.exceptions import CloseSpider
+from scrapy.extensions.feedexport import ItemFilter
+
+from basketball_scrapy_project.parsing import PLAYER_SHOOTING_SCRIPT
+from basketball_scrapy_project.rendering import render_request
+from basketball_scrapy_project.signals import page_failed
+from basketball_scrapy_project.spiders.team_shooting_spider import TeamShootingSpider
+from basketball_scrapy_project.store import Store, season_for_date
+
+SHOOTING_LINK_RE = re.compile(r'/players/([a-z]/[a-z0-9]+)/shooting/(\d{4})$')
+
+
+def parse_seasons(value):
+    """'2020-2024' -> ['2020', ..., '2024']; '2019,2022' -> ['2019', '2022']"""
+    seasons = set()
+    for part in str(value).split(','):
+        part = part.strip()
+        if '-' in part:
+            start, end = (int(bound) for bound in part.split('-', 1))
+            seasons.update(str(season) for season in range(start, end + 1))
+        elif part:
+            seasons.add(str(int(part)))
+    return sorted(seasons)
+
+
+def normalize_player_id(value):
+    """'curryst01' ou 'c/curryst01' -> 'c/curryst01' (format des player_id en base)"""
+    value = value.strip().lower().strip('/')
+    return value if '/' in value else f"{value[0]}/{value}"
+
+
+class SeasonFilter(ItemFilter):
+    """Filtre d'un flux d'export: uniquement les tirs de la saison du flux (option 'season')"""
+
+    def accepts(self, item):
+        return item.get('season') == self.feed_options['season']
+
+
+class PlayerShootingSpider(TeamShootingSpider):
+    """Shot charts de joueurs sur plusieurs saisons
+
+    Chaque joueur (donné par player_id, ou trouvé dans les rosters de team_code sur
+    les saisons demandées) n'est découvert qu'une fois: sa page liste les saisons
+    ayant une page de shooting, qui sont toutes rendues dans la même session de
+    navigateur. Les saisons déjà en base (STORE_PATH) sont sautées, sauf la saison
+    en cours et avec refresh=true.
+    """
+    name = 'player_shooting'
+
+    def __init__(self, player_id=None, team_code=None, seasons=None, season=None, refresh='false',
+                 output_dir=None, *args, **kwargs):
+        # Pas d'appel à TeamShootingSpider.__init__: pas d'équipe ni de saison uniques ici
+        scrapy.Spider.__init__(self, *args, **kwargs)
+
+        if not player_id and not team_code:
+            raise CloseSpider("Un joueur (player_id) ou une équipe (team_code) est requis")
+        seasons = seasons or season
+        if not seasons:
+            raise CloseSpider("Une plage de saisons est requise (ex: '2020-2024')")
+
+        self.seasons = parse_seasons(seasons)
+        self.player_ids = [normalize_player_id(p) for p in player_id.split(',') if p.strip()] if player_id else []
+        self.team_codes = [code.strip().upper() for code in team_code.split(',') if code.strip()] if team_code else []
+        self.team_code = None
+        self.season = None
+        self.refresh = str(refresh).lower() == 'true'
+        self.output_dir = output_dir
+        self.current_season = season_for_date(date.today().isoformat())
+        self.players_seen = set()
+        self.stored = set()
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super(PlayerShootingSpider, cls).from_crawler(crawler, *args, **kwargs)
+        if not spider.refresh:
+            store = Store(crawler.settings.get('STORE_PATH', 'basketball.db'))
+            spider.stored = store.shot_seasons(spider.seasons)
+            store.close()
+        if spider.output_dir:
+            # Un flux par saison: {output_dir}/{saison}/shots_{horodatage}.json
+            feeds = crawler.settings.getdict('FEEDS')
+            for season in spider.seasons:
+                feeds[os.path.join(spider.output_dir, season, 'shots_%(time)s.json')] = {
+                    'format': 'json', 'item_filter': SeasonFilter, 'season': season, 'store_empty': False,
+                }
+            crawler.settings.set('FEEDS', feeds, priority=crawler.settings.getpriority('FEEDS'))
+        return spider
+
+    def start_requests(self):
+        for player_id in self.player_ids:
+            yield from self._player_request(player_id)
+        for team_code in self.team_codes:
+            for season in self.seasons:
+                url = f'{self.base_url}/teams/{team_code}/{season}.html'
+                yield render_request(url, wait_for='#div_roster table', callback=self.parse_roster)
+
+    def _player_request(self, player_id):
+        # Un joueur présent dans plusieurs rosters n'est demandé qu'une fois
+        if player_id in self.players_seen:
+            return
+        self.players_seen.add(player_id)
+        yield scrapy.Request(f'{self.base_url}/players/{player_id}.html', callback=self.parse_player)
+
+    def parse_roster(self, response):
+        """Joueurs du roster d'une équipe pour une saison"""
+        links = response.css('td[data-stat="player"] a::attr(href)').getall()
+        if not links:
+            self.logger.error(f"Aucun joueur trouvé dans le roster de {response.url}")
+            self.crawler.signals.send_catch_log(signal=page_failed, response=response, spider=self, reason='roster_empty')
+            return
+        for href in links:
+            match = re.search(r'/players/([a-z]/[a-z0-9]+)\.html', href)
+            if match:
+                yield from self._player_request(match.group(1))
+
+    def parse_player(self, response):
+        """Saisons du joueur ayant une page de shooting, limitées à la plage demandée"""
+        player_id = re.search(r'/players/([a-z]/[a-z0-9]+)\.html', response.url).group(1)
+        available = set()
+        for href in response.css('a[href*="/shooting/"]::attr(href)').getall():
+            match = SHOOTING_LINK_RE.search(href)
+            if match and match.group(1) == player_id:
+                available.add(match.group(2))
+        if not available:
+            self.logger.warning(f"Aucune page de shooting trouvée pour {player_id}")
+            self.crawler.signals.send_catch_log(signal=page_failed, response=response, spider=self, reason='no_shooting_pages')
+            return
+
+        for season in sorted(available & set(self.seasons)):
+            # La saison en cours n'est jamais complète en base
+            if (player_id, season) in self.stored and season != self.current_season:
+                self.crawler.stats.inc_value('player_shooting/skipped_stored')
+                self.logger.debug(f"{player_id} {season}: déjà en base")
+                continue
+            yield render_request(
+                f"{self.base_url}/players/{player_id}/shooting/{season}",
+                wait_for='#shot-wrapper',
+                script=PLAYER_SHOOTING_SCRIPT,
+                callback=self.parse_player_shooting,
+                meta={'player_url': response.url, 'season': season},
+            )
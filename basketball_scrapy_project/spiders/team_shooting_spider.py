@@ -1,16 +1,12 @@
 import scrapy
 import re
 from basketball_scrapy_project.items import ShotChartData
-from scrapy.loader import ItemLoader
+from basketball_scrapy_project.offload import ParsePool, offload
+from basketball_scrapy_project.parsing import PLAYER_SHOOTING_SCRIPT, parse_player_shooting_page
+from basketball_scrapy_project.rendering import configure_render_settings, render_request
+from basketball_scrapy_project.signals import page_failed
+from basketball_scrapy_project.urls import allow_site_domain, site_base_url
 from scrapy.exceptions import CloseSpider
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from scrapy import signals
-from webdriver_manager.chrome import ChromeDriverManager
 
 class TeamShootingSpider(scrapy.Spider):
     name = 'team_shooting'
@@ -28,105 +24,133 @@ class TeamShootingSpider(scrapy.Spider):
         'DOWNLOADER_MIDDLEWARES': {
             'scrapy.downloadermiddlewares.useragent.UserAgentMiddleware': None,
             'scrapy_user_agents.middlewares.RandomUserAgentMiddleware': 400,
-        }
+        },
+        # Rendu Selenium dans un pool de threads, sans bloquer le reactor
+        'DOWNLOAD_HANDLERS': {
+            'http': 'basketball_scrapy_project.rendering.SeleniumDownloadHandler',
+            'https': 'basketball_scrapy_project.rendering.SeleniumDownloadHandler',
+        },
     }
     
+    @classmethod
+    def update_settings(cls, settings):
+        super(TeamShootingSpider, cls).update_settings(settings)
+        configure_render_settings(settings)
+    
     def __init__(self, team_code=None, season=None, *args, **kwargs):
         super(TeamShootingSpider, self).__init__(*args, **kwargs)
         
         if not team_code:
             raise CloseSpider("Un code d'équipe est requis (ex: 'BOS' pour Boston)")
         
-        self.team_code = team_code.upper()
+        # Plusieurs équipes séparées par des virgules (workers de scraper.py worker)
+        self.team_codes = [code.strip().upper() for code in team_code.split(',') if code.strip()]
+        self.team_code = self.team_codes[0] if len(self.team_codes) == 1 else None
         
         if not season:
             raise CloseSpider("Une saison est requise (ex: '2024' pour 2023-24)")
         
         self.season = season
-        
-        # URL de la page de l'équipe
-        self.start_urls = [f'https://www.basketball-reference.com/teams/{self.team_code}/{self.season}.html']
-        
-        # Initialisation du driver Selenium avec webdriver-manager
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")  # Exécuter en mode headless
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--window-size=1920,1080")  # Définir une taille d'écran suffisante
-        
-        # Ajouter un user-agent pour éviter les détections de bot
-        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36")
-        
-        # Initialiser le driver avec webdriver-manager pour gérer automatiquement les versions du pilote
-        self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-        self.driver.implicitly_wait(5)  # Attente implicite de 5 secondes
-        
+    
     @classmethod
     def from_crawler(cls, crawler, *args, **kwargs):
         spider = super(TeamShootingSpider, cls).from_crawler(crawler, *args, **kwargs)
-        crawler.signals.connect(spider.spider_closed, signal=signals.spider_closed)
+        # Site réel ou serveur de rejeu local (setting SITE_BASE_URL)
+        spider.base_url = site_base_url(crawler.settings)
+        allow_site_domain(spider, spider.base_url)
+        # Pool de processus pour le parsing des pages de shooting (setting PARSE_PROCESSES)
+        spider.parse_pool = ParsePool.from_crawler(crawler)
         return spider
-        
-    def spider_closed(self, spider):
-        spider.logger.info('Spider fermé: %s', spider.name)
-        # Fermer le navigateur Selenium
-        self.driver.quit()
-        
+    
+    def start_requests(self):
+        for team_code in self.team_codes:
+            # URL de la page de l'équipe
+            url = f'{self.base_url}/teams/{team_code}/{self.season}.html'
+            # Le tableau du roster est rendu par le navigateur
+            yield render_request(url, wait_for='#div_roster table', callback=self.parse)
+    
     def parse(self, response):
         """Parse la page de l'équipe pour extraire les liens vers les pages de shooting des joueurs"""
         self.logger.info(f"Parsing de la page de l'équipe: {response.url}")
         
-        # Utiliser Selenium pour charger la page
-        self.driver.get(response.url)
-        
-        # Attendre que la page soit chargée
-        try:
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, '#div_roster table'))
-            )
-        except Exception as e:
-            self.logger.error(f"Erreur lors du chargement de la page: {e}")
-            # Sauvegardons le contenu HTML pour déboguer
-            with open(f"debug_roster_{self.team_code}.html", 'w', encoding='utf-8') as f:
-                f.write(self.driver.page_source)
-            self.logger.info(f"HTML enregistré dans debug_roster_{self.team_code}.html pour débogage")
-            return
-        
         # Extraire les liens des joueurs
-        player_links = []
-        try:
-            player_elements = self.driver.find_elements(By.CSS_SELECTOR, 'td[data-stat="player"] a')
-            for player_element in player_elements:
-                player_links.append(player_element.get_attribute('href'))
-        except Exception as e:
-            self.logger.error(f"Erreur lors de l'extraction des liens des joueurs: {e}")
-            # Sauvegardons le contenu HTML pour déboguer
-            with open(f"debug_roster_{self.team_code}.html", 'w', encoding='utf-8') as f:
-                f.write(self.driver.page_source)
-            self.logger.info(f"HTML enregistré dans debug_roster_{self.team_code}.html pour débogage")
+        player_links = [response.urljoin(href) for href in response.css('td[data-stat="player"] a::attr(href)').getall()]
+        if not player_links:
+            self.logger.error(f"Aucun joueur trouvé dans le roster de {response.url}")
+            # Conserver la page pour déboguer (capture compressée et dédupliquée)
+            self.crawler.signals.send_catch_log(signal=page_failed, response=response, spider=self, reason='roster_empty')
             return
         
+        # Lire les tentatives de tir de la saison depuis les tableaux statiques
+        season_fga = self._extract_season_fga(response)
+        # Les arguments du spider (-a min_fga=... -a low_fga_action=...) priment sur les settings
+        min_fga = int(getattr(self, 'min_fga', self.settings.getint('SHOOTING_MIN_FGA', 1)))
+        low_fga_action = getattr(self, 'low_fga_action', self.settings.get('SHOOTING_LOW_FGA_ACTION', 'skip'))
+        
         for player_link in player_links:
             # Extraire l'ID du joueur du lien
             player_id = player_link.split('/')[-1].replace('.html', '')
+            
+            # Éviter le rendu Selenium des joueurs sans (ou avec peu de) tentatives
+            priority = 0
+            fga = season_fga.get(player_id)
+            if fga is not None and fga < min_fga:
+                if low_fga_action == 'deprioritize':
+                    self.crawler.stats.inc_value('team_shooting/deprioritized_low_fga')
+                    self.logger.debug(f"{player_id}: {fga} FGA (< {min_fga}), rendu reporté en fin de file")
+                    priority = -10
+                else:
+                    self.crawler.stats.inc_value('team_shooting/skipped_low_fga')
+                    self.logger.debug(f"{player_id}: {fga} FGA (< {min_fga}), rendu ignoré")
+                    continue
+            
             # Construire l'URL de la page de shooting du joueur sans .html
-            shooting_url = f"https://www.basketball-reference.com/players/{player_id[0]}/{player_id}/shooting/{self.season}"
-            self.logger.info(f"Visite de la page de shooting: {shooting_url}")
+            shooting_url = f"{self.base_url}/players/{player_id[0]}/{player_id}/shooting/{self.season}"
+            self.logger.debug(f"Visite de la page de shooting: {shooting_url}")
             
-            yield scrapy.Request(
-                url=shooting_url,
+            # Le navigateur ne renvoie que le nom du joueur et les tooltips du shot chart
+            yield render_request(
+                shooting_url,
+                wait_for='#shot-wrapper',
+                script=PLAYER_SHOOTING_SCRIPT,
                 callback=self.parse_player_shooting,
                 meta={'player_url': player_link},
-                headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-                    'Accept-Language': 'fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7',
-                    'Referer': response.url
-                }
+                priority=priority,
             )
     
-    def parse_player_shooting(self, response):
+    def _extract_season_fga(self, response):
+        """Retourne {player_id: FGA de la saison} à partir des tableaux totals/per_game de la page statique"""
+        # Certains tableaux sont livrés dans des commentaires HTML et rendus par JavaScript
+        selectors = [response]
+        for comment in response.xpath('//comment()').getall():
+            if 'totals' in comment or 'per_game' in comment:
+                selectors.append(scrapy.Selector(text=comment[4:-3]))
+        
+        season_fga = {}
+        for selector in selectors:
+            for row in selector.css('table[id^="totals"] tbody tr'):
+                player_id = row.css('td[data-append-csv]::attr(data-append-csv)').get()
+                fga = row.css('td[data-stat="fga"]::text').get()
+                if player_id and fga and fga.strip().isdigit():
+                    season_fga[player_id] = int(fga.strip())
+        
+        # À défaut de totaux, reconstruire les FGA depuis les moyennes par match
+        for selector in selectors:
+            for row in selector.css('table[id^="per_game"] tbody tr'):
+                player_id = row.css('td[data-append-csv]::attr(data-append-csv)').get()
+                if not player_id or player_id in season_fga:
+                    continue
+                games = row.css('td[data-stat="g"]::text, td[data-stat="games"]::text').get()
+                fga_per_g = row.css('td[data-stat="fga_per_g"]::text').get()
+                try:
+                    season_fga[player_id] = round(int(games) * float(fga_per_g))
+                except (TypeError, ValueError):
+                    continue
+        
+        self.logger.info(f"FGA de la saison trouvés pour {len(season_fga)} joueurs")
+        return season_fga
+    
+    async def parse_player_shooting(self, response):
         """Parse la page de shooting d'un joueur"""
         player_url = response.meta['player_url']
         
@@ -138,138 +162,39 @@ class TeamShootingSpider(scrapy.Spider):
             
         player_id = player_id_match.group(1)
         
-        # Utiliser Selenium pour charger la page et rendre le JavaScript
-        self.driver.get(response.url)
-        
-        # Attendre que la page soit chargée
-        try:
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 'ul.hoversmooth'))
-            )
-        except Exception as e:
-            self.logger.error(f"Erreur lors du chargement de la page: {e}")
-        
-        # Extraire le nom du joueur avec Selenium
-        try:
-            player_name_element = self.driver.find_element(By.CSS_SELECTOR, 'ul.hoversmooth li.index:first-child a u')
-            player_name = player_name_element.text
-        except:
-            try:
-                player_name_element = self.driver.find_element(By.CSS_SELECTOR, 'ul.hoversmooth li.index:first-child a')
-                player_name = player_name_element.text
-            except:
-                self.logger.warning(f"Nom du joueur non trouvé pour {player_id}")
-                # Sauvegardons le contenu HTML pour déboguer si besoin
-                safe_player_id = player_id.replace('/', '_')
-                with open(f"debug_player_{safe_player_id}.html", 'w', encoding='utf-8') as f:
-                    f.write(self.driver.page_source)
-                self.logger.info(f"HTML enregistré dans debug_player_{safe_player_id}.html pour débogage")
-                return
-        
-        player_name = player_name.strip()
-        self.logger.info(f"Extraction des données pour le joueur: {player_name}")
+        # Tooltips et items extraits dans un processus du pool de parsing si PARSE_PROCESSES est défini
+        is_json = b'json' in response.headers.get('Content-Type', b'')
+        season = response.meta.get('season', self.season)
+        page = await offload(
+            self.parse_pool, parse_player_shooting_page, response.text, is_json, response.url, player_id, season,
+        )
         
-        # Attendre que le shot chart soit chargé
-        try:
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, '#shot-wrapper'))
-            )
-        except Exception as e:
-            self.logger.warning(f"Shot chart non trouvé pour {player_name}: {e}")
-            # Sauvegardons le contenu HTML complet pour déboguer
-            safe_player_id = player_id.replace('/', '_')
-            with open(f"debug_shot_chart_{safe_player_id}.html", 'w', encoding='utf-8') as f:
-                f.write(self.driver.page_source)
-            self.logger.info(f"HTML du shot chart enregistré dans debug_shot_chart_{safe_player_id}.html pour débogage")
+        player_name = page['player_name']
+        if not player_name:
+            self.logger.warning(f"Nom du joueur non trouvé pour {player_id}")
             return
         
-        # Au lieu d'itérer sur les éléments directement, récupérer tout le HTML et extraire les données
-        html_source = self.driver.page_source
-        
-        # Créer un objet Selector de Scrapy à partir du HTML
-        selector = scrapy.Selector(text=html_source)
+        self.logger.debug(f"Extraction des données pour le joueur: {player_name}")
         
-        # Extraire les éléments de tir avec le sélecteur Scrapy
-        shot_elements = selector.css('#shot-wrapper div.tooltip')
+        if page['tooltips'] is None:
+            self.logger.warning(f"Shot chart non trouvé pour {player_name}")
+            return
         
-        if not shot_elements:
+        if not page['tooltips']:
             self.logger.warning(f"Aucun élément de tir trouvé pour {player_name}")
-            # Sauvegardons le contenu HTML complet pour déboguer
-            safe_player_id = player_id.replace('/', '_')
-            with open(f"debug_shot_chart_{safe_player_id}.html", 'w', encoding='utf-8') as f:
-                f.write(html_source)
-            self.logger.info(f"HTML du shot chart enregistré dans debug_shot_chart_{safe_player_id}.html pour débogage")
+            if page['shot_wrapper_html']:
+                # Conserver uniquement le fragment du shot chart pour déboguer
+                self.crawler.signals.send_catch_log(
+                    signal=page_failed, response=response, spider=self,
+                    reason='shot_chart_empty', body=page['shot_wrapper_html'],
+                )
             return
         
-        self.logger.info(f"Trouvé {len(shot_elements)} tirs pour {player_name}")
+        self.logger.info(f"Trouvé {page['tooltips']} tirs pour {player_name}")
         
-        for shot_element in shot_elements:
-            loader = ItemLoader(item=ShotChartData())
-            
-            # Données de base du joueur et de la saison
-            loader.add_value('player_id', player_id)
-            loader.add_value('player_name', player_name)
-            loader.add_value('season', self.season)
-            loader.add_value('source_url', response.url)
-            
-            try:
-                # Extraire les coordonnées x et y à partir du style CSS
-                style = shot_element.attrib.get('style', '')
-                x_match = re.search(r'left:(\d+)px', style)
-                y_match = re.search(r'top:(\d+)px', style)
-                
-                if x_match and y_match:
-                    x_coordinate = x_match.group(1)
-                    y_coordinate = y_match.group(1)
-                    loader.add_value('x_coordinate', x_coordinate)
-                    loader.add_value('y_coordinate', y_coordinate)
-                
-                # Déterminer si le tir est réussi en fonction de la classe
-                shot_class = shot_element.attrib.get('class', '')
-                is_make = 'make' in shot_class
-                loader.add_value('is_made', str(is_make))
-                
-                # Extraire les détails du tir à partir de l'attribut tip
-                tip_text = shot_element.attrib.get('tip', '')
-                if tip_text:
-                    # Extraire la date et les équipes
-                    match_info = re.search(r'^(.+?),\s+(.+?)\s+(?:vs|at)\s+(.+?)(?:<br>|$)', tip_text)
-                    if match_info:
-                        game_date = match_info.group(1).strip()
-                        team1 = match_info.group(2).strip()
-                        team2 = match_info.group(3).strip()
-                        teams = f"{team1} vs {team2}"
-                        
-                        loader.add_value('game_date', game_date)
-                        loader.add_value('teams', teams)
-                    
-                    # Extraire le quart-temps et le temps restant
-                    period_info = re.search(r'<br>(\d+\w+)\s+(?:Qtr|OT),\s+(\d+:\d+)\s+remaining', tip_text)
-                    if period_info:
-                        quarter = period_info.group(1)
-                        time_remaining = period_info.group(2)
-                        
-                        loader.add_value('quarter', quarter)
-                        loader.add_value('time_remaining', time_remaining)
-                    
-                    # Extraire le type de tir et la distance
-                    shot_info = re.search(r'<br>(Made|Missed)\s+(\d+)-pointer\s+from\s+(\d+)\s+ft', tip_text)
-                    if shot_info:
-                        shot_result = shot_info.group(1)
-                        shot_type = f"{shot_info.group(2)}-pointer"
-                        shot_distance = shot_info.group(3)
-                        
-                        loader.add_value('shot_type', shot_type)
-                        loader.add_value('shot_distance', shot_distance)
-                    
-                    # Extraire la description du score
-                    score_info = re.search(r'<br>(.+?now\s+.+?\s+.+?-.+?)(?:<br>|$)', tip_text)
-                    if score_info:
-                        score_description = score_info.group(1).strip()
-                        loader.add_value('score_description', score_description)
-                
-                yield loader.load_item()
-            except Exception as e:
-                self.logger.error(f"Erreur lors de l'extraction des données d'un tir: {e}")
+        for error in page['errors']:
+            self.logger.error(f"Erreur lors de l'extraction des données d'un tir: {error}")
+        for shot in page['shots']:
+            yield ShotChartData(shot)
         
-        self.logger.info(f"Terminé le scraping des tirs pour {player_name}")
\ No newline at end of file
+        self.logger.debug(f"Terminé le scraping des tirs pour {player_name}")
@@ -0,0 +1,292 @@
+# Stockage local des données extraites dans une base SQLite
+#
+# Les tirs (ShotChartData) et les statistiques clutch (PlayerClutchStats) sont
+# normalisés (dates ISO, entiers, booléens) puis insérés par lots avec un upsert
+# sur leur clé naturelle: relancer un crawl met à jour les lignes existantes au
+# lieu de les dupliquer. Les index permettent de filtrer par joueur, équipe,
+# saison et date sans relire les fichiers JSON/CSV complets.
+
+import re
+import sqlite3
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shots (
+    player_id TEXT NOT NULL,
+    player_name TEXT,
+    team TEXT,
+    opponent TEXT,
+    season TEXT,
+    game_date TEXT NOT NULL,
+    quarter TEXT NOT NULL,
+    time_remaining TEXT NOT NULL,
+    shot_type TEXT,
+    shot_distance INTEGER,
+    is_made INTEGER,
+    x_coordinate INTEGER NOT NULL,
+    y_coordinate INTEGER NOT NULL,
+    score_description TEXT,
+    source_url TEXT,
+    x_feet REAL,
+    y_feet REAL,
+    zone TEXT,
+    period INTEGER,
+    elapsed_seconds INTEGER,
+    margin_before INTEGER,
+    margin_after INTEGER,
+    is_clutch INTEGER,
+    UNIQUE (player_id, game_date, quarter, time_remaining, x_coordinate, y_coordinate)
+);
+CREATE INDEX IF NOT EXISTS idx_shots_player ON shots (player_id);
+CREATE INDEX IF NOT EXISTS idx_shots_team ON shots (team);
+CREATE INDEX IF NOT EXISTS idx_shots_season ON shots (season);
+CREATE INDEX IF NOT EXISTS idx_shots_game_date ON shots (game_date);
+
+-- Table des joueurs (quelques centaines de lignes) pour résoudre un nom sans parcourir shots
+CREATE TABLE IF NOT EXISTS players (
+    player_id TEXT PRIMARY KEY,
+    player_name TEXT,
+    team TEXT
+);
+
+CREATE TABLE IF NOT EXISTS clutch_stats (
+    player_name TEXT NOT NULL,
+    team TEXT,
+    season TEXT,
+    game_id TEXT NOT NULL,
+    match_date TEXT,
+    quarter TEXT NOT NULL,
+    minutes TEXT,
+    points INTEGER,
+    field_goals INTEGER,
+    field_goal_attempts INTEGER,
+    free_throws INTEGER,
+    free_throw_attempts INTEGER,
+    three_point_field_goals INTEGER,
+    three_point_field_goal_attempts INTEGER,
+    rebounds INTEGER,
+    assists INTEGER,
+    steals INTEGER,
+    blocks INTEGER,
+    turnovers INTEGER,
+    personal_fouls INTEGER,
+    source_url TEXT,
+    UNIQUE (player_name, game_id, quarter)
+);
+CREATE INDEX IF NOT EXISTS idx_clutch_player ON clutch_stats (player_name);
+CREATE INDEX IF NOT EXISTS idx_clutch_team ON clutch_stats (team);
+CREATE INDEX IF NOT EXISTS idx_clutch_season ON clutch_stats (season);
+CREATE INDEX IF NOT EXISTS idx_clutch_match_date ON clutch_stats (match_date);
+
+-- État du classement clutch incrémental (leaderboard.py): matchs déjà agrégés et totaux par joueur
+CREATE TABLE IF NOT EXISTS leaderboard_games (
+    game_id TEXT PRIMARY KEY,
+    processed_at TEXT,
+    row_count INTEGER,
+    max_rowid INTEGER,
+    checksum INTEGER
+);
+CREATE TABLE IF NOT EXISTS leaderboard_totals (
+    player_name TEXT NOT NULL,
+    season TEXT NOT NULL,
+    team TEXT,
+    last_match_date TEXT,
+    matches INTEGER,
+    minutes REAL,
+    points INTEGER,
+    field_goals INTEGER,
+    field_goal_attempts INTEGER,
+    free_throws INTEGER,
+    free_throw_attempts INTEGER,
+    three_point_field_goals INTEGER,
+    three_point_field_goal_attempts INTEGER,
+    rebounds INTEGER,
+    assists INTEGER,
+    steals INTEGER,
+    blocks INTEGER,
+    turnovers INTEGER,
+    personal_fouls INTEGER,
+    clutch_score_sum REAL,
+    PRIMARY KEY (player_name, season)
+);
+"""
+
+# Colonnes ajoutées après la création initiale des tables: {table: {colonne: type}}
+MIGRATIONS = {
+    'players': {'team': 'TEXT'},
+    'leaderboard_games': {'row_count': 'INTEGER', 'max_rowid': 'INTEGER', 'checksum': 'INTEGER'},
+    'shots': {
+        'x_feet': 'REAL', 'y_feet': 'REAL', 'zone': 'TEXT', 'period': 'INTEGER', 'elapsed_seconds': 'INTEGER',
+        'margin_before': 'INTEGER', 'margin_after': 'INTEGER', 'is_clutch': 'INTEGER',
+    },
+}
+
+SHOT_COLUMNS = [
+    'player_id', 'player_name', 'team', 'opponent', 'season', 'game_date', 'quarter',
+    'time_remaining', 'shot_type', 'shot_distance', 'is_made', 'x_coordinate',
+    'y_coordinate', 'score_description', 'source_url',
+    # Champs dérivés (enrich.py), None tant que le lot n'a pas été enrichi
+    'x_feet', 'y_feet', 'zone', 'period', 'elapsed_seconds', 'margin_before', 'margin_after', 'is_clutch',
+]
+SHOT_KEY = ['player_id', 'game_date', 'quarter', 'time_remaining', 'x_coordinate', 'y_coordinate']
+
+CLUTCH_STAT_FIELDS = [
+    'points', 'field_goals', 'field_goal_attempts', 'free_throws', 'free_throw_attempts',
+    'three_point_field_goals', 'three_point_field_goal_attempts', 'rebounds', 'assists',
+    'steals', 'blocks', 'turnovers', 'personal_fouls',
+]
+CLUTCH_COLUMNS = [
+    'player_name', 'team', 'season', 'game_id', 'match_date', 'quarter', 'minutes',
+] + CLUTCH_STAT_FIELDS + ['source_url']
+CLUTCH_KEY = ['player_name', 'game_id', 'quarter']
+
+# Le tooltip produit "Oct 25" dans game_date et "2023, ATL vs CHO" dans teams
+SHOT_GAME_RE = re.compile(r'^(\w{3})\s+(\d{1,2}),\s*(\d{4}),\s*(\w+)\s+vs\s+(\w+)')
+
+
+def to_int(value):
+    """Convertit une valeur extraite en entier (None si vide ou invalide)"""
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def season_for_date(iso_date):
+    """Retourne la saison (ex: '2024' pour 2023-24) d'une date ISO: la saison commence en octobre"""
+    year, month = int(iso_date[:4]), int(iso_date[5:7])
+    return str(year + 1 if month >= 10 else year)
+
+
+def normalize_shot(item):
+    """Transforme un ShotChartData en ligne de la table shots (None si la clé naturelle est incomplète)"""
+    row = {column: item.get(column) for column in SHOT_COLUMNS}
+
+    # Le lien du menu du joueur contient "Overview" après son nom
+    if row['player_name'] and row['player_name'].endswith(' Overview'):
+        row['player_name'] = row['player_name'][:-len(' Overview')]
+
+    match = SHOT_GAME_RE.match(f"{item.get('game_date', '')}, {item.get('teams', '')}")
+    if not match:
+        return None
+    month, day, year, team, opponent = match.groups()
+    row['game_date'] = datetime.strptime(f"{month} {day} {year}", '%b %d %Y').date().isoformat()
+    row['team'] = team
+    row['opponent'] = opponent
+
+    row['shot_distance'] = to_int(item.get('shot_distance'))
+    row['x_coordinate'] = to_int(item.get('x_coordinate'))
+    row['y_coordinate'] = to_int(item.get('y_coordinate'))
+    row['is_made'] = 1 if item.get('is_made') == 'True' else 0
+
+    if any(row[column] is None for column in SHOT_KEY):
+        return None
+    return row
+
+
+def normalize_clutch_stats(item):
+    """Transforme un PlayerClutchStats en ligne de la table clutch_stats"""
+    row = {column: item.get(column) for column in CLUTCH_COLUMNS}
+
+    # Identifiant du match tiré de l'URL: /boxscores/202310240DEN.html
+    source_url = item.get('source_url') or ''
+    row['game_id'] = source_url.rstrip('/').split('/')[-1].replace('.html', '') or None
+
+    match_date = item.get('match_date') or ''
+    if len(match_date) == 8 and match_date.isdigit():
+        row['match_date'] = f"{match_date[:4]}-{match_date[4:6]}-{match_date[6:]}"
+        row['season'] = season_for_date(row['match_date'])
+
+    for field in CLUTCH_STAT_FIELDS:
+        row[field] = to_int(item.get(field))
+
+    if any(row[column] is None for column in CLUTCH_KEY):
+        return None
+    return row
+
+
+def _upsert_sql(table, columns, key):
+    updates = ', '.join(f"{column} = excluded.{column}" for column in columns if column not in key)
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(':' + column for column in columns)}) "
+        f"ON CONFLICT ({', '.join(key)}) DO UPDATE SET {updates}"
+    )
+
+
+class Store:
+    """Base SQLite des tirs et statistiques clutch"""
+
+    def __init__(self, path, check_same_thread=True):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=check_same_thread)
+        self.connection.row_factory = sqlite3.Row
+        # WAL: les lectures (requêtes, API) ne bloquent pas l'écriture d'un crawl en cours
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Ajoute aux tables existantes les colonnes apparues depuis leur création"""
+        for table, columns in MIGRATIONS.items():
+            existing = {row['name'] for row in self.connection.execute(f"PRAGMA table_info({table})")}
+            for column, column_type in columns.items():
+                if column not in existing:
+                    self.connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+        self.connection.commit()
+
+    def data_version(self):
+        """Change dès qu'une autre connexion (un crawl par exemple) a modifié la base"""
+        return self.connection.execute('PRAGMA data_version').fetchone()[0]
+
+    def upsert_shots(self, rows):
+        """Insère ou met à jour un lot de tirs dans une seule transaction"""
+        players = {row['player_id']: (row['player_name'], row['team']) for row in rows}
+        with self.connection:
+            self.connection.executemany(_upsert_sql('shots', SHOT_COLUMNS, SHOT_KEY), rows)
+            self.connection.executemany(
+                "INSERT INTO players (player_id, player_name, team) VALUES (?, ?, ?) "
+                "ON CONFLICT (player_id) DO UPDATE SET player_name = excluded.player_name, team = excluded.team",
+                [(player_id, name, team) for player_id, (name, team) in players.items()],
+            )
+        return len(rows)
+
+    def upsert_clutch_stats(self, rows):
+        """Insère ou met à jour un lot de statistiques clutch dans une seule transaction"""
+        with self.connection:
+            self.connection.executemany(_upsert_sql('clutch_stats', CLUTCH_COLUMNS, CLUTCH_KEY), rows)
+        return len(rows)
+
+    def shot_seasons(self, seasons):
+        """Couples (player_id, saison) ayant déjà des tirs en base, pour les saisons données"""
+        placeholders = ', '.join('?' * len(seasons))
+        rows = self.connection.execute(
+            f"SELECT DISTINCT player_id, season FROM shots WHERE season IN ({placeholders})", list(seasons),
+        )
+        return {(row['player_id'], row['season']) for row in rows}
+
+    def last_match_date(self, season):
+        """Date ISO du dernier match en base pour une saison (None si aucun)"""
+        row = self.connection.execute(
+            "SELECT MAX(match_date) AS match_date FROM clutch_stats WHERE season = ?", (season,),
+        ).fetchone()
+        return row['match_date']
+
+    def clutch_game_ids(self, season, since):
+        """Matchs d'une saison déjà en base, joués depuis since (date ISO)"""
+        rows = self.connection.execute(
+            "SELECT DISTINCT game_id FROM clutch_stats WHERE season = ? AND match_date >= ?", (season, since),
+        )
+        return {row['game_id'] for row in rows}
+
+    def execute(self, sql, params=()):
+        """Exécute une requête en lecture et retourne toutes les lignes"""
+        return self.connection.execute(sql, params).fetchall()
+
+    def explain(self, sql, params=()):
+        """Retourne le plan d'exécution SQLite (index utilisés) d'une requête"""
+        return [row['detail'] for row in self.connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+    def close(self):
+        self.connection.close()
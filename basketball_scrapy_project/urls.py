@@ -0,0 +1,22 @@
+# Adresse du site scrapé
+#
+# Les spiders construisent leurs URL à partir du setting SITE_BASE_URL, ce qui permet
+# de les diriger vers le serveur de rejeu local (replay.py) pour les benchmarks:
+#     scrapy crawl boxscore -s SITE_BASE_URL=http://127.0.0.1:8800
+
+from urllib.parse import urlsplit
+
+DEFAULT_BASE_URL = 'https://www.basketball-reference.com'
+
+
+def site_base_url(settings):
+    """URL de base du site (sans / final)"""
+    return (settings.get('SITE_BASE_URL') or DEFAULT_BASE_URL).rstrip('/')
+
+
+def allow_site_domain(spider, base_url):
+    """Ajoute l'hôte de base_url aux allowed_domains du spider (filtre offsite de Scrapy)"""
+    host = urlsplit(base_url).hostname
+    allowed = list(getattr(spider, 'allowed_domains', None) or [])
+    if host and not any(host == domain or host.endswith(f'.{domain}') for domain in allowed):
+        spider.allowed_domains = allowed + [host]
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""
+Mesure le débit d'un crawl complet contre le serveur de rejeu local, pour plusieurs
+configurations de concurrence et de régulation (DOWNLOAD_DELAY, AutoThrottle).
+
+Chaque configuration lance `scrapy crawl` (les settings du projet, dont les middlewares
+de retry et de 429, s'appliquent) avec SITE_BASE_URL pointant sur le serveur, qui rejoue
+les fixtures et peut injecter latence, rafales de 429 et erreurs 5xx. Rapport: temps
+total, durée du crawl, requêtes/s et items/s, 429 et retries; résultats en JSON.
+
+Usage: python benchmarks/bench_crawl.py [--spider=boxscore] [--configs=sequential,concurrent-8]
+                                        [--latency=0.05] [--jitter=0.05] [--error-rate=0.02]
+                                        [--burst-every=100] [--burst-size=3]
+                                        [--set KEY=VALUE ...] [--output=benchmarks/results/crawl.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_DIR)
+
+from basketball_scrapy_project.replay import FaultInjector, create_replay_server
+
+FIXTURES_DIR = os.path.join(SCRIPT_DIR, 'fixtures')
+
+SPIDERS = {
+    'boxscore': ['-a', 'full_season=True'],
+    'team_shooting': ['-a', 'team_code=GSW', '-a', 'season=2024'],
+}
+
+# Configurations comparées (settings Scrapy appliqués en plus de ceux du projet)
+CONFIGS = {
+    'sequential': {
+        'CONCURRENT_REQUESTS': 1, 'CONCURRENT_REQUESTS_PER_DOMAIN': 1,
+        'DOWNLOAD_DELAY': 0, 'AUTOTHROTTLE_ENABLED': False,
+    },
+    'delay-0.1': {
+        'CONCURRENT_REQUESTS': 1, 'CONCURRENT_REQUESTS_PER_DOMAIN': 1,
+        'DOWNLOAD_DELAY': 0.1, 'AUTOTHROTTLE_ENABLED': False,
+    },
+    'concurrent-4': {
+        'CONCURRENT_REQUESTS': 4, 'CONCURRENT_REQUESTS_PER_DOMAIN': 4,
+        'DOWNLOAD_DELAY': 0, 'AUTOTHROTTLE_ENABLED': False,
+    },
+    'concurrent-16': {
+        'CONCURRENT_REQUESTS': 16, 'CONCURRENT_REQUESTS_PER_DOMAIN': 16,
+        'DOWNLOAD_DELAY': 0, 'AUTOTHROTTLE_ENABLED': False,
+    },
+    'autothrottle': {
+        'CONCURRENT_REQUESTS': 16, 'CONCURRENT_REQUESTS_PER_DOMAIN': 16, 'DOWNLOAD_DELAY': 0,
+        'AUTOTHROTTLE_ENABLED': True, 'AUTOTHROTTLE_START_DELAY': 0.1, 'AUTOTHROTTLE_MAX_DELAY': 5,
+        'AUTOTHROTTLE_TARGET_CONCURRENCY': 4,
+    },
+}
+
+# Settings communs: pas de cache HTTP, pas de navigateur (base SQLite, métriques et
+# captures dans un dossier temporaire, voir run_crawl)
+COMMON_SETTINGS = {
+    'HTTPCACHE_ENABLED': False,
+    'RENDER_ENABLED': False,
+    'LOG_LEVEL': 'WARNING',
+}
+
+
+def run_crawl(spider, settings, timeout):
+    """Lance un crawl; retourne (temps total, métriques de CrawlMetrics, code de sortie)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics_file = os.path.join(tmp, 'metrics.json')
+        # Tout ce que le crawl écrit reste dans le dossier temporaire (pas de debug/,
+        # traces/ ou profiles/ laissés dans le projet à chaque configuration)
+        settings = dict(
+            settings,
+            METRICS_FILE=metrics_file,
+            STORE_PATH=os.path.join(tmp, 'bench.db'),
+            FRONTIER_PATH=os.path.join(tmp, 'frontier.db'),
+            DEBUG_CAPTURE_DIR=os.path.join(tmp, 'debug', '{spider}_{time}'),
+            TRACE_FILE=os.path.join(tmp, 'traces', '{spider}_{time}.json'),
+            PROFILE_DIR=os.path.join(tmp, 'profiles', '{spider}_{time}'),
+        )
+        command = [sys.executable, '-m', 'scrapy', 'crawl', spider] + SPIDERS[spider]
+        for key, value in settings.items():
+            command += ['-s', f"{key}={value}"]
+        start = time.perf_counter()
+        result = subprocess.run(command, cwd=PROJECT_DIR, capture_output=True, text=True, timeout=timeout)
+        wall = time.perf_counter() - start
+        if result.returncode != 0 or not os.path.exists(metrics_file):
+            sys.stderr.write(result.stderr[-3000:])
+            return wall, None, result.returncode
+        with open(metrics_file) as f:
+            return wall, json.load(f), result.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--spider', choices=sorted(SPIDERS), default='boxscore')
+    parser.add_argument('--configs', default=','.join(CONFIGS), help='Configurations, séparées par des virgules')
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--burst-every', type=int, default=0)
+    parser.add_argument('--burst-size', type=int, default=3)
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help='Setting Scrapy appliqué à toutes les configurations')
+    parser.add_argument('--timeout', type=int, default=600, help='Durée maximale d\'un crawl (secondes)')
+    parser.add_argument('--output', default=os.path.join(SCRIPT_DIR, 'results', 'crawl.json'))
+    args = parser.parse_args()
+
+    overrides = dict(item.split('=', 1) for item in args.set)
+    server = create_replay_server(port=0, fixtures_dir=FIXTURES_DIR)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    results = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'spider': args.spider,
+        'faults': {
+            'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate,
+            'burst_every': args.burst_every, 'burst_size': args.burst_size, 'retry_after': args.retry_after,
+        },
+        'configs': {},
+    }
+    print(f"Serveur de rejeu sur {server.base_url}, spider {args.spider}")
+    print(f"{'Configuration':<16}{'Total (s)':>10}{'Crawl (s)':>10}{'Requêtes':>10}{'Req/s':>8}{'Items/s':>9}{'429':>6}{'Retries':>9}")
+    try:
+        for name in args.configs.split(','):
+            # Mêmes pannes pour chaque configuration: nouveau tirage avec la même graine
+            server.faults = FaultInjector(
+                latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                burst_every=args.burst_every, burst_size=args.burst_size,
+                retry_after=args.retry_after, seed=args.seed,
+            )
+            server.stats.clear()
+            settings = dict(COMMON_SETTINGS, **CONFIGS[name], **overrides, SITE_BASE_URL=server.base_url)
+            wall, metrics, returncode = run_crawl(args.spider, settings, args.timeout)
+            if metrics is None:
+                print(f"{name:<16}échec du crawl (code {returncode})")
+                continue
+            elapsed = metrics['elapsed_seconds'] or wall
+            counters = metrics['counters']
+            requests = server.stats['requests']
+            result = {
+                'settings': settings,
+                'wall_seconds': round(wall, 2),
+                'crawl_seconds': elapsed,
+                'requests': requests,
+                'requests_per_second': round(requests / elapsed, 2),
+                'items': counters.get('items', 0),
+                'items_per_second': metrics['items_per_second'],
+                'status_429': server.stats['status_429'],
+                'status_5xx': sum(count for key, count in server.stats.items() if key.startswith('status_5')),
+                'retries': counters.get('retry_count', 0),
+            }
+            results['configs'][name] = result
+            print(
+                f"{name:<16}{wall:>10.1f}{elapsed:>10.1f}{requests:>10}{result['requests_per_second']:>8.1f}"
+                f"{result['items_per_second']:>9.1f}{result['status_429']:>6}{result['retries']:>9}"
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Résultats écrits dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
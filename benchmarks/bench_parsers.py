@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+"""
+Mesure hors ligne les callbacks des spiders sur des pages enregistrées (benchmarks/fixtures).
+
+Pour chaque cas: pages/s, items/s et pic mémoire (tracemalloc). Les résultats sont
+écrits en JSON et comparés à une référence (benchmarks/baseline_parsers.json); le
+code de sortie vaut 1 si un cas est plus lent que la référence au-delà de la tolérance.
+Avec --processes, mesure aussi le débit des fonctions de page dans un pool de
+processus (setting PARSE_PROCESSES) pour chaque nombre de processus.
+
+Usage: python benchmarks/bench_parsers.py [--repeat=20] [--only=parse_box_score]
+                                          [--output=benchmarks/results/parsers.json]
+                                          [--baseline=benchmarks/baseline_parsers.json]
+                                          [--tolerance=0.3] [--save-baseline] [--processes=1,2,4]
+"""
+import argparse
+import concurrent.futures
+import gc
+import inspect
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+from scrapy import Request, Selector
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from basketball_scrapy_project.parsing import (
+    extract_shot_tooltips, parse_box_score_page, parse_player_shooting_page, parse_shot_tooltip,
+)
+from basketball_scrapy_project.spiders.boxscore_spider import BoxScoreSpider
+from basketball_scrapy_project.spiders.team_shooting_spider import TeamShootingSpider
+
+FIXTURES_DIR = os.path.join(SCRIPT_DIR, 'fixtures')
+BASE_URL = 'https://www.basketball-reference.com'
+
+# nom: (spider, arguments du spider, callback, fixture, URL, meta, (items, requêtes) attendus par page)
+SPIDER_CASES = {
+    'parse_month_page': (
+        BoxScoreSpider, {'full_season': 'True'}, 'parse_month_page',
+        'schedule_NBA_2024_games-october.html', '/leagues/NBA_2024_games-october.html', {}, (0, 40),
+    ),
+    'parse_box_score': (
+        BoxScoreSpider, {'full_season': 'True'}, 'parse_box_score',
+        'boxscore_202312080NYK_ot.html', '/boxscores/202312080NYK.html',
+        {'visitor_abbr': 'BOS', 'home_abbr': 'NYK'}, (52, 0),
+    ),
+    'parse_roster': (
+        TeamShootingSpider, {'team_code': 'GSW', 'season': '2024'}, 'parse',
+        'team_GSW_2024.html', '/teams/GSW/2024.html', {}, (0, 18),
+    ),
+    'parse_player_shooting': (
+        TeamShootingSpider, {'team_code': 'GSW', 'season': '2024'}, 'parse_player_shooting',
+        'shooting_curryst01_2024_rendered.html', '/players/c/curryst01/shooting/2024',
+        {'player_url': f'{BASE_URL}/players/c/curryst01.html'}, (1455, 0),
+    ),
+}
+# Extraction des tooltips du shot chart seule (Selector + parse_shot_tooltip, sans ItemLoader)
+TOOLTIP_FIXTURE = 'shooting_curryst01_2024_rendered.html'
+TOOLTIP_EXPECTED = (1455, 0)
+# Fonctions de page exécutées dans le pool: nom: (fonction, fixture, arguments après le HTML)
+POOL_CASES = {
+    'parse_box_score_page': (
+        parse_box_score_page, 'boxscore_202312080NYK_ot.html',
+        (f'{BASE_URL}/boxscores/202312080NYK.html', 'BOS', 'NYK'),
+    ),
+    'parse_player_shooting_page': (
+        parse_player_shooting_page, 'shooting_curryst01_2024_rendered.html',
+        (False, f'{BASE_URL}/players/c/curryst01/shooting/2024', 'c/curryst01', '2024'),
+    ),
+}
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+        return f.read()
+
+
+def iterate(result):
+    """Sorties d'un callback, générateur ou générateur asynchrone (sans pool de parsing,
+    les callbacks asynchrones n'attendent rien: une boucle asyncio n'est pas nécessaire)"""
+    if not inspect.isasyncgen(result):
+        return result or ()
+    outputs = []
+    while True:
+        step = result.__anext__()
+        try:
+            step.send(None)
+        except StopIteration as e:
+            outputs.append(e.value)
+        except StopAsyncIteration:
+            return outputs
+
+
+def spider_case(spidercls, spider_kwargs, callback, fixture, path, meta):
+    """Retourne une fonction qui exécute le callback sur la page et renvoie (items, requêtes)"""
+    crawler = get_crawler(spidercls, {'LOG_LEVEL': 'WARNING'})
+    spider = spidercls.from_crawler(crawler, **spider_kwargs)
+    body = load_fixture(fixture)
+    method = getattr(spider, callback)
+
+    def run():
+        request = Request(BASE_URL + path, meta=dict(meta))
+        response = HtmlResponse(url=request.url, body=body, encoding='utf-8', request=request)
+        items = requests = 0
+        for output in iterate(method(response)):
+            if isinstance(output, Request):
+                requests += 1
+            else:
+                items += 1
+        return items, requests
+
+    return run
+
+
+def tooltip_case():
+    body = load_fixture(TOOLTIP_FIXTURE).decode('utf-8')
+
+    def run():
+        shots = [parse_shot_tooltip(*attrs) for attrs in extract_shot_tooltips(Selector(text=body))]
+        return len(shots), 0
+
+    return run
+
+
+def measure(run, repeat):
+    """Meilleur temps par page sur `repeat` exécutions et pic mémoire d'une exécution"""
+    outputs = run()
+    timings = []
+    # Comme timeit: pas de passage du ramasse-miettes pendant les mesures
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    best = min(timings)
+    items, requests = outputs
+    return {
+        'items': items,
+        'requests': requests,
+        'seconds_per_page': round(best, 6),
+        'pages_per_second': round(1 / best, 2),
+        'items_per_second': round(items / best, 1),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def measure_pool(function, text, args, processes, pages):
+    """Pages/s de function sur `pages` pages envoyées à un pool de `processes` processus"""
+    with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+        # Démarrage des processus et imports hors mesure
+        list(executor.map(function, [text] * processes, *[[arg] * processes for arg in args]))
+        start = time.perf_counter()
+        list(executor.map(function, [text] * pages, *[[arg] * pages for arg in args]))
+        elapsed = time.perf_counter() - start
+    return round(pages / elapsed, 2)
+
+
+def compare(results, baseline, tolerance):
+    """Affiche l'écart à la référence; retourne les cas en régression"""
+    regressions = []
+    print(f"{'Cas':<24}{'Pages/s':>10}{'Items/s':>12}{'Mémoire (Ko)':>14}{'Référence':>12}{'Écart':>9}")
+    for name, result in results['cases'].items():
+        reference = baseline.get('cases', {}).get(name) if baseline else None
+        ratio = result['pages_per_second'] / reference['pages_per_second'] if reference else None
+        flag = ''
+        if ratio is not None and ratio < 1 - tolerance:
+            regressions.append(name)
+            flag = '  RÉGRESSION'
+        print(
+            f"{name:<24}{result['pages_per_second']:>10.1f}{result['items_per_second']:>12.1f}"
+            f"{result['peak_memory_kb']:>14.1f}"
+            + (f"{reference['pages_per_second']:>12.1f}{(ratio - 1) * 100:>+8.0f}%" if reference else f"{'-':>12}{'-':>9}")
+            + flag
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--only', help='Cas à mesurer, séparés par des virgules')
+    parser.add_argument('--output', default=os.path.join(SCRIPT_DIR, 'results', 'parsers.json'))
+    parser.add_argument('--baseline', default=os.path.join(SCRIPT_DIR, 'baseline_parsers.json'))
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help='Ralentissement toléré par rapport à la référence (0.3 = 30%%)')
+    parser.add_argument('--save-baseline', action='store_true', help='Remplacer la référence par ces résultats')
+    parser.add_argument('--processes', help='Nombres de processus du pool de parsing à comparer (ex: 1,2,4)')
+    args = parser.parse_args()
+
+    cases = {name: (spider_case(*case[:6]), case[6]) for name, case in SPIDER_CASES.items()}
+    cases['shot_tooltips'] = (tooltip_case(), TOOLTIP_EXPECTED)
+    if args.only:
+        cases = {name: cases[name] for name in args.only.split(',')}
+
+    results = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': args.repeat,
+        'cases': {},
+    }
+    for name, (run, expected) in cases.items():
+        result = measure(run, args.repeat)
+        # Un parser cassé serait très rapide: vérifier ce qu'il extrait
+        if (result['items'], result['requests']) != expected:
+            sys.exit(f"{name}: {result['items']} items et {result['requests']} requêtes, attendu {expected}")
+        results['cases'][name] = result
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.processes:
+        counts = [int(count) for count in args.processes.split(',')]
+        results['pool'] = {}
+        print(f"\n{'Pool de parsing':<28}" + ''.join(f"{f'{count} proc.':>11}" for count in counts) + '   (pages/s)')
+        for name, (function, fixture, extra_args) in POOL_CASES.items():
+            text = load_fixture(fixture).decode('utf-8')
+            throughput = {count: measure_pool(function, text, extra_args, count, args.repeat * count) for count in counts}
+            results['pool'][name] = throughput
+            print(f"{name:<28}" + ''.join(f"{value:>11.1f}" for value in throughput.values()))
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Résultats écrits dans {args.output}")
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Référence mise à jour: {args.baseline}")
+    elif regressions:
+        sys.exit(f"Régressions par rapport à {args.baseline}: {', '.join(regressions)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+Compare l'extraction du shot chart par page complète (page_source + Selector)
+et par fragment (attributs des tooltips renvoyés par execute_script).
+
+La page rendue est reconstruite hors ligne à partir des tirs déjà extraits
+(public/data/shots), entourée d'un contenu de page comparable au site
+(navigation, publicités, tableaux de statistiques).
+
+Usage: python benchmarks/bench_shot_extraction.py [--team=atl] [--season=2024] [--repeat=5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+from scrapy import Selector
+
+from basketball_scrapy_project.parsing import extract_shot_tooltips, parse_shot_tooltip
+
+SHOTS_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), 'frontend_basketball_scrapy', 'public', 'data', 'shots')
+
+
+def build_tip(shot):
+    """Reconstruit l'attribut tip d'un tooltip à partir d'un tir extrait"""
+    parts = [f"{shot.get('game_date', '')}, {shot.get('teams', '')}"]
+    quarter = shot.get('quarter')
+    if quarter:
+        period = 'OT' if 'OT' in quarter else 'Qtr'
+        parts.append(f"{quarter} {period}, {shot.get('time_remaining', '0:00')} remaining")
+    result = 'Made' if shot.get('is_made') == 'True' else 'Missed'
+    parts.append(f"{result} {shot.get('shot_type', '2-pointer')} from {shot.get('shot_distance', '0')} ft")
+    return '<br>'.join(parts)
+
+
+def build_page(shots):
+    """Construit une page de shooting rendue d'une taille comparable à celle du site"""
+    tooltips = ''.join(
+        f'<div class="tooltip {"make" if s.get("is_made") == "True" else "miss"}" '
+        f'style="left:{s.get("x_coordinate", 0)}px;top:{s.get("y_coordinate", 0)}px;" '
+        f'tip="{build_tip(s)}">&#9679;</div>'
+        for s in shots
+    )
+    nav = ''.join(f'<li><a href="/players/{i}.html">Lien {i}</a></li>' for i in range(1500))
+    ads = ''.join(f'<div class="adblock" id="ad_{i}"><script>var ad{i} = {{}};</script></div>' for i in range(200))
+    rows = ''.join(
+        '<tr>' + ''.join(f'<td data-stat="s{j}">{i * j}</td>' for j in range(25)) + '</tr>'
+        for i in range(800)
+    )
+    return (
+        '<html><head><title>Shooting</title></head><body>'
+        f'<div id="nav"><ul>{nav}</ul></div>{ads}'
+        '<ul class="hoversmooth"><li class="index"><a><u>Joueur</u></a></li></ul>'
+        f'<div id="shot-wrapper">{tooltips}</div>'
+        f'<table id="shooting"><tbody>{rows}</tbody></table>'
+        '</body></html>'
+    )
+
+
+def full_page_path(page_source):
+    selector = Selector(text=page_source)
+    return [parse_shot_tooltip(*attrs) for attrs in extract_shot_tooltips(selector)]
+
+
+def fragment_path(payload):
+    tooltips = json.loads(payload)
+    return [parse_shot_tooltip(*attrs) for attrs in tooltips]
+
+
+def measure(func, arg, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--team', default='atl')
+    parser.add_argument('--season', default='2024')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with open(os.path.join(SHOTS_DIR, f"{args.team}_shots_{args.season}.json")) as f:
+        shots_by_player = defaultdict(list)
+        for shot in json.load(f):
+            shots_by_player[shot['player_id']].append(shot)
+
+    # Joueur le plus représentatif: celui qui a le plus de tirs
+    shots = max(shots_by_player.values(), key=len)
+    page_source = build_page(shots)
+
+    # Ce que renvoie execute_script(PLAYER_SHOOTING_SCRIPT), transféré en JSON par WebDriver
+    tooltips = extract_shot_tooltips(Selector(text=page_source))
+    payload = json.dumps(tooltips)
+
+    assert full_page_path(page_source) == fragment_path(payload)
+
+    full_time, full_peak = measure(full_page_path, page_source, args.repeat)
+    fragment_time, fragment_peak = measure(fragment_path, payload, args.repeat)
+
+    print(f"Tirs: {len(shots)}")
+    print(f"{'Chemin':<12}{'Transfert (Ko)':>16}{'Parsing (ms)':>14}{'Mémoire (Ko)':>14}")
+    print(f"{'page':<12}{len(page_source.encode()) / 1024:>16.1f}{full_time * 1000:>14.1f}{full_peak / 1024:>14.1f}")
+    print(f"{'fragment':<12}{len(payload.encode()) / 1024:>16.1f}{fragment_time * 1000:>14.1f}{fragment_peak / 1024:>14.1f}")
+    print(f"Gain: transfert x{len(page_source) / len(payload):.1f}, "
+          f"parsing x{full_time / fragment_time:.1f}, mémoire x{full_peak / fragment_peak:.1f}")
+
+
+if __name__ == '__main__':
+    main()
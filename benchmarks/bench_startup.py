@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Mesure le temps de démarrage des commandes légères de la CLI (aide, requête, export).
+
+Chaque commande est lancée --repeat fois dans un nouvel interpréteur (base SQLite
+temporaire pour query); le rapport donne le temps minimal et médian et les modules
+lourds chargés (relevés avec -X importtime). Les résultats sont écrits en JSON; le
+code de sortie vaut 1 si une médiane dépasse --max-seconds.
+
+Usage: python benchmarks/bench_startup.py [--repeat=10] [--max-seconds=1.0]
+                                          [--only=help,query] [--output=benchmarks/results/startup.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
+
+# Commandes mesurées ({db} et {tmp}: base et répertoire temporaires)
+COMMANDS = {
+    'help': ['scraper.py', '--help'],
+    'query-help': ['scraper.py', 'query', '--help'],
+    'query': ['scraper.py', 'query', '--db', '{db}', '--season', '2024', '--min-distance', '30', '--summary'],
+    'export': ['scraper.py', 'query', '--db', '{db}', '--group-by', 'quarter', '--output', '{tmp}/quarters.csv'],
+    'app-help': ['app.py', '--help'],
+}
+
+# Modules dont le chargement suffit à dépasser le budget de démarrage
+HEAVY_MODULES = ('scrapy', 'twisted', 'pandas', 'numpy', 'selenium', 'webdriver_manager', 'lxml')
+
+
+def run(command):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-W', 'ignore'] + command, cwd=PROJECT_DIR, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)}: code {result.returncode}\n{result.stderr[-2000:]}")
+    return elapsed
+
+
+def heavy_imports(command):
+    """Modules lourds importés par la commande (premier niveau de paquet)"""
+    result = subprocess.run([sys.executable, '-W', 'ignore', '-X', 'importtime'] + command,
+                            cwd=PROJECT_DIR, capture_output=True, text=True)
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            name = line.rsplit('|', 1)[1].strip().split('.')[0]
+            if name in HEAVY_MODULES:
+                loaded.add(name)
+    return sorted(loaded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--max-seconds', type=float, default=1.0, help='Médiane maximale par commande')
+    parser.add_argument('--only', default=','.join(COMMANDS), help='Commandes, séparées par des virgules')
+    parser.add_argument('--output', default=os.path.join(SCRIPT_DIR, 'results', 'startup.json'))
+    args = parser.parse_args()
+
+    results = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'repeat': args.repeat,
+        'max_seconds': args.max_seconds,
+        'commands': {},
+    }
+    too_slow = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, 'startup.db')
+        print(f"{'Commande':<12}{'Min (s)':>9}{'Médiane (s)':>13}  Modules lourds")
+        for name in args.only.split(','):
+            command = [part.format(db=db, tmp=tmp) for part in COMMANDS[name]]
+            # Premier lancement hors mesure: création de la base, cache des .pyc
+            run(command)
+            timings = [run(command) for _ in range(args.repeat)]
+            result = {
+                'command': ' '.join(COMMANDS[name]),
+                'min_seconds': round(min(timings), 3),
+                'median_seconds': round(statistics.median(timings), 3),
+                'heavy_imports': heavy_imports(command),
+            }
+            results['commands'][name] = result
+            if result['median_seconds'] > args.max_seconds:
+                too_slow.append(name)
+            print(f"{name:<12}{result['min_seconds']:>9.3f}{result['median_seconds']:>13.3f}  "
+                  f"{', '.join(result['heavy_imports']) or '-'}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Résultats écrits dans {args.output}")
+    if too_slow:
+        print(f"Démarrage au-delà de {args.max_seconds}s: {', '.join(too_slow)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -18,6 +18,12 @@ interface ShotData {
   shot_type: string;
   shot_distance: string;
   score_description?: string;
+  // Champs dérivés calculés côté Python (API locale)
+  zone?: string;
+  elapsed_seconds?: number;
+  margin_before?: number;
+  margin_after?: number;
+  is_clutch?: number;
 }
 
 interface ClutchSituationsChartProps {
@@ -56,6 +62,11 @@ const ClutchSituationsChart: React.FC<ClutchSituationsChartProps> = ({ data, tea
   
   // Fonction pour évaluer si le match était serré
   const isCloseGame = (shot: ShotData) => {
+    // Écart avant le tir déjà calculé (tirs servis par l'API locale)
+    if (shot.margin_before !== undefined) {
+      return Math.abs(shot.margin_before) <= 5;
+    }
+    
     const description = shot.score_description || '';
     
     // Extraire le score si disponible
@@ -1,9 +1,10 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card";
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select";
 import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs";
 import { Badge } from '@/components/ui/badge';
 import { ResponsiveContainer, ScatterChart, Scatter, XAxis, YAxis, ZAxis, Tooltip, Cell, Legend } from 'recharts';
+import { loadShotGrids, type ShotGridFile } from '@/services/shotDataService';
 
 // Interface pour les données de tir
 interface ShotData {
@@ -159,6 +160,117 @@ const QuarterChart = ({
   );
 };
 
+// Couleur d'une zone selon son écart à la moyenne de la ligue (points de %)
+const zoneColor = (relative: number | undefined, fgPct: number) => {
+  const delta = relative ?? fgPct - 45;
+  if (delta >= 5) return '#d73027';
+  if (delta >= 0) return '#fc8d59';
+  if (delta > -5) return '#91bfdb';
+  return '#4575b4';
+};
+
+// Vue par zones: grilles précalculées (python scraper.py grids) du joueur, de son
+// équipe ou de toute la ligue, sans charger les tirs individuels
+const ZoneChart = ({ playerId, teamCode, season }: { playerId: string, teamCode: string, season: string }) => {
+  const [scope, setScope] = useState<'player' | 'team' | 'league'>('team');
+  const [cellSize, setCellSize] = useState<string>('25');
+  const [gridFile, setGridFile] = useState<ShotGridFile | null>(null);
+  const [isLoading, setIsLoading] = useState(false);
+
+  useEffect(() => {
+    let cancelled = false;
+    const id = scope === 'player' ? playerId : scope === 'team' ? teamCode : 'league';
+    setIsLoading(true);
+    loadShotGrids(scope, id, season).then(file => {
+      if (!cancelled) {
+        setGridFile(file);
+        setIsLoading(false);
+      }
+    });
+    return () => { cancelled = true; };
+  }, [scope, playerId, teamCode, season]);
+
+  const grid = gridFile?.grids[cellSize];
+  const cells = grid ? grid.x.map((x, index) => ({
+    x,
+    y: grid.y[index],
+    attempts: grid.attempts[index],
+    makes: grid.makes[index],
+    fgPct: grid.fg_pct[index],
+    relative: grid.relative?.[index],
+  })) : [];
+
+  return (
+    <div>
+      <div className="flex gap-2 flex-wrap mb-4">
+        <Select value={scope} onValueChange={(value) => setScope(value as 'player' | 'team' | 'league')}>
+          <SelectTrigger className="w-[150px]">
+            <SelectValue placeholder="Vue" />
+          </SelectTrigger>
+          <SelectContent>
+            <SelectItem value="player">Joueur</SelectItem>
+            <SelectItem value="team">Équipe ({teamCode})</SelectItem>
+            <SelectItem value="league">Ligue</SelectItem>
+          </SelectContent>
+        </Select>
+        <Select value={cellSize} onValueChange={setCellSize}>
+          <SelectTrigger className="w-[150px]">
+            <SelectValue placeholder="Résolution" />
+          </SelectTrigger>
+          <SelectContent>
+            {Object.keys(gridFile?.grids || { '10': null, '25': null, '50': null }).map(size => (
+              <SelectItem key={size} value={size}>Zones de {size} px</SelectItem>
+            ))}
+          </SelectContent>
+        </Select>
+      </div>
+
+      {isLoading ? (
+        <div className="flex justify-center items-center h-60">
+          <div className="animate-spin rounded-full h-12 w-12 border-b-2 border-primary"></div>
+        </div>
+      ) : cells.length > 0 ? (
+        <div className="relative border border-gray-200 rounded-lg bg-gray-50">
+          <div style={{ width: '500px', height: 500, margin: '0 auto' }}>
+            <ResponsiveContainer width="100%" height="100%">
+              <ScatterChart margin={{ top: 20, right: 30, bottom: 20, left: 20 }}>
+                <XAxis type="number" dataKey="x" domain={[0, 500]} hide />
+                <YAxis type="number" dataKey="y" domain={[0, 470]} hide />
+                <ZAxis type="number" dataKey="attempts" range={[20, 400]} />
+                <Tooltip
+                  content={({ payload }: { payload?: { payload: typeof cells[number] }[] }) => {
+                    if (payload && payload.length > 0) {
+                      const cell = payload[0].payload;
+                      return (
+                        <div className="p-2 bg-white border rounded shadow-md text-xs">
+                          <p className="font-bold">{cell.fgPct}% ({cell.makes}/{cell.attempts})</p>
+                          {cell.relative !== undefined && (
+                            <p>{cell.relative >= 0 ? '+' : ''}{cell.relative} pts vs ligue</p>
+                          )}
+                        </div>
+                      );
+                    }
+                    return null;
+                  }}
+                />
+                <Scatter name="Zones" data={cells}>
+                  {cells.map((cell, index) => (
+                    <Cell key={index} fill={zoneColor(cell.relative, cell.fgPct)} opacity={0.8} />
+                  ))}
+                </Scatter>
+              </ScatterChart>
+            </ResponsiveContainer>
+          </div>
+        </div>
+      ) : (
+        <div className="flex justify-center items-center h-60 text-gray-500">
+          <p>Aucune grille disponible (python scraper.py grids --season {season})</p>
+        </div>
+      )}
+    </div>
+  );
+};
+
 const ShotChart: React.FC<ShotChartProps> = ({ data, teamColors }) => {
   const [selectedFilter, setSelectedFilter] = useState<'all' | 'made' | 'missed'>('all');
   const [selectedQuarter, setSelectedQuarter] = useState<string>('all');
@@ -300,6 +412,7 @@ const ShotChart: React.FC<ShotChartProps> = ({ data, teamColors }) => {
           <TabsList className="mb-4">
             <TabsTrigger value="scatter">General</TabsTrigger>
             <TabsTrigger value="quarters">Par Quart-Temps</TabsTrigger>
+            <TabsTrigger value="zones">Zones</TabsTrigger>
             <TabsTrigger value="stats">Statistiques</TabsTrigger>
           </TabsList>
           
@@ -413,6 +526,14 @@ const ShotChart: React.FC<ShotChartProps> = ({ data, teamColors }) => {
             </div>
           </TabsContent>
           
+          <TabsContent value="zones">
+            <ZoneChart
+              playerId={data.length > 0 ? data[0].player_id : ''}
+              teamCode={teamCode}
+              season={data.length > 0 ? data[0].season : '2024'}
+            />
+          </TabsContent>
+          
           <TabsContent value="stats">
             <div className="grid grid-cols-1 md:grid-cols-3 gap-4">
               <Card>
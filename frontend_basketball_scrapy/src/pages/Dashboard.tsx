@@ -25,6 +25,7 @@ import { calculatePlayerAverages } from "@/lib/utils"
 import { playerData } from "@/data/playersData"
 import RadarChart from "@/components/RadarChart"
 import { loadPlayerShotData, getAvailablePlayers } from "@/services/shotDataService"
+import { loadClutchLeaderboard, type LeaderboardEntry } from "@/services/leaderboardService"
 import PlayerComparisonChart from "@/components/PlayerComparisonChart"
 import ShootingTrendsChart from "@/components/ShootingTrendsChart"
 import DistanceEfficiencyChart from "@/components/DistanceEfficiencyChart"
@@ -102,6 +103,12 @@ export default function Dashboard() {
   const [isLoadingShots, setIsLoadingShots] = useState(false)
   const [comparePlayerData, setComparePlayerData] = useState<ShotData[]>([])
   const [selectedComparePlayer, setSelectedComparePlayer] = useState<string>("")
+  const [leaderboard, setLeaderboard] = useState<LeaderboardEntry[]>([])
+
+  // Classement clutch précalculé (python scraper.py leaderboard), s'il a été généré
+  useEffect(() => {
+    loadClutchLeaderboard().then(setLeaderboard);
+  }, []);
 
   // Effet pour charger la liste des joueurs disponibles pour les tirs
   useEffect(() => {
@@ -163,8 +170,10 @@ export default function Dashboard() {
     loadComparePlayerShots();
   }, [selectedComparePlayer]);
 
-  // Calculate averages for all players
-  const playersWithAverages = calculatePlayerAverages(playerData)
+  // Calculate averages for all players (classement précalculé, mêmes champs, s'il existe)
+  const playersWithAverages = (leaderboard.length > 0
+    ? leaderboard as unknown as ReturnType<typeof calculatePlayerAverages>
+    : calculatePlayerAverages(playerData))
     .filter(player => player.matches >= MIN_MATCHES)
 
   // Sort and filter players
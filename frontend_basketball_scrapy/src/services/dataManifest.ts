@@ -0,0 +1,38 @@
+// Manifeste des données publiées (python scraper.py publish): associe le nom stable
+// d'un fichier de /data à sa copie nommée par empreinte et précompressée, que le
+// navigateur peut garder en cache indéfiniment
+interface ManifestEntry {
+  path: string;
+  bytes: number;
+  gzip?: number;
+  br?: number;
+}
+
+interface DataManifest {
+  created_at: string;
+  encodings: string[];
+  files: Record<string, ManifestEntry>;
+}
+
+let manifestPromise: Promise<DataManifest | null> | null = null;
+
+// Chargé une seule fois; null si les données n'ont pas été publiées
+const loadManifest = (): Promise<DataManifest | null> => {
+  if (!manifestPromise) {
+    manifestPromise = fetch('/data/manifest.json', { cache: 'no-cache' })
+      .then(response => {
+        const contentType = response.headers.get('Content-Type') || '';
+        return response.ok && contentType.includes('application/json') ? response.json() : null;
+      })
+      .catch(() => null);
+  }
+  return manifestPromise;
+};
+
+// URL d'un fichier de données (chemin relatif à /data, ex: shots/gsw_shots_2024.json):
+// la version publiée si elle existe, sinon le fichier sous son nom stable
+export const dataUrl = async (path: string): Promise<string> => {
+  const manifest = await loadManifest();
+  const entry = manifest?.files[path];
+  return entry ? `/data/${entry.path}` : `/data/${path}`;
+};
@@ -0,0 +1,37 @@
+import { dataUrl } from './dataManifest';
+
+// Classement clutch précalculé (python scraper.py leaderboard): mêmes champs que
+// calculatePlayerAverages (totaux total_*, moyennes par match, clutchScore) plus
+// les taux par minute, les pourcentages de tir et le rang
+export interface LeaderboardEntry {
+  rank: number;
+  player_name: string;
+  team: string;
+  season: string;
+  matches: number;
+  clutchScore: number;
+  true_shooting_pct: number;
+  field_goal_pct: number;
+  three_point_pct: number;
+  free_throw_pct: number;
+  [key: string]: string | number;
+}
+
+// Fonction pour charger le classement clutch d'une saison (vide s'il n'a pas été généré)
+export const loadClutchLeaderboard = async (season: string = '2024'): Promise<LeaderboardEntry[]> => {
+  try {
+    const response = await fetch(await dataUrl(`clutch_leaderboard_${season}.json`));
+    // Classement pas encore généré: le serveur de développement renvoie index.html
+    const contentType = response.headers.get('Content-Type') || '';
+    if (response.status === 404 || (response.ok && !contentType.includes('application/json'))) {
+      return [];
+    }
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    return await response.json();
+  } catch (error) {
+    console.error(`Erreur lors du chargement du classement clutch ${season}:`, error);
+    return [];
+  }
+};
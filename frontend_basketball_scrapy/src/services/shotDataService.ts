@@ -1,3 +1,5 @@
+import { dataUrl } from './dataManifest';
+
 interface ShotData {
   player_id: string;
   player_name: string;
@@ -13,12 +15,65 @@ interface ShotData {
   shot_type: string;
   shot_distance: string;
   score_description?: string;
+  // Champs dérivés calculés côté Python (API locale)
+  zone?: string;
+  elapsed_seconds?: number;
+  margin_before?: number;
+  margin_after?: number;
+  is_clutch?: number;
+}
+
+interface ShotPage {
+  items: ShotData[];
+  page: number;
+  page_size: number;
+  total: number;
+  has_more: boolean;
 }
 
+// API locale (scraper.py serve, proxifiée par Vite sur /api): retourne null si elle
+// n'est pas lancée pour se rabattre sur les fichiers JSON statiques
+const fetchFromApi = async <T>(path: string, params: Record<string, string>): Promise<T | null> => {
+  try {
+    const response = await fetch(`/api/${path}?${new URLSearchParams(params)}`);
+    const contentType = response.headers.get('Content-Type') || '';
+    if (!response.ok || !contentType.includes('application/json')) {
+      return null;
+    }
+    return await response.json();
+  } catch (e) {
+    return null;
+  }
+};
+
+// Charge toutes les pages de tirs correspondant aux filtres depuis l'API
+// (null si l'API n'est pas lancée ou n'a aucun tir correspondant)
+const loadShotsFromApi = async (params: Record<string, string>): Promise<ShotData[] | null> => {
+  let shots: ShotData[] = [];
+  for (let page = 1; ; page++) {
+    const result = await fetchFromApi<ShotPage>('shots', { ...params, page: String(page) });
+    if (!result) {
+      return page === 1 ? null : shots;
+    }
+    // Base vide ou import partiel: les fichiers statiques peuvent avoir ces tirs
+    if (page === 1 && result.total === 0) {
+      return null;
+    }
+    shots = shots.concat(result.items);
+    if (!result.has_more) {
+      return shots;
+    }
+  }
+};
+
 // Fonction pour charger les données d'une équipe
 export const loadTeamShotData = async (teamCode: string, season: string = '2024'): Promise<ShotData[]> => {
+  const apiShots = await loadShotsFromApi({ team: teamCode.toUpperCase(), season });
+  if (apiShots) {
+    return apiShots;
+  }
   try {
-    const response = await fetch(`/data/shots/${teamCode.toLowerCase()}_shots_${season}.json`);
+    const response = await fetch(await dataUrl(`shots/${teamCode.toLowerCase()}_shots_${season}.json`));
     if (!response.ok) {
       throw new Error(`HTTP error! status: ${response.status}`);
     }
@@ -32,10 +87,15 @@ export const loadTeamShotData = async (teamCode: string, season: string = '2024'
 
 // Fonction pour charger les données d'un joueur spécifique
 export const loadPlayerShotData = async (playerId: string, season: string = '2024'): Promise<ShotData[]> => {
+  // L'API ne renvoie que les tirs du joueur au lieu des fichiers de toutes les équipes
+  const apiShots = await loadShotsFromApi({ player: playerId, season });
+  if (apiShots) {
+    return apiShots;
+  }
   try {
     // Essayons d'abord de charger depuis un fichier spécifique au joueur
     try {
-      const response = await fetch(`/data/shots/player_${playerId.replace('/', '_')}_${season}.json`);
+      const response = await fetch(await dataUrl(`shots/player_${playerId.replace('/', '_')}_${season}.json`));
       if (response.ok) {
         const data = await response.json();
         return data;
@@ -74,7 +134,7 @@ export const loadAllShotData = async (season: string = '2024'): Promise<ShotData
   try {
     // Essayer de charger depuis le fichier combiné d'abord
     try {
-      const response = await fetch(`/data/shots/all_teams_shots_${season}.json`);
+      const response = await fetch(await dataUrl(`shots/all_teams_shots_${season}.json`));
       if (response.ok) {
         const data = await response.json();
         // Convertir le format combiné en tableau plat
@@ -115,6 +175,10 @@ export const loadAllShotData = async (season: string = '2024'): Promise<ShotData
 
 // Fonction pour obtenir la liste des joueurs disponibles
 export const getAvailablePlayers = async (season: string = '2024'): Promise<{id: string, name: string, team: string}[]> => {
+  const apiPlayers = await fetchFromApi<{id: string, name: string, team: string | null}[]>('players', { season });
+  if (apiPlayers && apiPlayers.length > 0) {
+    return apiPlayers.map(player => ({ ...player, team: player.team || '' }));
+  }
   try {
     const allShots = await loadAllShotData(season);
     const playersMap = new Map<string, {id: string, name: string, team: string}>();
@@ -135,4 +199,39 @@ export const getAvailablePlayers = async (season: string = '2024'): Promise<{id:
     console.error('Erreur lors de la récupération des joueurs:', error);
     return [];
   }
-}; 
\ No newline at end of file
+}; 
+// Grille de tirs précalculée (python scraper.py grids): une cellule par index des tableaux
+export interface ShotGrid {
+  cell_size: number;
+  columns: number;
+  rows: number;
+  x: number[];
+  y: number[];
+  attempts: number[];
+  makes: number[];
+  fg_pct: number[];
+  relative?: number[];
+}
+
+export interface ShotGridFile {
+  scope: 'league' | 'team' | 'player';
+  id: string;
+  season: string | null;
+  court: [number, number];
+  grids: Record<string, ShotGrid>;
+}
+
+// Fonction pour charger les grilles d'un joueur, d'une équipe ou de la ligue
+export const loadShotGrids = async (scope: 'league' | 'team' | 'player', id: string = 'league', season: string = '2024'): Promise<ShotGridFile | null> => {
+  const path = scope === 'league' ? 'league.json' : `${scope}s/${id.replace('/', '_')}.json`;
+  try {
+    const response = await fetch(await dataUrl(`grids/${season}/${path}`));
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    return await response.json();
+  } catch (error) {
+    console.error(`Erreur lors du chargement des grilles pour ${id}:`, error);
+    return null;
+  }
+};
@@ -1,13 +1,58 @@
-import { defineConfig } from 'vite'
+import { defineConfig, type Connect, type Plugin } from 'vite'
 import react from '@vitejs/plugin-react'
+import fs from 'fs'
 import path from 'path'
 
+// Données publiées (python scraper.py publish): sert la variante précompressée
+// acceptée par le navigateur (.br, sinon .gz) avec un cache immuable, le nom des
+// fichiers changeant avec leur contenu
+const precompressedData = (): Plugin => {
+  const middleware = (root: string): Connect.NextHandleFunction => (req, res, next) => {
+    const url = (req.url || '').split('?')[0]
+    if (!url.startsWith('/data/published/') || !url.endsWith('.json')) {
+      return next()
+    }
+    const file = path.join(root, decodeURIComponent(url))
+    if (!file.startsWith(root)) {
+      return next()
+    }
+    const accepted = String(req.headers['accept-encoding'] || '')
+    const encoding = [['br', '.br'], ['gzip', '.gz']].find(
+      ([name, extension]) => accepted.includes(name) && fs.existsSync(file + extension)
+    )
+    if (!encoding) {
+      return next()
+    }
+    res.setHeader('Content-Type', 'application/json')
+    res.setHeader('Content-Encoding', encoding[0])
+    res.setHeader('Cache-Control', 'public, max-age=31536000, immutable')
+    res.setHeader('Vary', 'Accept-Encoding')
+    fs.createReadStream(file + encoding[1]).pipe(res)
+  }
+
+  return {
+    name: 'precompressed-data',
+    configureServer(server) {
+      server.middlewares.use(middleware(path.resolve(server.config.publicDir)))
+    },
+    configurePreviewServer(server) {
+      server.middlewares.use(middleware(path.resolve(server.config.root, server.config.build.outDir)))
+    },
+  }
+}
+
 // https://vite.dev/config/
 export default defineConfig({
-  plugins: [react()],
+  plugins: [react(), precompressedData()],
   resolve: {
     alias: {
       '@': path.resolve(__dirname, './src')
     }
+  },
+  server: {
+    // API locale des tirs (python scraper.py serve)
+    proxy: {
+      '/api': 'http://localhost:8000'
+    }
   }
 })
@@ -6,16 +6,17 @@ import random
 import subprocess
 import sys
 import time
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-from scrapy.crawler import CrawlerProcess
-from scrapy.utils.log import configure_logging
-from basketball_scrapy_project.spiders.boxscore_spider import BoxScoreSpider
+# Scrapy, les spiders et les dépendances lourdes (pandas, numpy) sont importés dans
+# les commandes qui s'en servent: --help, query ou import démarrent sans les charger
+from basketball_scrapy_project.query import GROUP_COLUMNS
 
 # Chemin du script et répertoire de travail
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 TEAMS_JSON_PATH = os.path.join(SCRIPT_DIR, 'team_colors.json')
+# Données servies par le frontend (artefacts du build)
+DATA_DIR = os.path.join(SCRIPT_DIR, 'frontend_basketball_scrapy', 'public', 'data')
 
 # Définir la saison à scraper par défaut (saison actuelle)
 current_year = datetime.now().year
@@ -24,23 +25,6 @@ if datetime.now().month >= 10:  # La saison NBA commence en octobre
 else:
     DEFAULT_SEASON = current_year
 
-# Classes de middleware et pipeline pour le debugging
-class DebugPipeline:
-    def process_item(self, item, spider):
-        # Enregistrer chaque item pour le debug
-        with open('debug_items.json', 'a') as f:
-            f.write(json.dumps(dict(item)) + '\n')
-        return item
-
-class SaveHtmlMiddleware:
-    def process_response(self, request, response, spider):
-        # Enregistrer la première page pour debug
-        if 'basketball-reference.com' in response.url and not os.path.exists('debug_response.html'):
-            with open('debug_response.html', 'w', encoding='utf-8') as f:
-                f.write(response.text)
-            spider.logger.info(f"Saved HTML response from {response.url} to debug_response.html")
-        return response
-
 def get_default_settings(log_level="DEBUG", spider_type="boxscore"):
     """Retourne la configuration par défaut pour les spiders Scrapy"""
     return {
@@ -58,7 +42,7 @@ def get_default_settings(log_level="DEBUG", spider_type="boxscore"):
         "AUTOTHROTTLE_START_DELAY": 5,
         "AUTOTHROTTLE_MAX_DELAY": 60,
         "AUTOTHROTTLE_TARGET_CONCURRENCY": 1.0,
-        "AUTOTHROTTLE_DEBUG": True,
+        "AUTOTHROTTLE_DEBUG": False,
         
         # Cache HTTP pour éviter de refaire les mêmes requêtes
         "HTTPCACHE_ENABLED": True,
@@ -75,19 +59,56 @@ def get_default_settings(log_level="DEBUG", spider_type="boxscore"):
             "basketball_scrapy_project.middlewares.RandomUserAgentMiddleware": 400,
             "basketball_scrapy_project.middlewares.TooManyRequestsRetryMiddleware": 610,
             "scrapy.downloadermiddlewares.retry.RetryMiddleware": None,
-            "scraper.SaveHtmlMiddleware": 900,
         },
+        "SPIDER_MIDDLEWARES": {
+            "basketball_scrapy_project.middlewares.CallbackTimingMiddleware": 990,
+            "basketball_scrapy_project.profiling.ProfilingMiddleware": 995,
+        },
+        "EXTENSIONS": {
+            "basketball_scrapy_project.extensions.CrawlTrace": -10,
+            "basketball_scrapy_project.profiling.CrawlProfiler": -20,
+            "basketball_scrapy_project.extensions.CrawlMetrics": 500,
+            "basketball_scrapy_project.debugcapture.DebugCapture": 510,
+        },
+        "METRICS_FILE": os.path.join(SCRIPT_DIR, "metrics", "{spider}_{time}.json"),
+        "TRACE_FILE": os.path.join(SCRIPT_DIR, "traces", "{spider}_{time}.json"),
+        "PROFILE_DIR": os.path.join(SCRIPT_DIR, "profiles", "{spider}_{time}"),
+        "DEBUG_CAPTURE_DIR": os.path.join(SCRIPT_DIR, "debug", "{spider}_{time}"),
+        "ITEM_PROCESSOR": "basketball_scrapy_project.profiling.ProfiledItemPipelineManager",
         "ITEM_PIPELINES": {
-            "scraper.DebugPipeline": 300,
+            "basketball_scrapy_project.pipelines.SQLiteStorePipeline": 800,
         },
+        
+        # Base SQLite locale (upsert par lots, relances idempotentes)
+        "STORE_PATH": os.path.join(SCRIPT_DIR, "basketball.db"),
+        "STORE_BATCH_SIZE": 500,
     }
 
+def crawl_options(args):
+    """Settings Scrapy correspondant aux options communes des commandes de crawl (--trace, --profile, --parse-processes)"""
+    options = {}
+    if getattr(args, 'trace', False):
+        options["TRACE_ENABLED"] = True
+    if getattr(args, 'profile', False):
+        options["PROFILE_ENABLED"] = True
+    if getattr(args, 'parse_processes', 0):
+        options["PARSE_PROCESSES"] = args.parse_processes
+    return options
+
+def setting_flags(options):
+    """Options -s KEY=VALUE pour les crawls lancés avec `scrapy crawl`"""
+    return ''.join(f" -s {key}={value}" for key, value in options.items())
+
 def scrape_boxscores(args):
     """Exécute le spider pour les statistiques de match (boxscore)"""
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.log import configure_logging
+    from basketball_scrapy_project.spiders.boxscore_spider import BoxScoreSpider
+    
     # Configurer le logging
     configure_logging(install_root_handler=False)
     logging.basicConfig(
-        level=logging.INFO if args.full_season else logging.DEBUG,
+        level=logging.INFO if args.full_season or args.incremental else logging.DEBUG,
         format='%(asctime)s [%(name)s] %(levelname)s: %(message)s'
     )
     
@@ -99,18 +120,33 @@ def scrape_boxscores(args):
     output_json = f"{output_base}.json"
     output_csv = f"{output_base}.csv"
     
-    # Nettoyer les fichiers de sortie existants pour éviter la confusion
-    if os.path.exists(output_json):
-        os.remove(output_json)
-    if os.path.exists(output_csv):
-        os.remove(output_csv)
-        
-    # Créer un fichier pour stocker les items pour debug
-    if os.path.exists('debug_items.json'):
-        os.remove('debug_items.json')
+    spider_args = {'full_season': str(args.full_season).lower()}
+    if args.season:
+        spider_args['season'] = args.season
+    
+    if args.incremental:
+        # Les fichiers existants sont conservés: le crawl écrit dans des fichiers
+        # temporaires, fusionnés ensuite avec eux
+        existing = load_clutch_rows(output_json)
+        since, known_games = clutch_rows_since(existing, args.season or BoxScoreSpider.season)
+        spider_args.update(incremental='true', known_games=known_games)
+        if since:
+            spider_args['since'] = since
+        feed_json = f"{output_base}.new.json"
+        feed_csv = f"{output_base}.new.csv"
+    else:
+        feed_json, feed_csv = output_json, output_csv
+        # Nettoyer les fichiers de sortie existants pour éviter la confusion
+        if os.path.exists(output_json):
+            os.remove(output_json)
+        if os.path.exists(output_csv):
+            os.remove(output_csv)
     
     # Afficher les paramètres utilisés
-    if args.full_season:
+    if args.incremental:
+        print(f"Mode INCRÉMENTAL activé - {len(existing)} lignes dans {output_json}, "
+              f"matchs joués depuis le {since or 'dernier match en base'}")
+    elif args.full_season:
         print("Mode SAISON COMPLÈTE activé - récupération de toutes les données")
         print("Attention: Cela peut prendre plusieurs heures et générer des fichiers volumineux")
     else:
@@ -118,68 +154,120 @@ def scrape_boxscores(args):
         print("Pour récupérer une saison complète, utilisez: --full-season")
     
     # Obtenir les paramètres de base
-    settings = get_default_settings("INFO" if args.full_season else "DEBUG", "boxscore")
+    settings = get_default_settings("INFO" if args.full_season or args.incremental else "DEBUG", "boxscore")
     settings["FEEDS"] = {
-        output_json: {"format": "json"},
-        output_csv: {"format": "csv"}
+        feed_json: {"format": "json", "overwrite": True},
+        feed_csv: {"format": "csv", "overwrite": True}
     }
+    settings.update(crawl_options(args))
     
     # Créer le processus de crawling
     process = CrawlerProcess(settings=settings)
     
     # Lancer le spider
     print(f"Lancement du scraping... Sortie vers {output_json} et {output_csv}")
-    process.crawl(BoxScoreSpider, full_season=str(args.full_season).lower())
+    process.crawl(BoxScoreSpider, **spider_args)
     process.start()
+    
+    if args.incremental:
+        new_rows = load_clutch_rows(feed_json)
+        merged, added = merge_clutch_rows(existing, new_rows)
+        write_clutch_rows(merged, output_json, output_csv)
+        for path in (feed_json, feed_csv):
+            if os.path.exists(path):
+                os.remove(path)
+        print(f"{len(new_rows)} lignes récupérées, {added} nouvelles: {len(merged)} lignes dans {output_json} et {output_csv}")
+        return
     print(f"Scraping terminé. Vérifiez les fichiers {output_json} et {output_csv}")
 
+def load_clutch_rows(path):
+    """Lignes d'un export JSON de box scores (liste vide si absent ou vide)"""
+    if not os.path.exists(path) or not os.path.getsize(path):
+        return []
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def clutch_game_id(row):
+    # Identifiant du match tiré de l'URL: /boxscores/202310240DEN.html
+    return (row.get('source_url') or '').rstrip('/').split('/')[-1].replace('.html', '')
+
+def clutch_rows_since(rows, season):
+    """Date ISO du dernier match d'une saison dans un export et matchs déjà présents à cette date"""
+    from basketball_scrapy_project.store import season_for_date
+    
+    # L'export peut contenir d'autres saisons: leur dernier match ne dit rien de celle-ci
+    dates = [
+        row['match_date'] for row in rows
+        if len(row.get('match_date') or '') == 8 and season_for_date(f"{row['match_date'][:4]}-{row['match_date'][4:6]}") == str(season)
+    ]
+    if not dates:
+        return None, set()
+    last = max(dates)
+    known_games = {clutch_game_id(row) for row in rows if row.get('match_date') == last}
+    return f"{last[:4]}-{last[4:6]}-{last[6:]}", known_games
+
+def merge_clutch_rows(existing, new_rows):
+    """Fusionne sur la clé (joueur, match, période): les nouvelles lignes remplacent les anciennes"""
+    def key(row):
+        return row.get('player_name'), clutch_game_id(row), row.get('quarter')
+    
+    merged = {key(row): row for row in existing}
+    added = 0
+    for row in new_rows:
+        added += key(row) not in merged
+        merged[key(row)] = row
+    return list(merged.values()), added
+
+def write_clutch_rows(rows, output_json, output_csv):
+    """Réécrit les exports JSON et CSV (écriture atomique)"""
+    import csv
+    
+    with open(f"{output_json}.tmp", 'w') as f:
+        json.dump(rows, f, indent=2)
+    with open(f"{output_csv}.tmp", 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(dict.fromkeys(field for row in rows for field in row)))
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(f"{output_json}.tmp", output_json)
+    os.replace(f"{output_csv}.tmp", output_csv)
+
 def scrape_shotchart(args):
-    """Exécute le spider pour les données de tirs d'un joueur"""
+    """Exécute le spider pour les données de tirs de joueurs, sur une ou plusieurs saisons"""
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.log import configure_logging
+    from basketball_scrapy_project.spiders.player_shooting_spider import PlayerShootingSpider, parse_seasons
+    
+    if not args.player_id and not args.teams:
+        print("Erreur: indiquer --player-id ou --teams")
+        return
+    seasons = args.seasons or args.season
+    
     # Configurer le logging
     configure_logging(install_root_handler=False)
     logging.basicConfig(
-        level=logging.DEBUG,
+        level=logging.INFO,
         format='%(asctime)s [%(name)s] %(levelname)s: %(message)s'
     )
     
     # Assurez-vous que le répertoire des caches existe
     os.makedirs('httpcache', exist_ok=True)
     
-    # Définir le nom de fichier de sortie
-    output_base = f"{args.player_id}_{args.season}_shotchart"
-    output_json = f"{output_base}.json"
-    output_csv = f"{output_base}.csv"
-    
-    # Nettoyer les fichiers de sortie existants pour éviter la confusion
-    if os.path.exists(output_json):
-        os.remove(output_json)
-    if os.path.exists(output_csv):
-        os.remove(output_csv)
-        
-    # Créer un fichier pour stocker les items pour debug
-    if os.path.exists('debug_items.json'):
-        os.remove('debug_items.json')
-    
-    print(f"Récupération des données de tirs pour le joueur ID: {args.player_id}, Saison: {args.season}")
+    players = args.player_id or f"joueurs des équipes {args.teams}"
+    print(f"Récupération des données de tirs ({players}), saisons: {', '.join(parse_seasons(seasons))}")
+    if not args.refresh:
+        print("Les saisons déjà en base sont ignorées (sauf la saison en cours); --refresh pour tout reprendre")
     
     # Obtenir les paramètres de base
-    settings = get_default_settings("DEBUG", "shotchart")
-    settings["FEEDS"] = {
-        output_json: {"format": "json"},
-        output_csv: {"format": "csv"}
-    }
+    settings = get_default_settings("INFO", "shotchart")
+    settings.update(crawl_options(args))
     
-    # Importer le spider dynamiquement pour éviter les imports inutiles
-    from basketball_scrapy_project.spiders.team_shooting_spider import TeamShootingSpider
-    
-    # Créer le processus de crawling
+    # Le spider ajoute un flux JSON par saison dans output_dir
     process = CrawlerProcess(settings=settings)
-    
-    # Lancer le spider
-    print(f"Lancement du scraping... Sortie vers {output_json} et {output_csv}")
-    process.crawl(TeamShootingSpider, player_id=args.player_id, season=args.season)
+    print(f"Lancement du scraping... Sortie vers {args.output_dir}/{{saison}}/")
+    process.crawl(PlayerShootingSpider, player_id=args.player_id, team_code=args.teams, seasons=seasons,
+                  refresh=str(args.refresh).lower(), output_dir=args.output_dir)
     process.start()
-    print(f"Scraping terminé. Vérifiez les fichiers {output_json} et {output_csv}")
+    print(f"Scraping terminé. Vérifiez le répertoire {args.output_dir}")
 
 def scrape_single_team(args):
     """Exécute le spider pour les données de tirs d'une équipe spécifique"""
@@ -193,6 +281,7 @@ def scrape_single_team(args):
     
     # Exécuter le spider Scrapy pour cette équipe
     command = f"scrapy crawl team_shooting -a team_code={team_code} -a season={season} -o \"{output_file}:json\""
+    command += setting_flags(crawl_options(args))
     
     try:
         result = subprocess.run(command, shell=True, check=False)
@@ -226,6 +315,8 @@ def scrape_team_shooting(args):
 
 def scrape_all_teams(args):
     """Récupère les données de tir pour toutes les équipes NBA"""
+    from basketball_scrapy_project.jobs import JobManifest, JobRunner, parse_since
+    
     try:
         with open(TEAMS_JSON_PATH, 'r') as f:
             teams = json.load(f)
@@ -240,8 +331,11 @@ def scrape_all_teams(args):
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
+    manifest = JobManifest(os.path.join(output_dir, 'manifest.json'))
+
     # Définir la fonction de scraping d'équipe avec contexte
     def scrape_team(team_code):
+        """Extrait une équipe; retourne (succès, nombre de tirs, message d'erreur)"""
         team_name = teams[team_code]['name']
         output_file = os.path.join(output_dir, f"{team_code.lower()}_shots_{args.season}.json")
         csv_file = os.path.join(output_dir, f"{team_code.lower()}_shots_{args.season}.csv")
@@ -251,36 +345,33 @@ def scrape_all_teams(args):
         
         print(f"Extraction des données pour {team_name} (saison {int(args.season)-1}-{args.season})...")
         
-        # Exécuter le spider Scrapy pour cette équipe avec format JSON
-        command = f"scrapy crawl team_shooting -a team_code={team_code} -a season={args.season} -o \"{output_file}:json\""
+        # Un seul crawl pour les deux formats; -O écrase les fichiers d'une tentative précédente
+        command = (f"scrapy crawl team_shooting -a team_code={team_code} -a season={args.season} "
+                   f"-O \"{output_file}:json\" -O \"{csv_file}:csv\"")
+        command += setting_flags(crawl_options(args))
+        
+        result = subprocess.run(command, shell=True, check=False, capture_output=True, text=True)
+        
+        if result.returncode != 0:
+            if result.stderr:
+                error_log = os.path.join(output_dir, f"{team_code.lower()}_error.log")
+                with open(error_log, 'w') as f:
+                    f.write(result.stderr)
+                print(f"Détails de l'erreur enregistrés dans {error_log}")
+            lines = [line for line in result.stderr.splitlines() if line.strip()]
+            return False, None, f"code {result.returncode}: {lines[-1].strip()[:200] if lines else 'aucune sortie'}"
         
         try:
-            result = subprocess.run(command, shell=True, check=False, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                print(f"Erreur lors de l'extraction des données pour {team_name}.")
-                print(f"Code d'erreur: {result.returncode}")
-                if result.stderr:
-                    error_log = os.path.join(output_dir, f"{team_code.lower()}_error.log")
-                    with open(error_log, 'w') as f:
-                        f.write(result.stderr)
-                    print(f"Détails de l'erreur enregistrés dans {error_log}")
-                return False
-                
-            print(f"Données extraites avec succès pour {team_name} -> {output_file}")
-            
-            # Générer également un fichier CSV (seulement si JSON a réussi)
-            if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-                csv_command = f"scrapy crawl team_shooting -a team_code={team_code} -a season={args.season} -o \"{csv_file}:csv\""
-                try:
-                    subprocess.run(csv_command, shell=True, check=False, capture_output=True)
-                except Exception as e:
-                    print(f"Avertissement: Impossible de créer le fichier CSV pour {team_name}: {e}")
-            
-            return True
-        except Exception as e:
-            print(f"Exception lors de l'extraction des données pour {team_name}: {e}")
-            return False
+            with open(output_file, 'r') as f:
+                shots = len(json.load(f))
+        except (OSError, json.JSONDecodeError) as e:
+            return False, None, f"fichier de sortie illisible: {e}"
+        if not shots:
+            # Crawl terminé sans erreur mais sans tirs (roster ou shot charts introuvables)
+            return False, 0, "aucun tir extrait"
+        
+        print(f"Données extraites avec succès pour {team_name} -> {output_file}")
+        return True, shots, None
 
     print(f"Début de l'extraction des données de tir pour toutes les équipes NBA - Saison {int(args.season)-1}-{args.season}")
     
@@ -290,72 +381,396 @@ def scrape_all_teams(args):
     # Option pour traiter une seule équipe à la fois (pour tests)
     if args.teams:
         team_codes = [code.strip().upper() for code in args.teams.split(',')]
+        unknown = [code for code in team_codes if code not in teams]
+        if unknown:
+            print(f"Codes d'équipe inconnus ignorés: {', '.join(unknown)}")
+            team_codes = [code for code in team_codes if code in teams]
         print(f"Mode équipes sélectionnées: {', '.join(team_codes)}")
     
-    success_count = 0
-    failed_teams = []
+    # Ne relancer que ce qui est nécessaire d'après le manifeste
+    if args.only_failed or args.since:
+        since = parse_since(args.since) if args.since else None
+        team_codes = manifest.select(team_codes, args.season, only_failed=args.only_failed, since=since)
+        print(f"Équipes à relancer d'après {manifest.path}: {', '.join(team_codes) or 'aucune'}")
+        if not team_codes:
+            return
     
     if args.parallel > 0:
         print(f"Mode parallèle activé avec {args.parallel} équipe(s) en simultané")
-        try:
-            with ThreadPoolExecutor(max_workers=args.parallel) as executor:
-                results = list(executor.map(scrape_team, team_codes))
-                success_count = sum(results)
-                failed_teams = [team_codes[i] for i, result in enumerate(results) if not result]
-        except KeyboardInterrupt:
-            print("\nInterruption par l'utilisateur. Arrêt des extractions en cours...")
-            print("Les données extraites jusqu'à présent seront conservées.")
-        except Exception as e:
-            print(f"\nErreur inattendue: {e}")
+        # Les pauses aléatoires de scrape_team suffisent à décaler les workers
+        runner = JobRunner(manifest, args.season, scrape_team, workers=args.parallel,
+                           retries=args.retries, backoff=args.backoff)
     else:
         print("Mode séquentiel activé (une équipe à la fois)")
-        try:
-            for team_code in team_codes:
-                if scrape_team(team_code):
-                    success_count += 1
-                else:
-                    failed_teams.append(team_code)
-                # Ajouter un délai entre les équipes pour éviter de surcharger le site
-                if team_code != team_codes[-1]:  # Pas de délai après la dernière équipe
-                    delay = random.uniform(3, 5)
-                    print(f"   Attente de {delay:.1f} secondes avant la prochaine équipe...")
-                    time.sleep(delay)
-        except KeyboardInterrupt:
-            print("\nInterruption par l'utilisateur. Arrêt des extractions en cours...")
-            print("Les données extraites jusqu'à présent seront conservées.")
-    
-    print(f"\nRésumé: {success_count}/{len(team_codes)} équipes extraites avec succès")
+        # Délai entre les équipes pour éviter de surcharger le site
+        runner = JobRunner(manifest, args.season, scrape_team, workers=1,
+                           retries=args.retries, backoff=args.backoff, pause=(3, 5))
+    
+    try:
+        done_teams, failed_teams = runner.run(team_codes)
+    except KeyboardInterrupt:
+        print("\nInterruption par l'utilisateur. Arrêt des extractions en cours...")
+        print("Les données extraites jusqu'à présent seront conservées; relancer avec --only-failed pour reprendre.")
+        return
+    
+    print(f"\nRésumé: {len(done_teams)}/{len(team_codes)} équipes extraites avec succès")
+    for team_code in failed_teams:
+        job = manifest.get(team_code, args.season)
+        print(f"Échec {team_code} après {job['attempts']} tentative(s): {job['error']}")
     if failed_teams:
-        print(f"Équipes en échec: {', '.join(failed_teams)}")
+        print(f"Pour relancer uniquement les équipes en échec: python scraper.py all-teams --season={args.season} --only-failed")
     print(f"Les fichiers ont été enregistrés dans le répertoire: {os.path.abspath(output_dir)}")
+    print(f"État des jobs: {manifest.path}")
+    
+    # Artefacts dérivés (fichiers nettoyés, combiné, joueurs, agrégats, grilles): seuls
+    # ceux dont les entrées ont changé sont reconstruits, pour toutes les équipes extraites
+    if not args.no_build:
+        print("Mise à jour des artefacts dérivés...")
+        build_artifacts(argparse.Namespace(season=args.season, source_dir=output_dir, output_dir=DATA_DIR,
+                                           jobs=None, cell_sizes='10,25,50', min_attempts=1,
+                                           force=False, dry_run=False))
+
+def build_artifacts(args):
+    """Reconstruit les artefacts dérivés périmés d'une saison (graphe de build)"""
+    from basketball_scrapy_project.build import BuildGraph
+
+    with open(TEAMS_JSON_PATH, 'r') as f:
+        team_names = {code: team['name'] for code, team in json.load(f).items()}
+    source_dir = args.source_dir or os.path.join(SCRIPT_DIR, f"team_shots_{args.season}")
+    if not os.path.isdir(source_dir):
+        print(f"Erreur: dossier source {source_dir} introuvable (lancer all-teams d'abord)")
+        return
+
+    graph = BuildGraph(source_dir, args.output_dir, args.season, team_names,
+                       cell_sizes=[int(size) for size in args.cell_sizes.split(',')],
+                       min_attempts=args.min_attempts)
+    if not graph.nodes:
+        print(f"Aucun fichier de tirs d'équipe dans {source_dir}")
+        return
+    start = time.perf_counter()
+    built, fresh = graph.build(jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+    elapsed = time.perf_counter() - start
+    if args.dry_run:
+        print(f"{len(built)} nœud(s) à reconstruire, {len(fresh)} à jour")
+    else:
+        print(f"{len(built)} nœud(s) reconstruit(s), {len(fresh)} à jour en {elapsed:.1f}s -> {args.output_dir}")
+
+def publish_data(args):
+    """Publie les données du frontend sous des noms par empreinte, précompressées (gzip, brotli)"""
+    from basketball_scrapy_project import publish
+
+    if args.clean:
+        publish.clean(args.data_dir)
+        print(f"Fichiers publiés et manifeste supprimés de {args.data_dir}")
+        return
+    if publish.brotli is None:
+        print("Module brotli absent: variantes gzip uniquement (pip install brotli)")
+
+    start = time.perf_counter()
+    manifest, compressed = publish.publish(args.data_dir, brotli_quality=args.brotli_quality)
+    elapsed = time.perf_counter() - start
+    rows = publish.size_report(manifest, args.parse_rate, args.parse_budget)
+    groups = publish.group_report(rows)
+
+    def size(value):
+        return f"{value / 1e6:.2f}" if value else '-'
+
+    print(f"\n{'Dossier':<28}{'Fichiers':>9}{'Brut (Mo)':>11}{'gzip (Mo)':>11}{'br (Mo)':>9}")
+    for group, totals in sorted(groups.items()):
+        print(f"{group:<28}{totals['files']:>9}{size(totals['raw_bytes']):>11}"
+              f"{size(totals['gzip_bytes']):>11}{size(totals['br_bytes']):>9}")
+    print(f"\n{'Artefact':<44}{'Brut (Mo)':>11}{'gzip (Mo)':>11}{'br (Mo)':>9}{'Parse (ms)':>12}")
+    for row in rows[:args.top]:
+        flag = '  > budget' if row['over_budget'] else ''
+        print(f"{row['artifact']:<44}{size(row['raw_bytes']):>11}{size(row['gzip_bytes']):>11}"
+              f"{size(row['br_bytes']):>9}{row['parse_ms']:>12.1f}{flag}")
+
+    over_budget = [row['artifact'] for row in rows if row['over_budget']]
+    report = {
+        'created_at': manifest['created_at'],
+        'parse_rate_mb': args.parse_rate,
+        'parse_budget_ms': args.parse_budget,
+        'groups': groups,
+        'artifacts': rows,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{len(rows)} artefacts publiés ({len(compressed)} recompressés) en {elapsed:.1f}s, "
+          f"manifeste: {os.path.join(args.data_dir, publish.MANIFEST_FILE)}, rapport: {args.report}")
+    if over_budget:
+        print(f"{len(over_budget)} artefact(s) au-delà du budget de parsing de {args.parse_budget:.0f} ms "
+              f"(à découper ou à servir par l'API): {', '.join(over_budget[:5])}{'...' if len(over_budget) > 5 else ''}")
+
+def import_feeds(args):
+    """Importe des fichiers JSON de tirs ou de statistiques clutch dans la base SQLite"""
+    from basketball_scrapy_project.enrich import enrich_rows
+    from basketball_scrapy_project.store import Store, normalize_clutch_stats, normalize_shot
+    
+    store = Store(args.db)
+    for path in args.files:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        # Fichier combiné all_teams_shots_XXXX.json: {"ATL": {"team_name": ..., "shots": [...]}}
+        if isinstance(data, dict):
+            data = [shot for team in data.values() for shot in team.get('shots', [])]
+        
+        shots, clutch_stats = [], []
+        for item in data:
+            if 'player_id' in item:
+                row = normalize_shot(item)
+                if row:
+                    shots.append(row)
+            else:
+                row = normalize_clutch_stats(item)
+                if row:
+                    clutch_stats.append(row)
+        
+        store.upsert_shots(enrich_rows(shots))
+        store.upsert_clutch_stats(clutch_stats)
+        print(f"{path}: {len(shots)} tirs et {len(clutch_stats)} lignes clutch importés "
+              f"({len(data) - len(shots) - len(clutch_stats)} ignorés)")
+    store.close()
+
+def enrich_store(args):
+    """Recalcule les champs dérivés (zones, chrono, écart au score, clutch) des tirs déjà en base"""
+    from basketball_scrapy_project.enrich import enrich_rows
+    from basketball_scrapy_project.store import SHOT_COLUMNS, Store
+    
+    if not os.path.exists(args.db):
+        print(f"Erreur: la base {args.db} n'existe pas (lancez un crawl ou 'scraper.py import' d'abord)")
+        return
+    
+    store = Store(args.db)
+    start = time.perf_counter()
+    rows = [dict(row) for row in store.execute(f"SELECT {', '.join(SHOT_COLUMNS)} FROM shots")]
+    for offset in range(0, len(rows), args.batch_size):
+        store.upsert_shots(enrich_rows(rows[offset:offset + args.batch_size]))
+    clutch = store.execute("SELECT COUNT(*) FROM shots WHERE is_clutch = 1")[0][0]
+    store.close()
+    print(f"{len(rows)} tirs enrichis ({clutch} en situation clutch) en {time.perf_counter() - start:.1f}s")
+
+def query_store(args):
+    """Interroge la base SQLite des tirs avec filtres et regroupements"""
+    from basketball_scrapy_project.query import build_shot_query, format_table, resolve_player_ids
+    from basketball_scrapy_project.store import Store
+    
+    if not os.path.exists(args.db):
+        print(f"Erreur: la base {args.db} n'existe pas (lancez un crawl ou 'scraper.py import' d'abord)")
+        return
+    
+    group_by = [key.strip() for key in args.group_by.split(',')] if args.group_by else []
+    unknown = [key for key in group_by if key not in GROUP_COLUMNS]
+    if unknown:
+        print(f"Erreur: regroupement inconnu: {', '.join(unknown)} (valeurs possibles: {', '.join(GROUP_COLUMNS)})")
+        return
     
-    # Générer un fichier JSON combiné avec toutes les équipes
-    print("Génération du fichier JSON combiné...")
-    combined_data = {}
-    for team_code in team_codes:
-        json_file = os.path.join(output_dir, f"{team_code.lower()}_shots_{args.season}.json")
-        if os.path.exists(json_file) and os.path.getsize(json_file) > 0:
+    store = Store(args.db)
+    start = time.perf_counter()
+    
+    filters = {
+        'team': args.team.upper() if args.team else None,
+        'season': args.season,
+        'date_from': args.date_from,
+        'date_to': args.date_to,
+        'quarter': args.quarter,
+        'shot_type': args.shot_type,
+        'min_distance': args.min_distance,
+        'max_distance': args.max_distance,
+        'made': args.made,
+        'zone': args.zone,
+        'clutch': args.clutch,
+        'aggregate': args.summary,
+    }
+    if args.player:
+        filters['player_ids'] = resolve_player_ids(store, args.player)
+        if not filters['player_ids']:
+            print(f"Aucun joueur ne correspond à '{args.player}'")
+            store.close()
+            return
+    
+    sql, params = build_shot_query(filters, group_by, args.limit)
+    cursor = store.connection.execute(sql, params)
+    columns = [description[0] for description in cursor.description]
+    rows = cursor.fetchall()
+    elapsed = time.perf_counter() - start
+    
+    if args.explain:
+        print(f"SQL: {sql}")
+        print(f"Paramètres: {params}")
+        for detail in store.explain(sql, params):
+            print(f"Plan: {detail}")
+        print()
+    
+    if args.output:
+        output_format = args.format or os.path.splitext(args.output)[1].lstrip('.').lower()
+        if output_format == 'csv':
+            import csv
+            with open(args.output, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                writer.writerows(rows)
+        elif output_format == 'json':
+            with open(args.output, 'w') as f:
+                json.dump([dict(zip(columns, row)) for row in rows], f, indent=2)
+        elif output_format == 'parquet':
             try:
-                with open(json_file, 'r') as f:
-                    team_data = json.load(f)
-                    combined_data[team_code] = {
-                        "team_name": teams[team_code]['name'],
-                        "shots": team_data
-                    }
-            except json.JSONDecodeError:
-                print(f"Impossible de charger le fichier {json_file} (format JSON invalide)")
-            except Exception as e:
-                print(f"Erreur lors du traitement du fichier {json_file}: {e}")
+                import pandas as pd
+            except ImportError:
+                print("Erreur: l'export Parquet nécessite pandas (et pyarrow)")
+                store.close()
+                return
+            pd.DataFrame([tuple(row) for row in rows], columns=columns).to_parquet(args.output, index=False)
+        else:
+            print(f"Erreur: format de sortie inconnu: {output_format} (csv, json ou parquet)")
+            store.close()
+            return
+        print(f"{len(rows)} lignes écrites dans {args.output}")
+    else:
+        print(format_table(columns, rows))
+    
+    print(f"\n{len(rows)} lignes en {elapsed * 1000:.1f} ms")
+    store.close()
+
+def build_shot_grids(args):
+    """Précalcule les grilles spatiales de tirs (joueurs, équipes, ligue) pour le shot chart"""
+    from basketball_scrapy_project.grids import build_grids, load_shot_arrays, write_grids
+    from basketball_scrapy_project.store import Store
+    
+    if not os.path.exists(args.db):
+        print(f"Erreur: la base {args.db} n'existe pas (lancez un crawl ou 'scraper.py import' d'abord)")
+        return
+    
+    cell_sizes = [int(size) for size in args.cell_sizes.split(',')]
+    store = Store(args.db)
+    start = time.perf_counter()
+    shots = load_shot_arrays(store, args.season)
+    store.close()
+    if not len(shots['x']):
+        print("Aucun tir dans la base pour ces critères")
+        return
+    
+    grids = build_grids(shots, cell_sizes, args.min_attempts)
+    written = write_grids(grids, args.output_dir, args.season)
+    elapsed = time.perf_counter() - start
+    print(f"{len(shots['x'])} tirs regroupés en {written} fichiers de grilles "
+          f"(cellules de {', '.join(map(str, cell_sizes))} px) dans {args.output_dir} en {elapsed:.1f}s")
+
+def build_clutch_leaderboard(args):
+    """Met à jour les totaux clutch avec les nouveaux matchs et écrit le classement"""
+    from basketball_scrapy_project.leaderboard import build_leaderboard, update_totals, write_leaderboard
+    from basketball_scrapy_project.store import Store
     
-    if combined_data:
-        combined_file = os.path.join(output_dir, f"all_teams_shots_{args.season}.json")
-        with open(combined_file, 'w') as f:
-            json.dump(combined_data, f, indent=2)
-        print(f"Fichier combiné créé: {combined_file}")
+    if not os.path.exists(args.db):
+        print(f"Erreur: la base {args.db} n'existe pas (lancez un crawl ou 'scraper.py import' d'abord)")
+        return
+    
+    store = Store(args.db)
+    start = time.perf_counter()
+    games, players = update_totals(store, rebuild=args.rebuild)
+    leaderboard = build_leaderboard(store, args.season, args.min_matches)
+    store.close()
+    
+    output = args.output or os.path.join(
+        SCRIPT_DIR, 'frontend_basketball_scrapy', 'public', 'data', f"clutch_leaderboard_{args.season or 'all'}.json"
+    )
+    write_leaderboard(leaderboard, output)
+    print(f"{games} nouveaux matchs agrégés ({players} joueurs mis à jour), "
+          f"{len(leaderboard)} joueurs classés dans {output} en {time.perf_counter() - start:.2f}s")
+    columns = ['rank', 'player_name', 'team', 'matches', 'points', 'true_shooting_pct', 'clutchScore']
+    print(leaderboard[columns].head(args.top).to_string(index=False))
+
+def serve_api(args):
+    """Lance l'API HTTP locale qui sert la base SQLite au dashboard"""
+    from basketball_scrapy_project.api import create_server
+    
+    if not os.path.exists(args.db):
+        print(f"Erreur: la base {args.db} n'existe pas (lancez un crawl ou 'scraper.py import' d'abord)")
+        return
+    
+    server = create_server(args.db, args.host, args.port, args.cache_size)
+    print(f"API disponible sur http://{args.host}:{args.port}/api (Ctrl+C pour arrêter)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def serve_replay(args):
+    """Lance le serveur local qui rejoue des pages enregistrées (cache HTTP, fixtures)"""
+    from basketball_scrapy_project.replay import FaultInjector, create_replay_server
+    
+    faults = FaultInjector(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        burst_every=args.burst_every, burst_size=args.burst_size, retry_after=args.retry_after, seed=args.seed,
+    )
+    try:
+        server = create_replay_server(args.host, args.port, args.cache_dir, args.fixtures, faults)
+    except ValueError as e:
+        print(f"Erreur: {e}")
+        return
+    print(f"{len(server.pages)} pages du cache HTTP et {len(server.routes)} motifs de fixtures rejoués")
+    print(f"Serveur de rejeu sur {server.base_url} (Ctrl+C pour arrêter)")
+    print(f"Crawler avec: scrapy crawl boxscore -s SITE_BASE_URL={server.base_url} -s HTTPCACHE_ENABLED=False")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Requêtes servies: {dict(server.stats)}")
+
+def run_workers(args):
+    """Lance des workers qui se partagent la file de requêtes et le débit (frontière SQLite)"""
+    from basketball_scrapy_project.frontier import Frontier
+    
+    frontier_path = os.path.abspath(args.frontier)
+    frontier = Frontier(frontier_path)
+    if args.reset:
+        frontier.reset(args.spider)
+        print(f"File et dupefilter de {args.spider} réinitialisés dans {frontier_path}")
+    
+    command = [sys.executable, '-m', 'scrapy', 'crawl', args.spider]
+    if args.spider == 'boxscore':
+        command += ['-a', f'season={args.season}', '-a', f'full_season={args.full_season}']
     else:
-        print("Aucune donnée valide trouvée pour créer le fichier combiné")
+        if args.teams:
+            team_codes = [code.strip().upper() for code in args.teams.split(',')]
+        else:
+            with open(TEAMS_JSON_PATH, 'r') as f:
+                team_codes = list(json.load(f).keys())
+        command += ['-a', f"team_code={','.join(team_codes)}", '-a', f'season={args.season}']
+    
+    # Le débit est limité globalement par le seau à jetons, plus par chaque worker
+    settings = {
+        "SCHEDULER": "basketball_scrapy_project.frontier.SharedScheduler",
+        "FRONTIER_PATH": frontier_path,
+        "FRONTIER_RATE": args.rate,
+        "FRONTIER_BURST": args.burst,
+        "DOWNLOAD_DELAY": 0,
+        "AUTOTHROTTLE_ENABLED": False,
+    }
+    settings.update(crawl_options(args))
+    settings.update(item.split('=', 1) for item in args.set)
+    for key, value in settings.items():
+        command += ['-s', f"{key}={value}"]
+    
+    print(f"{args.workers} worker(s) {args.spider} sur {frontier_path} ({args.rate} requête(s)/s au plus pour tous les workers)")
+    workers = [subprocess.Popen(command, cwd=SCRIPT_DIR) for _ in range(args.workers)]
+    try:
+        codes = [worker.wait() for worker in workers]
+    except KeyboardInterrupt:
+        print("\nInterruption: les requêtes en cours sont rendues à la file (reprise sans --reset)")
+        codes = [worker.wait() for worker in workers]
+    
+    counts = frontier.counts(args.spider)
+    frontier.close()
+    print(f"Workers terminés (codes de sortie: {codes}); file {args.spider}: "
+          + ', '.join(f"{count} {state}" for state, count in sorted(counts.items())))
 
-def main():
+def main(argv=None):
     # Créer le parser principal
     parser = argparse.ArgumentParser(description='NBA Data Scraping Tool')
     subparsers = parser.add_subparsers(dest='command', help='Commande à exécuter')
@@ -364,15 +779,35 @@ def main():
     boxscore_parser = subparsers.add_parser('boxscore', help='Récupérer les statistiques de match')
     boxscore_parser.add_argument('--full-season', action='store_true', 
                        help='Récupère la saison complète sans limites de matchs/mois')
+    boxscore_parser.add_argument('--season', type=str,
+                         help='Saison (ex: 2024 pour la saison 2023-2024, défaut: celle du spider)')
+    boxscore_parser.add_argument('--incremental', action='store_true',
+                         help='Uniquement les matchs joués depuis le dernier match connu, fusionnés avec la sortie existante')
     boxscore_parser.add_argument('--output', type=str, default='clutch_stats',
                        help='Nom de base pour les fichiers de sortie (sans extension)')
+    boxscore_parser.add_argument('--trace', action='store_true',
+                       help='Écrire une trace par requête (Chrome trace / Perfetto) dans traces/')
+    boxscore_parser.add_argument('--profile', action='store_true',
+                       help='Profiler callbacks, pipelines et export (cProfile, tracemalloc) dans profiles/')
+    boxscore_parser.add_argument('--parse-processes', type=int, default=0,
+                       help='Parser les box scores dans N processus (défaut: 0, dans le processus du crawl)')
     
     # Sous-commande pour les données de tirs d'un joueur (shotchart)
-    shotchart_parser = subparsers.add_parser('shotchart', help='Récupérer les données de tirs d\'un joueur')
-    shotchart_parser.add_argument('--player-id', type=str, required=True,
-                         help='ID du joueur (ex: gilgesh01 pour Shai Gilgeous-Alexander)')
+    shotchart_parser = subparsers.add_parser('shotchart', help='Récupérer les données de tirs de joueurs sur une ou plusieurs saisons')
+    shotchart_parser.add_argument('--player-id', type=str,
+                         help='ID du ou des joueurs, séparés par des virgules (ex: gilgesh01 pour Shai Gilgeous-Alexander)')
+    shotchart_parser.add_argument('--teams', type=str,
+                         help='Codes d\'équipes dont les joueurs des saisons demandées sont récupérés (ex: GSW,BOS)')
     shotchart_parser.add_argument('--season', type=str, default=str(DEFAULT_SEASON),
                          help=f'Saison (ex: {DEFAULT_SEASON} pour la saison {DEFAULT_SEASON-1}-{DEFAULT_SEASON})')
+    shotchart_parser.add_argument('--seasons', type=str,
+                         help='Plage ou liste de saisons, prioritaire sur --season (ex: 2016-2024 ou 2019,2022)')
+    shotchart_parser.add_argument('--refresh', action='store_true',
+                         help='Reprendre aussi les saisons déjà présentes dans la base')
+    shotchart_parser.add_argument('--output-dir', type=str, default='player_shots',
+                         help='Répertoire de sortie, un sous-répertoire par saison (défaut: player_shots)')
+    shotchart_parser.add_argument('--parse-processes', type=int, default=0,
+                         help='Parser les pages de shooting dans N processus (défaut: 0, dans le processus du crawl)')
     
     # Sous-commande pour les données de tirs d'une équipe (team)
     team_parser = subparsers.add_parser('team', help='Récupérer les données de tirs d\'une équipe')
@@ -380,6 +815,12 @@ def main():
                     help='Code de l\'équipe (ex: LAL, BOS)')
     team_parser.add_argument('--season', type=str, default=str(DEFAULT_SEASON),
                     help=f'Saison (ex: {DEFAULT_SEASON} pour la saison {DEFAULT_SEASON-1}-{DEFAULT_SEASON})')
+    team_parser.add_argument('--trace', action='store_true',
+                    help='Écrire une trace par requête (Chrome trace / Perfetto) dans traces/')
+    team_parser.add_argument('--profile', action='store_true',
+                    help='Profiler callbacks, pipelines et export (cProfile, tracemalloc) dans profiles/')
+    team_parser.add_argument('--parse-processes', type=int, default=0,
+                    help='Parser les pages de shooting dans N processus (défaut: 0, dans le processus du crawl)')
     
     # Sous-commande pour les données de tirs de toutes les équipes (all-teams)
     all_teams_parser = subparsers.add_parser('all-teams', help='Récupérer les données de tirs de toutes les équipes')
@@ -391,8 +832,183 @@ def main():
                          help='Nombre de workers pour l\'exécution parallèle (max 3, défaut: 1)')
     all_teams_parser.add_argument('--teams', type=str,
                          help='Liste des codes d\'équipes à traiter, séparés par des virgules (ex: LAL,BOS,GSW)')
+    all_teams_parser.add_argument('--retries', type=int, default=2,
+                         help='Nouvelles tentatives par équipe en échec, en fin de file (défaut: 2)')
+    all_teams_parser.add_argument('--backoff', type=float, default=30.0,
+                         help='Délai avant la première nouvelle tentative, doublé ensuite (secondes, défaut: 30)')
+    all_teams_parser.add_argument('--only-failed', action='store_true',
+                         help='Relancer uniquement les équipes en échec ou interrompues d\'après le manifeste')
+    all_teams_parser.add_argument('--since', type=str,
+                         help='Relancer les équipes non terminées depuis une date (2024-03-01) ou une durée (12h, 2d)')
+    all_teams_parser.add_argument('--trace', action='store_true',
+                         help='Écrire une trace par requête et par équipe (Chrome trace / Perfetto) dans traces/')
+    all_teams_parser.add_argument('--profile', action='store_true',
+                         help='Profiler callbacks, pipelines et export de chaque équipe (cProfile, tracemalloc) dans profiles/')
+    all_teams_parser.add_argument('--parse-processes', type=int, default=0,
+                         help='Parser les pages de shooting de chaque équipe dans N processus (défaut: 0)')
+    all_teams_parser.add_argument('--no-build', action='store_true',
+                         help='Ne pas mettre à jour les artefacts dérivés (commande build) après le run')
+    
+    # Sous-commande pour reconstruire les artefacts dérivés d'une saison (build)
+    build_parser = subparsers.add_parser('build', help='Reconstruire les artefacts dérivés périmés (combiné, joueurs, agrégats, grilles)')
+    build_parser.add_argument('--season', type=str, default=str(DEFAULT_SEASON),
+                     help=f'Saison (ex: {DEFAULT_SEASON})')
+    build_parser.add_argument('--source-dir', type=str,
+                     help='Dossier des fichiers bruts par équipe (défaut: team_shots_{saison})')
+    build_parser.add_argument('--output-dir', type=str, default=DATA_DIR,
+                     help='Dossier des artefacts (défaut: données du frontend)')
+    build_parser.add_argument('--jobs', type=int,
+                     help='Processus pour les nœuds indépendants (défaut: nombre de CPU)')
+    build_parser.add_argument('--cell-sizes', type=str, default='10,25,50',
+                     help='Tailles de cellule des grilles en pixels, séparées par des virgules')
+    build_parser.add_argument('--min-attempts', type=int, default=1,
+                     help='Nombre minimal de tirs pour garder une cellule dans les grilles joueur/équipe')
+    build_parser.add_argument('--force', action='store_true',
+                     help='Tout reconstruire, même les nœuds à jour')
+    build_parser.add_argument('--dry-run', action='store_true',
+                     help='Lister les nœuds périmés sans rien construire')
+    
+    # Sous-commande pour publier les données du frontend (publish)
+    publish_parser = subparsers.add_parser('publish', help='Publier les données du frontend précompressées et nommées par empreinte')
+    publish_parser.add_argument('--data-dir', type=str, default=DATA_DIR,
+                     help='Dossier des données du frontend (défaut: frontend_basketball_scrapy/public/data)')
+    publish_parser.add_argument('--brotli-quality', type=int, default=11,
+                     help='Qualité brotli, de 0 à 11 (défaut: 11)')
+    publish_parser.add_argument('--parse-rate', type=float, default=50.0,
+                     help='Débit de JSON.parse estimé pour le rapport, en Mo/s (défaut: 50)')
+    publish_parser.add_argument('--parse-budget', type=float, default=200.0,
+                     help='Budget de parsing par artefact, en ms (défaut: 200)')
+    publish_parser.add_argument('--report', type=str, default=os.path.join(SCRIPT_DIR, 'publish_report.json'),
+                     help='Fichier du rapport de tailles (JSON)')
+    publish_parser.add_argument('--top', type=int, default=15,
+                     help='Nombre d\'artefacts affichés dans le rapport (défaut: 15)')
+    publish_parser.add_argument('--clean', action='store_true',
+                     help='Supprimer les fichiers publiés et le manifeste')
+    
+    # Sous-commande pour importer des fichiers JSON existants dans la base SQLite (import)
+    import_parser = subparsers.add_parser('import', help='Importer des fichiers JSON extraits dans la base SQLite')
+    import_parser.add_argument('files', nargs='+',
+                      help='Fichiers JSON de tirs, de statistiques clutch ou fichier combiné all_teams_shots_XXXX.json')
+    import_parser.add_argument('--db', type=str, default=os.path.join(SCRIPT_DIR, 'basketball.db'),
+                      help='Chemin de la base SQLite')
+    
+    # Sous-commande pour recalculer les champs dérivés des tirs en base (enrich)
+    enrich_parser = subparsers.add_parser('enrich', help='Recalculer zones, chrono, écart au score et clutch des tirs en base')
+    enrich_parser.add_argument('--db', type=str, default=os.path.join(SCRIPT_DIR, 'basketball.db'),
+                      help='Chemin de la base SQLite')
+    enrich_parser.add_argument('--batch-size', type=int, default=50000,
+                      help='Nombre de tirs enrichis et écrits par transaction')
+    
+    # Sous-commande pour interroger la base des tirs (query)
+    query_parser = subparsers.add_parser('query', help='Interroger la base SQLite des tirs')
+    query_parser.add_argument('--db', type=str, default=os.path.join(SCRIPT_DIR, 'basketball.db'),
+                     help='Chemin de la base SQLite')
+    query_parser.add_argument('--player', type=str,
+                     help='ID (ex: c/curryst01) ou partie du nom du joueur')
+    query_parser.add_argument('--team', type=str, help='Code de l\'équipe (ex: GSW)')
+    query_parser.add_argument('--season', type=str, help='Saison (ex: 2024)')
+    query_parser.add_argument('--from', dest='date_from', type=str, help='Date de début (AAAA-MM-JJ)')
+    query_parser.add_argument('--to', dest='date_to', type=str, help='Date de fin (AAAA-MM-JJ)')
+    query_parser.add_argument('--quarter', type=str, help='Quart-temps (ex: 4, Q4 ou 4th)')
+    query_parser.add_argument('--shot-type', type=int, choices=[2, 3], help='Tirs à 2 ou 3 points')
+    query_parser.add_argument('--min-distance', type=int, help='Distance minimale (pieds)')
+    query_parser.add_argument('--max-distance', type=int, help='Distance maximale (pieds)')
+    made_group = query_parser.add_mutually_exclusive_group()
+    made_group.add_argument('--made', dest='made', action='store_true', default=None, help='Tirs réussis uniquement')
+    made_group.add_argument('--missed', dest='made', action='store_false', help='Tirs manqués uniquement')
+    query_parser.add_argument('--zone', type=str,
+                     choices=['restricted_area', 'paint', 'mid_range', 'corner_3', 'above_break_3'],
+                     help='Zone du terrain')
+    query_parser.add_argument('--clutch', action='store_true',
+                     help='Tirs en situation clutch uniquement (5 dernières minutes, écart <= 5)')
+    query_parser.add_argument('--group-by', type=str,
+                     help=f'Regroupements séparés par des virgules ({", ".join(GROUP_COLUMNS)})')
+    query_parser.add_argument('--summary', action='store_true',
+                     help='Tentatives, tirs réussis et pourcentage sans regroupement')
+    query_parser.add_argument('--limit', type=int, help='Nombre maximal de lignes')
+    query_parser.add_argument('--output', type=str, help='Fichier de sortie (.csv, .json ou .parquet)')
+    query_parser.add_argument('--format', type=str, choices=['csv', 'json', 'parquet'],
+                     help='Format de sortie (déduit de l\'extension par défaut)')
+    query_parser.add_argument('--explain', action='store_true',
+                     help='Affiche la requête SQL et les index utilisés')
+    
+    # Sous-commande pour précalculer les grilles de tirs du shot chart (grids)
+    grids_parser = subparsers.add_parser('grids', help='Précalculer les grilles spatiales de tirs pour le shot chart')
+    grids_parser.add_argument('--db', type=str, default=os.path.join(SCRIPT_DIR, 'basketball.db'),
+                     help='Chemin de la base SQLite')
+    grids_parser.add_argument('--season', type=str, help='Saison (ex: 2024, toutes par défaut)')
+    grids_parser.add_argument('--cell-sizes', type=str, default='10,25,50',
+                     help='Tailles de cellule en pixels, séparées par des virgules')
+    grids_parser.add_argument('--min-attempts', type=int, default=1,
+                     help='Nombre minimal de tirs pour garder une cellule dans les grilles joueur/équipe')
+    grids_parser.add_argument('--output-dir', type=str,
+                     default=os.path.join(SCRIPT_DIR, 'frontend_basketball_scrapy', 'public', 'data', 'grids'),
+                     help='Dossier de sortie des grilles')
+    
+    # Sous-commande pour le classement clutch (leaderboard)
+    leaderboard_parser = subparsers.add_parser('leaderboard', help='Calculer le classement clutch à partir des box scores en base')
+    leaderboard_parser.add_argument('--db', type=str, default=os.path.join(SCRIPT_DIR, 'basketball.db'),
+                           help='Chemin de la base SQLite')
+    leaderboard_parser.add_argument('--season', type=str, help='Saison (ex: 2024, toutes par défaut)')
+    leaderboard_parser.add_argument('--min-matches', type=int, default=20,
+                           help='Nombre minimal de matchs pour être classé')
+    leaderboard_parser.add_argument('--output', type=str,
+                           help='Fichier JSON du classement (défaut: public/data/clutch_leaderboard_{saison}.json du frontend)')
+    leaderboard_parser.add_argument('--rebuild', action='store_true',
+                           help='Recalculer tous les totaux au lieu de n\'ajouter que les nouveaux matchs')
+    leaderboard_parser.add_argument('--top', type=int, default=10, help='Nombre de joueurs affichés')
+    
+    # Sous-commande pour servir la base au dashboard (serve)
+    serve_parser = subparsers.add_parser('serve', help='Lancer l\'API locale utilisée par le dashboard')
+    serve_parser.add_argument('--db', type=str, default=os.path.join(SCRIPT_DIR, 'basketball.db'),
+                     help='Chemin de la base SQLite')
+    serve_parser.add_argument('--host', type=str, default='127.0.0.1', help='Adresse d\'écoute')
+    serve_parser.add_argument('--port', type=int, default=8000, help='Port d\'écoute')
+    serve_parser.add_argument('--cache-size', type=int, default=256,
+                     help='Nombre de réponses gardées en cache mémoire')
+    
+    # Sous-commande pour lancer des workers sur une frontière partagée (worker)
+    worker_parser = subparsers.add_parser('worker', help='Crawler avec plusieurs workers partageant file de requêtes et débit')
+    worker_parser.add_argument('--spider', choices=['boxscore', 'team_shooting'], default='boxscore',
+                      help='Spider à exécuter (défaut: boxscore)')
+    worker_parser.add_argument('--season', type=str, default=str(DEFAULT_SEASON),
+                      help=f'Saison (ex: {DEFAULT_SEASON} pour la saison {DEFAULT_SEASON-1}-{DEFAULT_SEASON})')
+    worker_parser.add_argument('--full-season', action='store_true',
+                      help='boxscore: saison complète sans limites de matchs/mois')
+    worker_parser.add_argument('--teams', type=str,
+                      help='team_shooting: codes d\'équipes séparés par des virgules (défaut: toutes)')
+    worker_parser.add_argument('--workers', type=int, default=1,
+                      help='Nombre de workers lancés sur cette machine (défaut: 1)')
+    worker_parser.add_argument('--frontier', type=str, default=os.path.join(SCRIPT_DIR, 'frontier.db'),
+                      help='Base SQLite partagée par les workers (file, dupefilter, débit)')
+    worker_parser.add_argument('--rate', type=float, default=0.2,
+                      help='Requêtes par seconde vers le site pour l\'ensemble des workers (défaut: 0.2)')
+    worker_parser.add_argument('--burst', type=int, default=1,
+                      help='Requêtes pouvant partir ensemble après une période calme (défaut: 1)')
+    worker_parser.add_argument('--reset', action='store_true',
+                      help='Vider la file et le dupefilter du spider avant de commencer (sinon reprise)')
+    worker_parser.add_argument('--parse-processes', type=int, default=0,
+                      help='Parser les pages dans N processus par worker (défaut: 0)')
+    worker_parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                      help='Setting Scrapy supplémentaire pour chaque worker')
+    
+    # Sous-commande pour rejouer des pages enregistrées en local (replay)
+    replay_parser = subparsers.add_parser('replay', help='Rejouer des pages enregistrées sur un serveur local (benchmarks)')
+    replay_parser.add_argument('--host', type=str, default='127.0.0.1', help='Adresse d\'écoute')
+    replay_parser.add_argument('--port', type=int, default=8800, help='Port d\'écoute')
+    replay_parser.add_argument('--cache-dir', type=str, default=os.path.join(SCRIPT_DIR, 'httpcache'),
+                      help='Cache HTTP de Scrapy à rejouer (réponses exactes par URL)')
+    replay_parser.add_argument('--fixtures', type=str, default=os.path.join(SCRIPT_DIR, 'benchmarks', 'fixtures'),
+                      help='Dossier de fixtures avec routes.json (une page par motif de chemin)')
+    replay_parser.add_argument('--latency', type=float, default=0.0, help='Latence ajoutée à chaque réponse (secondes)')
+    replay_parser.add_argument('--jitter', type=float, default=0.0, help='Latence aléatoire supplémentaire maximale (secondes)')
+    replay_parser.add_argument('--error-rate', type=float, default=0.0, help='Proportion de réponses 500/502/503')
+    replay_parser.add_argument('--burst-every', type=int, default=0, help='Une rafale de 429 toutes les N requêtes (0: aucune)')
+    replay_parser.add_argument('--burst-size', type=int, default=3, help='Nombre de 429 consécutifs par rafale')
+    replay_parser.add_argument('--retry-after', type=int, default=1, help='En-tête Retry-After des 429 (secondes)')
+    replay_parser.add_argument('--seed', type=int, default=0, help='Graine des tirages (latence, erreurs)')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Traiter la commande
     if args.command == 'boxscore':
@@ -408,6 +1024,26 @@ def main():
         # Limiter le nombre de workers à 3
         args.parallel = min(3, max(0, args.parallel))
         scrape_all_teams(args)
+    elif args.command == 'build':
+        build_artifacts(args)
+    elif args.command == 'publish':
+        publish_data(args)
+    elif args.command == 'import':
+        import_feeds(args)
+    elif args.command == 'enrich':
+        enrich_store(args)
+    elif args.command == 'query':
+        query_store(args)
+    elif args.command == 'grids':
+        build_shot_grids(args)
+    elif args.command == 'leaderboard':
+        build_clutch_leaderboard(args)
+    elif args.command == 'serve':
+        serve_api(args)
+    elif args.command == 'replay':
+        serve_replay(args)
+    elif args.command == 'worker':
+        run_workers(args)
     else:
         parser.print_help()
 
@@ -0,0 +1,33 @@
+import json
+import os
+
+from basketball_scrapy_project.debugcapture import DebugWriter
+
+
+def _run(directory, max_bytes, snapshots):
+    writer = DebugWriter(str(directory), rotate_bytes=1024 * 1024, max_bytes=max_bytes, flush_interval=0.01)
+    writer.start()
+    for reason, body in snapshots:
+        writer.submit('snapshot', {'reason': reason, 'url': 'http://test/', 'status': 200, 'body': body})
+    writer.close()
+    return writer
+
+
+def test_limit_covers_previous_runs(tmp_path):
+    first = _run(tmp_path / 'boxscore_1', 10 ** 6, [('roster_empty', os.urandom(2000))])
+    assert first.counts['snapshots'] == 1
+
+    second = _run(tmp_path / 'boxscore_2', 3000, [('roster_empty', os.urandom(2000))])
+    assert second.counts['removed_runs'] == 1
+    assert not (tmp_path / 'boxscore_1').exists()
+    assert (tmp_path / 'boxscore_2' / 'snapshots.json').exists()
+
+
+def test_index_marks_removed_snapshots(tmp_path):
+    writer = _run(tmp_path / 'run', 3000, [('first', os.urandom(2000)), ('second', os.urandom(2000))])
+    assert writer.counts['removed_files'] == 1
+
+    with open(tmp_path / 'run' / 'snapshots.json') as f:
+        first, second = json.load(f)
+    assert first['removed'] and 'file' not in first
+    assert (tmp_path / 'run' / second['file']).exists()
@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+from scrapy import Request, Spider
+from scrapy.utils.test import get_crawler
+from twisted.internet.error import ConnectionRefusedError
+
+from basketball_scrapy_project.frontier import FrontierAckMiddleware, SharedScheduler
+
+
+class DummySpider(Spider):
+    name = 'dummy'
+
+
+@pytest.fixture
+def crawler(tmp_path):
+    return get_crawler(DummySpider, {
+        'SCHEDULER': 'basketball_scrapy_project.frontier.SharedScheduler',
+        'FRONTIER_PATH': str(tmp_path / 'frontier.db'),
+        'FRONTIER_LEASE_SECONDS': 600,
+    })
+
+
+@pytest.fixture
+def scheduler(crawler):
+    crawler.spider = DummySpider()
+    scheduler = SharedScheduler.from_crawler(crawler)
+    scheduler.open(crawler.spider)
+    yield scheduler
+    scheduler.close('finished')
+
+
+def states(scheduler):
+    return dict(scheduler.frontier.connection.execute('SELECT url, state FROM queue').fetchall())
+
+
+def test_abandoned_download_is_failed_without_waiting_for_the_lease(crawler, scheduler):
+    scheduler.enqueue_request(Request('http://127.0.0.1:1/page'))
+    request = scheduler.next_request()
+    assert states(scheduler) == {'http://127.0.0.1:1/page': 'leased'}
+
+    # RetryMiddleware a abandonné: l'exception atteint le middleware de la frontière
+    middleware = FrontierAckMiddleware.from_crawler(crawler)
+    assert middleware.process_exception(request, ConnectionRefusedError(), crawler.spider) is None
+
+    assert states(scheduler) == {'http://127.0.0.1:1/page': 'failed'}
+    assert not scheduler.has_pending_requests()
+
+
+def test_writes_are_deferred_while_another_worker_holds_the_lock(crawler, scheduler):
+    other = sqlite3.connect(crawler.settings['FRONTIER_PATH'], isolation_level=None)
+    other.execute('BEGIN IMMEDIATE')
+    try:
+        assert scheduler.enqueue_request(Request('http://example.com/a'))
+        assert scheduler.has_pending_requests()
+        assert scheduler.next_request() is None
+    finally:
+        other.execute('ROLLBACK')
+        other.close()
+
+    request = scheduler.next_request()
+    assert request.url == 'http://example.com/a'
+    assert states(scheduler) == {'http://example.com/a': 'leased'}
@@ -0,0 +1,19 @@
+from scraper import clutch_rows_since
+from basketball_scrapy_project.spiders.boxscore_spider import BoxScoreSpider
+
+
+def test_since_ignores_other_seasons():
+    rows = [
+        {'match_date': '20240410', 'source_url': '/boxscores/202404100BOS.html'},
+        {'match_date': '20241105', 'source_url': '/boxscores/202411050LAL.html'},
+    ]
+    assert clutch_rows_since(rows, '2024') == ('2024-04-10', {'202404100BOS'})
+    assert clutch_rows_since(rows, '2023') == (None, set())
+
+
+def test_known_games_from_command_line():
+    spider = BoxScoreSpider(incremental='true', known_games='202310240DEN,202310240LAL')
+    assert spider.known_games == {'202310240DEN', '202310240LAL'}
+    spider.base_url = 'http://127.0.0.1:8800'
+    requests = list(spider.start_requests())
+    assert requests and all(request.meta['dont_cache'] for request in requests)
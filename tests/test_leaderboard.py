@@ -0,0 +1,46 @@
+from basketball_scrapy_project.leaderboard import build_leaderboard, update_totals
+from basketball_scrapy_project.store import Store
+
+
+def _row(player_name, game_id, quarter, points):
+    return {
+        'player_name': player_name, 'team': 'GSW', 'season': '2024', 'game_id': game_id,
+        'match_date': '2023-10-24', 'quarter': quarter, 'minutes': '6:00', 'points': points,
+        'field_goals': 0, 'field_goal_attempts': 0, 'free_throws': 0, 'free_throw_attempts': 0,
+        'three_point_field_goals': 0, 'three_point_field_goal_attempts': 0, 'rebounds': 0, 'assists': 0,
+        'steals': 0, 'blocks': 0, 'turnovers': 0, 'personal_fouls': 0, 'source_url': None,
+    }
+
+
+def _totals(store):
+    board = build_leaderboard(store, '2024')
+    return dict(zip(board['player_name'], board['total_points']))
+
+
+def test_rows_added_to_a_processed_game_reach_the_totals(tmp_path):
+    store = Store(str(tmp_path / 'test.db'))
+    store.upsert_clutch_stats([_row('Stephen Curry', '202310240GSW', 'Q4', 8), _row('Stephen Curry', '202310270GSW', 'Q4', 5)])
+    assert update_totals(store) == (2, 1)
+    assert _totals(store) == {'Stephen Curry': 13}
+
+    # Prolongation et joueur importés après coup pour un match déjà agrégé
+    store.upsert_clutch_stats([_row('Stephen Curry', '202310240GSW', 'OT', 4), _row('Klay Thompson', '202310240GSW', 'Q4', 3)])
+    update_totals(store)
+    assert _totals(store) == {'Stephen Curry': 17, 'Klay Thompson': 3}
+
+    assert update_totals(store) == (0, 0)
+    assert _totals(store) == {'Stephen Curry': 17, 'Klay Thompson': 3}
+    store.close()
+
+
+def test_corrected_rows_reach_the_totals(tmp_path):
+    store = Store(str(tmp_path / 'test.db'))
+    store.upsert_clutch_stats([_row('Stephen Curry', '202310240GSW', 'Q4', 8)])
+    update_totals(store)
+    assert _totals(store) == {'Stephen Curry': 8}
+
+    # Nouveau crawl du box score corrigé: l'upsert met à jour la ligne sans changer son rowid
+    store.upsert_clutch_stats([_row('Stephen Curry', '202310240GSW', 'Q4', 10)])
+    assert update_totals(store) == (1, 1)
+    assert _totals(store) == {'Stephen Curry': 10}
+    store.close()
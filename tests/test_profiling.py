@@ -0,0 +1,49 @@
+import asyncio
+import pstats
+
+from scrapy import Request, Spider
+from scrapy.http import HtmlResponse
+
+from basketball_scrapy_project.profiling import ProfilingMiddleware
+
+
+def work_a():
+    pass
+
+
+def work_b():
+    pass
+
+
+async def parse_a(response):
+    work_a()
+    await asyncio.sleep(0)
+    work_a()
+    yield {'callback': 'a'}
+
+
+async def parse_b(response):
+    work_b()
+    await asyncio.sleep(0)
+    work_b()
+    yield {'callback': 'b'}
+
+
+def _calls(profile):
+    return {name: stat[1] for (_, _, name), stat in pstats.Stats(profile).stats.items() if name in ('work_a', 'work_b')}
+
+
+def test_overlapping_async_callbacks_keep_separate_profiles():
+    middleware = ProfilingMiddleware(crawler=None)
+    spider = Spider('test')
+
+    async def run(callback):
+        response = HtmlResponse('http://test/', body=b'', request=Request('http://test/', callback=callback))
+        return [item async for item in middleware.process_spider_output_async(response, callback(response), spider)]
+
+    async def main():
+        return await asyncio.gather(run(parse_a), run(parse_b))
+
+    assert asyncio.run(main()) == [[{'callback': 'a'}], [{'callback': 'b'}]]
+    assert _calls(middleware.profiles['parse_a']) == {'work_a': 2}
+    assert _calls(middleware.profiles['parse_b']) == {'work_b': 2}
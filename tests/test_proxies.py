@@ -0,0 +1,19 @@
+import asyncio
+
+from scrapy import Request, Spider
+from scrapy.utils.test import get_crawler
+
+from basketball_scrapy_project.proxies import ProxyPoolMiddleware
+from basketball_scrapy_project.rendering import RENDER_SLOT, render_request
+
+
+def test_rendered_pages_bypass_the_pool():
+    crawler = get_crawler(Spider, {'PROXY_POOL': ['http://10.0.0.1:3128', 'http://10.0.0.2:3128']})
+    middleware = ProxyPoolMiddleware.from_crawler(crawler)
+    request = render_request('https://www.basketball-reference.com/players/c/curryst01/shooting/2024',
+                             wait_for='#shot-wrapper')
+
+    assert asyncio.run(middleware.process_request(request, Spider('test'))) is None
+    assert 'proxy' not in request.meta
+    assert request.meta['download_slot'] == RENDER_SLOT
+    assert all(proxy.in_flight == 0 for proxy in middleware.proxies)
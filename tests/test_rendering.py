@@ -0,0 +1,68 @@
+import os
+import socket
+from fnmatch import fnmatchcase
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+from scrapy.settings import Settings
+
+from basketball_scrapy_project.rendering import (
+    SeleniumDownloadHandler, acquire_profile_dir, blocked_url_patterns, release_profile_dir, render_request,
+)
+
+
+class CrashedDriver:
+    capabilities = {}
+
+    def __init__(self):
+        self.closed = False
+
+    def get_log(self, kind):
+        return []
+
+    def get(self, url):
+        raise WebDriverException('invalid session id')
+
+    def quit(self):
+        self.closed = True
+
+
+def test_crashed_driver_is_replaced():
+    handler = SeleniumDownloadHandler(Settings())
+    driver = CrashedDriver()
+    handler._drivers.append(driver)
+    handler._idle_drivers.put(driver)
+    try:
+        with pytest.raises(WebDriverException):
+            handler._render(render_request('http://test/'))
+        assert driver.closed
+        assert handler._drivers == []
+        assert handler._idle_drivers.empty()
+    finally:
+        handler._threadpool.stop()
+
+
+def test_profile_with_stale_lock_is_reused(tmp_path):
+    profile_dir = tmp_path / 'profile-0'
+    profile_dir.mkdir()
+    # PID hors de la plage des processus (pid_max <= 2^22)
+    os.symlink(f"{socket.gethostname()}-99999999", profile_dir / 'SingletonLock')
+
+    assert acquire_profile_dir(str(tmp_path)) == str(profile_dir)
+    assert not os.path.lexists(profile_dir / 'SingletonLock')
+    release_profile_dir(str(profile_dir))
+
+
+def test_profile_locked_by_live_chrome_is_skipped(tmp_path):
+    os.makedirs(tmp_path / 'profile-0')
+    os.symlink(f"{socket.gethostname()}-{os.getpid()}", tmp_path / 'profile-0' / 'SingletonLock')
+
+    profile_dir = acquire_profile_dir(str(tmp_path))
+    assert profile_dir == str(tmp_path / 'profile-1')
+    release_profile_dir(profile_dir)
+
+
+def test_versioned_assets_are_blocked():
+    patterns = blocked_url_patterns(Settings({'RENDER_BLOCKED_RESOURCE_TYPES': ['image', 'font']}))
+    assert any(fnmatchcase('https://cdn.test/logo.png?v=3', p) for p in patterns)
+    assert any(fnmatchcase('https://cdn.test/font.woff2', p) for p in patterns)
@@ -0,0 +1,7 @@
+from basketball_scrapy_project.replay import FaultInjector
+
+
+def test_bursts_have_burst_size_responses():
+    injector = FaultInjector(burst_every=5, burst_size=1)
+    statuses = [injector.draw()[1] for _ in range(10)]
+    assert statuses == [429, None, None, None, None, 429, None, None, None, None]